@@ -13,10 +13,14 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import aiomysql
 
+import config
+from tools import utils
+
 
 class AsyncMysqlDB:
     def __init__(self, pool: aiomysql.Pool) -> None:
@@ -105,3 +109,141 @@ class AsyncMysqlDB:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, args)
                 return rows
+
+    async def executemany(self, sql: str, args_list: List[Iterable[Any]]) -> int:
+        """
+        批量执行同一条 sql，INSERT ... VALUES 语句会被合并成一条多行插入
+        :param sql:
+        :param args_list: 每一行的参数列表
+        :return:
+        """
+        if not args_list:
+            return 0
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                rows = await cur.executemany(sql, args_list)
+                return rows
+
+    async def upsert_many(self, table_name: str, items: List[Dict[str, Any]], key_cols: Sequence[str],
+                          insert_only_fields: Sequence[str] = ()) -> int:
+        """
+        批量新增或更新，依赖表上 key_cols 的唯一索引，生成 INSERT ... ON DUPLICATE KEY UPDATE 语句，
+        字段相同的记录合并为一条多行语句
+        :param table_name: 表名
+        :param items: 记录列表
+        :param key_cols: 唯一索引字段，冲突时不更新
+        :param insert_only_fields: 只在新增时写入、冲突时保留原值的字段，例如 add_ts
+        :return:
+        """
+        rows = 0
+        for fields, group in _group_by_fields(items).items():
+            fieldstr = ','.join([f'`{field}`' for field in fields])
+            valstr = ','.join(['%s'] * len(fields))
+            update_fields = [field for field in fields if field not in key_cols and field not in insert_only_fields]
+            if not update_fields:
+                update_fields = [key_cols[0]]
+            updatestr = ','.join(['`%s`=VALUES(`%s`)' % (field, field) for field in update_fields])
+            # VALUES 后面需要保留空格，aiomysql 才会把 executemany 合并成一条多行插入
+            sql = "INSERT INTO %s (%s) VALUES (%s) ON DUPLICATE KEY UPDATE %s" % (
+                table_name, fieldstr, valstr, updatestr
+            )
+            rows += await self.executemany(sql, [[item[field] for field in fields] for item in group])
+        return rows
+
+
+def _group_by_fields(items: List[Dict[str, Any]]) -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault(tuple(item.keys()), []).append(item)
+    return groups
+
+
+class _TableQueue:
+    def __init__(self, key_field: str, queue_size: int) -> None:
+        self.key_field = key_field
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_ready = asyncio.Event()
+        self.flush_task: Optional[asyncio.Task] = None
+
+
+class AsyncMysqlWriteBehind:
+    """
+    后台批量写入：存储层把记录放入按表划分的有界队列后立即返回，后台协程攒够一批或超过刷新间隔后批量写入
+    队列写满时 put 会等待，对爬虫形成反压；db.close() 时保证队列中的数据全部写完
+    """
+
+    def __init__(self, db: AsyncMysqlDB, batch_size: Optional[int] = None, flush_interval_ms: Optional[int] = None,
+                 queue_size: Optional[int] = None, insert_only_fields: Tuple[str, ...] = ("add_ts",)) -> None:
+        """
+        :param db: 数据库操作对象
+        :param batch_size: 每批写入的最大记录数
+        :param flush_interval_ms: 不足一批时最长等待多久写入，单位毫秒
+        :param queue_size: 每张表队列的最大长度
+        :param insert_only_fields: 只在新增记录时写入、更新时保留原值的字段
+        """
+        self._db = db
+        self.batch_size = batch_size or config.DB_WRITE_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or config.DB_WRITE_FLUSH_INTERVAL_MS) / 1000
+        self.queue_size = queue_size or config.DB_WRITE_QUEUE_SIZE
+        self.insert_only_fields = insert_only_fields
+        self._tables: Dict[str, _TableQueue] = {}
+        self._draining = False
+
+    async def put(self, table_name: str, key_field: str, item: Dict[str, Any]) -> None:
+        """
+        放入一条待写入的记录，记录存在时更新，不存在时新增
+        :param table_name: 表名
+        :param key_field: 用于判断记录是否存在的字段
+        :param item: 记录
+        :return:
+        """
+        table = self._tables.get(table_name)
+        if table is None:
+            table = self._tables[table_name] = _TableQueue(key_field, self.queue_size)
+        if table.flush_task is None or table.flush_task.done():
+            table.flush_task = asyncio.create_task(self._flush_loop(table_name, table))
+        await table.queue.put(item)
+        if table.queue.qsize() >= self.batch_size:
+            table.batch_ready.set()
+
+    async def _flush_loop(self, table_name: str, table: _TableQueue) -> None:
+        while True:
+            items = [await table.queue.get()]
+            if not self._draining and table.queue.qsize() + 1 < self.batch_size:
+                table.batch_ready.clear()
+                if table.queue.qsize() + 1 < self.batch_size:
+                    try:
+                        await asyncio.wait_for(table.batch_ready.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+            while len(items) < self.batch_size and not table.queue.empty():
+                items.append(table.queue.get_nowait())
+            try:
+                await self._write_batch(table_name, table.key_field, items)
+            except Exception as e:
+                utils.logger.error(f"[AsyncMysqlWriteBehind._flush_loop] write {len(items)} rows to {table_name} error: {e}")
+            finally:
+                for _ in items:
+                    table.queue.task_done()
+
+    async def _write_batch(self, table_name: str, key_field: str, items: List[Dict[str, Any]]) -> None:
+        # 同一批次里重复的记录只保留最后一条
+        latest: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            latest[str(item[key_field])] = item
+        await self._db.upsert_many(table_name, list(latest.values()), [key_field], self.insert_only_fields)
+
+    async def drain(self) -> None:
+        """
+        等待所有队列写完并停止后台写入协程
+        :return:
+        """
+        self._draining = True
+        for table in self._tables.values():
+            table.batch_ready.set()
+        for table in self._tables.values():
+            if table.flush_task is not None and not table.flush_task.done():
+                await table.queue.join()
+                table.flush_task.cancel()
+        self._tables.clear()
+        self._draining = False
@@ -9,11 +9,25 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
+import asyncio
+import codecs
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
 
 from playwright.async_api import BrowserContext, BrowserType
 
+import config
+
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.types import IpInfoModel
+from tools import json_codec
+from tools.crawler_util import format_proxy_info
+from tools.http_client import AsyncHttpClientPool
+from tools.rate_limiter import rate_limiter
+
 
 class AbstractCrawler(ABC):
     @abstractmethod
@@ -87,6 +101,15 @@ class AbstractStoreImage(ABC):
 
 
 class AbstractApiClient(ABC):
+    _http_pool: Optional[AsyncHttpClientPool] = None
+    # 平台名称，和 config.PLATFORM 的取值一致，用于按平台限速
+    platform: str = ""
+    # 代理池和当前使用的代理，代理被封禁时从代理池换一个新的
+    ip_pool: Optional[ProxyIpPool] = None
+    ip_proxy_info: Optional[IpInfoModel] = None
+    proxies: Optional[Dict] = None
+    _proxy_lock: Optional[asyncio.Lock] = None
+
     @abstractmethod
     async def request(self, method, url, **kwargs):
         pass
@@ -94,3 +117,119 @@ class AbstractApiClient(ABC):
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
+
+    @property
+    def http_pool(self) -> AsyncHttpClientPool:
+        """
+        API客户端共享的长连接池，首次使用时创建
+        """
+        if self._http_pool is None:
+            self._http_pool = AsyncHttpClientPool()
+        return self._http_pool
+
+    async def wait_rate_limit(self, url: str, proxies: Optional[Dict] = None):
+        """
+        发送请求前按 (平台, 接口类型, 代理) 从令牌桶获取令牌
+        """
+        await rate_limiter.acquire(self.platform, url, proxies)
+
+    def bind_proxy_pool(self, ip_pool: ProxyIpPool, ip_proxy_info: IpInfoModel):
+        """
+        绑定代理池和当前使用的代理，以平台名称作为会话标识粘性地使用该代理
+        """
+        self.ip_pool = ip_pool
+        self.ip_proxy_info = ip_proxy_info
+        _, self.proxies = format_proxy_info(ip_proxy_info)
+
+    def report_proxy_success(self, ip_proxy_info: Optional[IpInfoModel], latency: float):
+        """
+        上报通过代理成功的请求耗时，用于代理的健康评分
+        """
+        if self.ip_pool is not None and ip_proxy_info is not None:
+            self.ip_pool.report_success(ip_proxy_info, latency)
+
+    def report_proxy_failure(self, ip_proxy_info: Optional[IpInfoModel]):
+        """
+        上报通过代理失败的请求
+        """
+        if self.ip_pool is not None and ip_proxy_info is not None:
+            self.ip_pool.report_failure(ip_proxy_info)
+
+    async def acquire_proxy(self) -> Tuple[Optional[IpInfoModel], Optional[Dict]]:
+        """
+        选择本次请求使用的代理：开启 IP_PROXY_SPREAD_REQUESTS 时每个请求都从代理池按健康分选择，
+        并发的请求分散到多个代理上，每个代理各自的连接池和限速令牌桶；否则使用绑定的代理
+        :return: (代理信息, httpx 格式代理)
+        """
+        if self.ip_pool is None or not config.IP_PROXY_SPREAD_REQUESTS:
+            return self.ip_proxy_info, self.proxies
+        ip_proxy_info = await self.ip_pool.get_proxy()
+        _, proxies = format_proxy_info(ip_proxy_info)
+        return ip_proxy_info, proxies
+
+    @staticmethod
+    def parse_json(response: httpx.Response) -> Any:
+        """
+        用 json_codec 解析 JSON 响应，utf-8 编码的响应体直接解码 bytes，不再先转成字符串
+        :param response: 响应
+        :return:
+        """
+        # response.encoding 在 charset 缺失或无法识别时会回退到可用的编码，不会抛出 LookupError
+        if codecs.lookup(response.encoding).name == "utf-8":
+            return json_codec.loads(response.content)
+        return json_codec.loads(response.text)
+
+    async def send_request(self, method: str, url: str, proxies: Optional[Dict] = None, rate_limit: bool = True,
+                           **kwargs) -> Tuple[httpx.Response, Optional[IpInfoModel]]:
+        """
+        选择代理、限速后用该代理的长连接客户端发送请求，并上报代理的健康状况
+        :param method: 请求方法
+        :param url: 请求的URL
+        :param proxies: 指定 httpx 格式代理，不传时由 acquire_proxy 选择
+        :param rate_limit: 是否经过令牌桶限速，下载图片、视频等媒体文件时不限速
+        :param kwargs: 透传给 httpx 的请求参数
+        :return: (响应, 本次请求使用的代理信息)
+        """
+        if proxies:
+            ip_proxy_info = None
+        else:
+            ip_proxy_info, proxies = await self.acquire_proxy()
+        if rate_limit:
+            await self.wait_rate_limit(url, proxies)
+        client = self.http_pool.get_client(proxies)
+        start = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self.report_proxy_failure(ip_proxy_info)
+            raise
+        self.report_proxy_success(ip_proxy_info, time.monotonic() - start)
+        return response, ip_proxy_info
+
+    async def rotate_proxy(self, blocked_proxy: Optional[IpInfoModel]) -> Optional[Dict]:
+        """
+        代理被封禁时换一个新的代理，并发的请求同时被封时只换一次
+        :param blocked_proxy: 发起请求时使用的代理
+        :return: 新的 httpx 格式代理
+        """
+        if self.ip_pool is None or blocked_proxy is None:
+            return self.proxies
+        if self._proxy_lock is None:
+            self._proxy_lock = asyncio.Lock()
+        async with self._proxy_lock:
+            if config.IP_PROXY_SPREAD_REQUESTS and blocked_proxy is not self.ip_proxy_info:
+                # 请求分散在多个代理上时，只需要把被封的代理移出池子，后续请求会选择其他代理
+                if blocked_proxy in self.ip_pool.proxy_list:
+                    self.ip_pool.mark_blocked(blocked_proxy)
+            elif blocked_proxy is self.ip_proxy_info:
+                self.ip_proxy_info = await self.ip_pool.rotate_proxy(self.platform, blocked_proxy)
+                _, self.proxies = format_proxy_info(self.ip_proxy_info)
+        return self.proxies
+
+    async def close(self):
+        """
+        关闭API客户端持有的连接池
+        """
+        if self._http_pool is not None:
+            await self._http_pool.aclose()
+            self._http_pool = None
@@ -0,0 +1,164 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 异步 RedisCache 实现，连接池 + 批量读写 + 管道 + SCAN 遍历键
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from cache.abs_cache import AbstractAsyncCache
+from config import db_config
+from tools import json_codec
+
+
+class JsonCacheCodec:
+    """
+    紧凑的 JSON 编解码：不用 pickle，不会反序列化出任意对象，其他语言的进程也能读
+    只支持 JSON 能表示的类型，元组会变成列表
+    """
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return json_codec.dumps_bytes(value)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return json_codec.loads(data)
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, db: Optional[int] = None,
+                 password: Optional[str] = None, codec: Optional[JsonCacheCodec] = None) -> None:
+        """
+        :param host: redis 地址，默认读取 db_config
+        :param port: redis 端口
+        :param db: redis db
+        :param password: redis 密码
+        :param codec: 值的编解码器
+        """
+        self._redis_client = self._connect_redis(
+            host=host or db_config.REDIS_DB_HOST,
+            port=port or db_config.REDIS_DB_PORT,
+            db=db if db is not None else db_config.REDIS_DB_NUM,
+            password=password if password is not None else db_config.REDIS_DB_PWD,
+        )
+        self._codec = codec or JsonCacheCodec()
+
+    @staticmethod
+    def _connect_redis(host: str, port: int, db: int, password: Optional[str]) -> Redis:
+        """
+        创建带连接池的异步 redis 客户端，并发的协程复用池子里的连接，连接用完时排队等待而不是报错
+        :return:
+        """
+        pool = BlockingConnectionPool(
+            host=host,
+            port=int(port),
+            db=int(db),
+            password=password or None,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
+        )
+        return Redis(connection_pool=pool)
+
+    def _loads(self, value: Optional[bytes]) -> Optional[Any]:
+        return None if value is None else self._codec.loads(value)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        return self._loads(await self._redis_client.get(key))
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._redis_client.set(key, self._codec.dumps(value), ex=expire_time)
+
+    async def delete(self, *keys: str) -> int:
+        """
+        删除键
+        :param keys:
+        :return: 删除的键数量
+        """
+        if not keys:
+            return 0
+        return await self._redis_client.delete(*keys)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        一次 MGET 批量获取多个键的值
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [self._loads(value) for value in await self._redis_client.mget(keys)]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        通过管道批量设置多个带过期时间的键，每批只有一次网络往返
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        items = list(mapping.items())
+        batch_size = db_config.REDIS_PIPELINE_BATCH_SIZE
+        for index in range(0, len(items), batch_size):
+            async with self._redis_client.pipeline(transaction=False) as pipe:
+                for key, value in items[index:index + batch_size]:
+                    pipe.set(key, self._codec.dumps(value), ex=expire_time)
+                await pipe.execute()
+
+    async def iter_keys(self, pattern: str) -> AsyncIterator[str]:
+        """
+        用 SCAN 分批遍历符合 pattern 的键，不会像 KEYS 一样长时间阻塞 redis
+        :param pattern:
+        :return:
+        """
+        async for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT):
+            yield key.decode()
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key
+        :param pattern:
+        :return:
+        """
+        return [key async for key in self.iter_keys(pattern)]
+
+    async def close(self) -> None:
+        """
+        关闭客户端和连接池
+        :return:
+        """
+        await self._redis_client.close(close_connection_pool=True)
+
+
+if __name__ == '__main__':
+    async def main():
+        redis_cache = AsyncRedisCache()
+        await redis_cache.set("name", "程序员阿江-Relakkes", 1)
+        print(await redis_cache.get("name"))  # 程序员阿江-Relakkes
+        await redis_cache.mset({"a": [1, 2, 3], "b": {"c": 1}}, 10)
+        print(await redis_cache.mget(["a", "b", "not_exist"]))  # [[1, 2, 3], {'c': 1}, None]
+        print(await redis_cache.keys("*"))
+        await redis_cache.close()
+
+    asyncio.run(main())
@@ -36,5 +36,11 @@ class CacheFactory:
         elif cache_type == 'redis':
             from .redis_cache import RedisCache
             return RedisCache()
+        elif cache_type == 'tiered':
+            from .tiered_cache import TieredCache
+            return TieredCache(*args, **kwargs)
+        elif cache_type == 'redis_async':
+            from .async_redis_cache import AsyncRedisCache
+            return AsyncRedisCache(*args, **kwargs)
         else:
             raise ValueError(f'Unknown cache type: {cache_type}')
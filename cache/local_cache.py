@@ -16,23 +16,48 @@
 # @Desc    : 本地缓存
 
 import asyncio
+import fnmatch
+import functools
+import heapq
+import re
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
 from cache.abs_cache import AbstractCache
 
 
+@functools.lru_cache(maxsize=128)
+def compile_glob_pattern(pattern: str) -> Pattern:
+    """
+    把 redis 风格的通配符（* ? [abc]）编译为正则
+    :param pattern: 匹配模式
+    :return:
+    """
+    return re.compile(fnmatch.translate(pattern), re.DOTALL)
+
+
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_entries: Optional[int] = None):
         """
         初始化本地缓存
+        过期时间用最小堆维护，清理时只弹出已经过期的键；设置 max_entries 后超出容量按 LRU 淘汰
         :param cron_interval: 定时清楚cache的时间间隔
+        :param max_entries: 最多缓存的键数量，None 表示不限制
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_entries = max_entries
+        # 只有限制容量时才需要维护访问顺序，不限制时用普通 dict，读写和遍历都更快
+        self._cache_container: Dict[str, Tuple[Any, float]] = OrderedDict() if max_entries is not None else {}
+        # (过期时间, 键)，同一个键被重新设置后旧的堆元素作废，弹出时和容器里的过期时间比对
+        self._expire_heap: List[Tuple[float, str]] = []
         self._cron_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
         # 开启定时清理任务
         self._schedule_clear()
 
@@ -44,6 +69,9 @@ class ExpiringLocalCache(AbstractCache):
         if self._cron_task is not None:
             self._cron_task.cancel()
 
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
     def get(self, key: str) -> Optional[Any]:
         """
         从缓存中获取键的值
@@ -52,15 +80,32 @@ class ExpiringLocalCache(AbstractCache):
         """
         value, expire_time = self._cache_container.get(key, (None, 0))
         if value is None:
+            self.misses += 1
             return None
 
         # 如果键已过期，则删除键并返回None
         if expire_time < time.time():
             del self._cache_container[key]
+            self.expirations += 1
+            self.misses += 1
             return None
 
+        if self._max_entries is not None:
+            self._cache_container.move_to_end(key)
+        self.hits += 1
         return value
 
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        获取键的值和剩余存活秒数
+        :param key:
+        :return: (值, 剩余秒数)，键不存在时返回 (None, None)
+        """
+        value = self.get(key)
+        if value is None:
+            return None, None
+        return value, self._cache_container[key][1] - time.time()
+
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
         将键的值设置到缓存中
@@ -69,22 +114,53 @@ class ExpiringLocalCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        expire_at = time.time() + expire_time
+        if self._max_entries is not None:
+            if key in self._cache_container:
+                self._cache_container.move_to_end(key)
+            elif len(self._cache_container) >= self._max_entries:
+                self._clear()
+                while len(self._cache_container) >= self._max_entries:
+                    self._cache_container.popitem(last=False)
+                    self.evictions += 1
+        self._cache_container[key] = (value, expire_at)
+        heapq.heappush(self._expire_heap, (expire_at, key))
+        # 反复设置同一个键会在堆里留下作废的元素，超过一定比例时重建
+        if len(self._expire_heap) > 2 * len(self._cache_container) + 1024:
+            self._rebuild_heap()
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，支持 * ? [abc] 通配符
         :param pattern: 匹配模式
         :return:
         """
+        now = time.time()
         if pattern == '*':
-            return list(self._cache_container.keys())
+            return [key for key, (_, expire_time) in self._cache_container.items() if expire_time >= now]
 
-        # 本地缓存通配符暂时将*替换为空
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
+        prefix = pattern[:-1]
+        if pattern.endswith('*') and not any(char in prefix for char in '*?['):
+            # 最常见的 "前缀*" 模式直接按前缀比较，不走正则；先用 in 做一次更快的粗筛
+            return [key for key in self._cache_container
+                    if prefix in key and key.startswith(prefix) and self._cache_container[key][1] >= now]
 
-        return [key for key in self._cache_container.keys() if pattern in key]
+        match = compile_glob_pattern(pattern).match
+        return [key for key in self._cache_container
+                if match(key) and self._cache_container[key][1] >= now]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        缓存统计信息
+        :return:
+        """
+        return {
+            "size": len(self._cache_container),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
 
     def _schedule_clear(self):
         """
@@ -102,12 +178,25 @@ class ExpiringLocalCache(AbstractCache):
 
     def _clear(self):
         """
-        根据过期时间清理缓存
+        根据过期时间清理缓存，只处理堆顶已经过期的键
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
+        now = time.time()
+        heap = self._expire_heap
+        while heap and heap[0][0] < now:
+            expire_time, key = heapq.heappop(heap)
+            item = self._cache_container.get(key)
+            if item is not None and item[1] == expire_time:
                 del self._cache_container[key]
+                self.expirations += 1
+
+    def _rebuild_heap(self):
+        """
+        用容器中的有效过期时间重建堆，去掉作废的元素
+        :return:
+        """
+        self._expire_heap = [(expire_time, key) for key, (_, expire_time) in self._cache_container.items()]
+        heapq.heapify(self._expire_heap)
 
     async def _start_clear_cron(self):
         """
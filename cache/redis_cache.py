@@ -16,7 +16,7 @@
 # @Desc    : RedisCache实现
 import pickle
 import time
-from typing import Any, List
+from typing import Any, List, Optional, Tuple
 
 from redis import Redis
 
@@ -54,6 +54,20 @@ class RedisCache(AbstractCache):
             return None
         return pickle.loads(value)
 
+    def get_with_ttl(self, key: str) -> Tuple[Any, Optional[float]]:
+        """
+        通过管道在一次网络往返中获取键的值和剩余存活秒数
+        :param key:
+        :return: (值, 剩余秒数)，键不存在时返回 (None, None)，没有过期时间时剩余秒数为 None
+        """
+        pipe = self._redis_client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        value, pttl = pipe.execute()
+        if value is None:
+            return None, None
+        return pickle.loads(value), (pttl / 1000 if pttl >= 0 else None)
+
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
         将键的值设置到缓存中, 并且序列化
@@ -66,9 +80,9 @@ class RedisCache(AbstractCache):
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key, 使用 SCAN 分批遍历, 避免 KEYS 长时间阻塞 redis
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,111 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 两级缓存，进程内的有界缓存（近端）挡在 redis（远端）前面
+from typing import Any, Dict, List, Optional
+
+from cache.abs_cache import AbstractCache
+from cache.local_cache import ExpiringLocalCache
+from config import db_config
+
+# 近端缓存中表示"远端不存在该键"的标记
+_NEGATIVE = object()
+
+
+class TieredCache(AbstractCache):
+    """
+    两级缓存：
+    - 读：先查近端，未命中时读远端并回填近端，近端的存活时间不超过远端剩余的存活时间和 near_ttl
+    - 写：同时写远端和近端，远端是多个进程共享的权威数据
+    - 远端不存在的键在近端记一个短时间的否定结果，避免轮询时反复打到远端
+    """
+
+    def __init__(self, far_cache: Optional[AbstractCache] = None, near_max_entries: Optional[int] = None,
+                 near_ttl: Optional[float] = None, negative_ttl: Optional[float] = None) -> None:
+        """
+        :param far_cache: 远端缓存，需要实现 get_with_ttl，默认 RedisCache
+        :param near_max_entries: 近端最多缓存的键数量
+        :param near_ttl: 近端缓存的最长存活秒数
+        :param negative_ttl: 否定结果的存活秒数，0 表示不缓存否定结果
+        """
+        if far_cache is None:
+            from cache.redis_cache import RedisCache
+            far_cache = RedisCache()
+        self._far_cache = far_cache
+        self._near_cache = ExpiringLocalCache(
+            max_entries=near_max_entries or db_config.TIERED_CACHE_NEAR_MAX_ENTRIES
+        )
+        self._near_ttl = near_ttl if near_ttl is not None else db_config.TIERED_CACHE_NEAR_TTL
+        self._negative_ttl = negative_ttl if negative_ttl is not None else db_config.TIERED_CACHE_NEGATIVE_TTL
+        self.near_hits = 0
+        self.negative_hits = 0
+        self.far_hits = 0
+        self.far_misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值
+        :param key:
+        :return:
+        """
+        value = self._near_cache.get(key)
+        if value is _NEGATIVE:
+            self.negative_hits += 1
+            return None
+        if value is not None:
+            self.near_hits += 1
+            return value
+
+        value, ttl = self._far_cache.get_with_ttl(key)
+        if value is None:
+            self.far_misses += 1
+            if self._negative_ttl > 0:
+                self._near_cache.set(key, _NEGATIVE, self._negative_ttl)
+            return None
+
+        self.far_hits += 1
+        near_ttl = self._near_ttl if ttl is None else min(self._near_ttl, ttl)
+        if near_ttl > 0:
+            self._near_cache.set(key, value, near_ttl)
+        return value
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        写入远端并同步更新近端，同时覆盖掉该键的否定结果
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        self._far_cache.set(key, value, expire_time)
+        self._near_cache.set(key, value, min(self._near_ttl, expire_time))
+
+    def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key，近端只保存了部分键，直接查询远端
+        :param pattern:
+        :return:
+        """
+        return self._far_cache.keys(pattern)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        缓存统计信息
+        :return:
+        """
+        return {
+            "near_size": len(self._near_cache),
+            "near_hits": self.near_hits,
+            "negative_hits": self.negative_hits,
+            "far_hits": self.far_hits,
+            "far_misses": self.far_misses,
+        }
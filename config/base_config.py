@@ -43,6 +43,8 @@ KEEP_ALIVE = False
 # 词云相关
 # 是否开启生成评论词云图
 ENABLE_GET_WORDCLOUD = True
+# 词云图的渲染间隔，单位秒，爬取过程中按此间隔刷新词云图；0 表示只在爬虫结束时渲染一次
+WORDCLOUD_RENDER_INTERVAL = 0
 # 自定义词语及其分组
 # 添加规则：xx:yy 其中xx为自定义添加的词组，yy为将xx该词组分到的组名。
 CUSTOM_WORDS = {
@@ -91,12 +93,72 @@ PROXY_POOL_URL = 'http://localhost:5010/get'
 # 是否开启 IP 代理
 ENABLE_IP_PROXY = False
 
+# httpx 连接池配置，同一个爬虫的所有API请求共享长连接，避免每次请求都重新握手
+# 连接池最大连接数
+HTTPX_MAX_CONNECTIONS = 100
+# 连接池中最多保持的空闲长连接数
+HTTPX_MAX_KEEPALIVE_CONNECTIONS = 20
+# 空闲长连接的过期时间，单位秒
+HTTPX_KEEPALIVE_EXPIRY = 30
+# 是否开启 HTTP/2，需要额外安装 h2 包（pip install httpx[http2]）
+HTTPX_ENABLE_HTTP2 = False
+
+# API 请求限速（令牌桶），按 平台 + 接口类型 + 代理 分别计算，所有 API 客户端的 request 都会经过限速
+ENABLE_RATE_LIMIT = True
+# 限速规则: {平台: {接口类型: (每秒请求数, 突发容量)}}
+# 接口类型为请求 url 中包含的片段，没有匹配到的请求使用 default 规则；没有配置的平台不限速
+RATE_LIMIT_RULES = {
+    "xhs": {"default": (2, 5), "/comment/": (2, 5)},
+    "dy": {"default": (2, 5), "/comment/": (2, 5)},
+    "ks": {"default": (2, 5)},
+    "bili": {"default": (3, 6), "/reply/": (3, 6)},
+    "wb": {"default": (1, 3), "/comments/": (1, 3)},  # 微博对API的限流比较严重
+    "tieba": {"default": (2, 5), "/p/comment": (2, 5)},
+    "zhihu": {"default": (2, 5), "/comment_v5/": (2, 5)},
+}
+
+# 常驻 Node 签名进程数量（抖音 a_bogus、知乎 x-zse-96 签名使用）
+JS_SIGN_WORKER_NUM = 2
+
+# 签名用到的 localStorage 参数（xhs b1、抖音 xmst、B站 WBI keys）的缓存秒数，更新 cookie 时会立即失效
+SIGN_CONTEXT_CACHE_TTL = 60
+
+# 浏览器内签名（xhs _webmsxyw）合并批处理：收集并发请求的窗口秒数和单批最大请求数
+BROWSER_SIGN_BATCH_WINDOW = 0.005
+BROWSER_SIGN_BATCH_MAX_SIZE = 50
+
 # 未启用代理时的最大爬取间隔，单位秒（暂时仅对XHS有效）
 CRAWLER_MAX_SLEEP_SEC = 20
 
 # 代理IP池数量
 IP_PROXY_POOL_COUNT = 2
 
+# 代理IP池中可用代理低于该数量时在后台补充
+IP_PROXY_POOL_LOW_WATERMARK = 1
+
+# 补充代理IP池时同时验证的代理数量
+IP_PROXY_VALIDATE_CONCURRENCY = 5
+
+# 验证代理IP的超时时间，单位秒
+IP_PROXY_VALIDATE_TIMEOUT = 5
+
+# 代理IP连续失败该次数后移出代理池
+IP_PROXY_MAX_CONSECUTIVE_FAILURES = 3
+
+# 计算代理IP延迟中位数时保留的最近请求数
+IP_PROXY_LATENCY_WINDOW = 20
+
+# 代理池中所有代理IP都没有延迟记录时按该延迟计算健康分，单位秒
+IP_PROXY_DEFAULT_LATENCY = 1.0
+
+# 代理IP距离过期不足该秒数时降低选中的概率
+IP_PROXY_EXPIRE_MARGIN = 30
+
+# 开启后API客户端的每个请求都从代理池中选择代理，并发请求分散到多个代理上；关闭时整个会话使用同一个代理
+# 注意：登录态（cookie、签名）属于同一个账号，浏览器始终固定在一个代理上，开启后同一个账号会同时从多个IP访问接口，
+# 更容易触发平台的账号风控。适合不登录或者不在意账号风险、追求吞吐量的场景，默认关闭
+IP_PROXY_SPREAD_REQUESTS = False
+
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "ppool"
 
@@ -109,8 +171,22 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json
+# 数据保存类型选项配置,支持四种类型：csv、db、json、jsonl, 最好保存到DB，有排重的功能。
+# jsonl 为逐行追加写入，数据量大时比 json 快很多
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl
+
+# jsonl 存储：缓冲多少条数据后追加写入一次文件
+JSONL_FLUSH_BATCH_SIZE = 100
+# jsonl 存储：距离上次写入超过多少秒后立即写入，单位秒
+JSONL_FLUSH_INTERVAL = 5
+# jsonl 存储：每次写入后是否 fsync 落盘，防止进程异常退出丢数据
+JSONL_FSYNC = True
+# jsonl 存储：爬虫结束时是否额外转换出一份旧版格式的 json 数组文件
+JSONL_CONVERT_TO_JSON = True
+
+# JSON 编解码后端：auto | orjson | msgspec | json，auto 会优先使用已安装的 orjson、msgspec，都没有时使用标准库 json
+# orjson、msgspec 不是必须安装的依赖，需要时 pip install orjson
+JSON_CODEC_BACKEND = "auto"
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -124,6 +200,21 @@ CRAWLER_MAX_NOTES_COUNT = 50
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# 自适应并发（AIMD）：并发跑满且延迟正常时逐步提高并发，遇到风控/请求失败时并发减半
+# 关闭时并发数固定为 MAX_CONCURRENCY_NUM
+ENABLE_ADAPTIVE_CONCURRENCY = True
+# 自适应并发的上限
+ADAPTIVE_CONCURRENCY_MAX_NUM = 4
+# 请求耗时超过平均耗时的多少倍时视为延迟异常，不再提高并发
+ADAPTIVE_CONCURRENCY_LATENCY_FACTOR = 2.0
+
+# 关键词搜索流水线（search -> detail -> store -> comments）各阶段的初始并发数，开启自适应并发时会在此基础上调整
+# 搜索翻页不再等待上一页的评论爬完，阶段之间通过有界队列衔接
+PIPELINE_DETAIL_WORKER_NUM = MAX_CONCURRENCY_NUM
+PIPELINE_COMMENT_WORKER_NUM = MAX_CONCURRENCY_NUM
+# 每个阶段输入队列的长度上限，下游处理不过来时上游会等待
+PIPELINE_QUEUE_SIZE = 50
+
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
@@ -18,13 +18,36 @@ RELATION_DB_HOST = os.getenv("RELATION_DB_HOST", "localhost")
 RELATION_DB_PORT = os.getenv("RELATION_DB_PORT", 3306)
 RELATION_DB_NAME = os.getenv("RELATION_DB_NAME", "media_crawler")
 
+# 后台批量写入配置：每批最多写入多少条记录
+DB_WRITE_BATCH_SIZE = 100
+# 不足一批时最长等待多久写入，单位毫秒
+DB_WRITE_FLUSH_INTERVAL_MS = 500
+# 每张表待写入队列的最大长度，队列写满时爬虫会等待写入完成
+DB_WRITE_QUEUE_SIZE = 1000
+
 
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
+# 异步 redis 客户端连接池的最大连接数
+REDIS_MAX_CONNECTIONS = 20
+# SCAN 遍历键时每次扫描的数量
+REDIS_SCAN_COUNT = 500
+# 批量写入时每个管道包含的命令数
+REDIS_PIPELINE_BATCH_SIZE = 1000
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
-CACHE_TYPE_MEMORY = "memory"
\ No newline at end of file
+CACHE_TYPE_MEMORY = "memory"
+CACHE_TYPE_REDIS_ASYNC = "redis_async"
+CACHE_TYPE_TIERED = "tiered"
+
+# 两级缓存（进程内 + redis）配置
+# 进程内缓存最多保存的键数量
+TIERED_CACHE_NEAR_MAX_ENTRIES = 10000
+# 进程内缓存的最长存活秒数，其他进程写入的新值最多延迟这么久可见
+TIERED_CACHE_NEAR_TTL = 5
+# redis 中不存在的键在进程内缓存的秒数，避免反复查询不存在的键
+TIERED_CACHE_NEGATIVE_TTL = 1
\ No newline at end of file
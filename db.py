@@ -21,9 +21,9 @@ import aiofiles
 import aiomysql
 
 import config
-from async_db import AsyncMysqlDB
+from async_db import AsyncMysqlDB, AsyncMysqlWriteBehind
 from tools import utils
-from var import db_conn_pool_var, media_crawler_db_var
+from var import db_conn_pool_var, media_crawler_db_var, media_crawler_db_writer_var
 
 
 async def init_mediacrawler_db():
@@ -42,9 +42,10 @@ async def init_mediacrawler_db():
     )
     async_db_obj = AsyncMysqlDB(pool)
 
-    # 将连接池对象和封装的CRUD sql接口对象放到上下文变量中
+    # 将连接池对象、封装的CRUD sql接口对象和后台批量写入对象放到上下文变量中
     db_conn_pool_var.set(pool)
     media_crawler_db_var.set(async_db_obj)
+    media_crawler_db_writer_var.set(AsyncMysqlWriteBehind(async_db_obj))
 
 
 async def init_db():
@@ -60,14 +61,19 @@ async def init_db():
 
 async def close():
     """
-    关闭连接池
+    等待后台批量写入队列写完，再关闭连接池
     Returns:
 
     """
+    db_writer: AsyncMysqlWriteBehind = media_crawler_db_writer_var.get(None)
+    if db_writer is not None:
+        utils.logger.info("[close] drain mediacrawler db write queue")
+        await db_writer.drain()
     utils.logger.info("[close] close mediacrawler db pool")
     db_pool: aiomysql.Pool = db_conn_pool_var.get()
     if db_pool is not None:
         db_pool.close()
+        await db_pool.wait_closed()
 
 
 async def init_table_schema():
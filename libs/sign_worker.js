@@ -0,0 +1,48 @@
+// 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+// 1. 不得用于任何商业用途。
+// 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+// 3. 不得进行大规模爬取或对平台造成运营干扰。
+// 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+// 5. 不得用于任何非法或不当的用途。
+//
+// 详细许可条款请参阅项目根目录下的LICENSE文件。
+// 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+// 常驻签名进程：启动时加载一次签名脚本，之后通过 stdin/stdout 按行交换 JSON
+// 启动方式: node libs/sign_worker.js <签名脚本路径>
+// 请求行: [[id, 函数名, [参数...]], ...]
+// 响应行: [[id, true, 返回值], [id, false, 错误信息], ...]
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+const scriptPath = process.argv[2];
+globalThis.require = require;
+vm.runInThisContext(fs.readFileSync(scriptPath, 'utf-8').replace(/^﻿/, ''), {filename: scriptPath});
+
+const functionCache = {};
+
+function resolveFunction(name) {
+    if (!(name in functionCache)) {
+        functionCache[name] = vm.runInThisContext(name);
+    }
+    return functionCache[name];
+}
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', (line) => {
+    if (!line) {
+        return;
+    }
+    const responses = JSON.parse(line).map(([id, name, args]) => {
+        try {
+            return [id, true, resolveFunction(name).apply(null, args)];
+        } catch (e) {
+            return [id, false, String(e && e.stack || e)];
+        }
+    });
+    process.stdout.write(JSON.stringify(responses) + '\n');
+});
+rl.on('close', () => process.exit(0));
+
+process.stdout.write('"ready"\n');
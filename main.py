@@ -10,6 +10,7 @@
 
 
 import asyncio
+import contextlib
 import sys
 
 import cmd_arg
@@ -23,6 +24,8 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from tools.jsonl_writer import jsonl_writer
+from tools.words import word_cloud_generator
 
 
 class CrawlerFactory:
@@ -53,16 +56,29 @@ async def main():
         await db.init_db()
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    try:
+        await crawler.start()
+    finally:
+        # 爬虫异常退出或者被 Ctrl-C 中断时，也要把缓冲的数据写完再关闭
+        if config.SAVE_DATA_OPTION == "db":
+            await db.close()
+        elif config.SAVE_DATA_OPTION == "jsonl":
+            await jsonl_writer.close()
 
-    if config.SAVE_DATA_OPTION == "db":
-        await db.close()
+        # 爬虫结束后统一渲染一次词云图
+        await word_cloud_generator.close()
 
-    
 
 if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    main_task = loop.create_task(main())
     try:
         # asyncio.run(main())
-        asyncio.get_event_loop().run_until_complete(main())
+        loop.run_until_complete(main_task)
     except KeyboardInterrupt:
+        # 取消爬虫任务，让 main 的 finally 执行完收尾工作再退出
+        if not main_task.done():
+            main_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                loop.run_until_complete(main_task)
         sys.exit()
@@ -15,14 +15,14 @@
 # @Desc    : bilibili 请求客户端
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.signing_context import SigningContextCache, read_local_storage
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
@@ -30,6 +30,8 @@ from .help import BilibiliSign
 
 
 class BilibiliClient(AbstractApiClient):
+    platform = "bili"
+
     def __init__(
             self,
             timeout=10,
@@ -44,15 +46,15 @@ class BilibiliClient(AbstractApiClient):
         self.headers = headers
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
+        self._sign_context = SigningContextCache()
         self.cookie_dict = cookie_dict
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
-        data: Dict = response.json()
+        response, _ = await self.send_request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
+        data: Dict = self.parse_json(response)
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -73,10 +75,13 @@ class BilibiliClient(AbstractApiClient):
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
-        获取最新的 img_key 和 sub_key
+        获取最新的 img_key 和 sub_key，结果会缓存，cookie 更新后重新获取
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        return await self._sign_context.get("wbi_keys", self._load_wbi_keys)
+
+    async def _load_wbi_keys(self) -> Tuple[str, str]:
+        local_storage = await read_local_storage(self.playwright_page, ["wbi_img_urls", "wbi_img_url", "wbi_sub_url"])
         wbi_img_urls = local_storage.get("wbi_img_urls", "") or local_storage.get(
             "wbi_img_url") + "-" + local_storage.get("wbi_sub_url")
         if wbi_img_urls and "-" in wbi_img_urls:
@@ -125,6 +130,7 @@ class BilibiliClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self._sign_context.invalidate()
 
     async def search_video_by_keyword(self, keyword: str, page: int = 1, page_size: int = 20,
                                       order: SearchOrderType = SearchOrderType.DEFAULT,
@@ -192,13 +198,12 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        response, _ = await self.send_request("GET", url, rate_limit=False, timeout=self.timeout, headers=self.headers)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
+            return None
+        else:
+            return response.content
 
     async def get_video_comments(self,
                                  video_id: str,
@@ -226,6 +231,7 @@ class BilibiliClient(AbstractApiClient):
                                      max_count: int = 10,):
         """
         get video all comments include sub comments
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_video_all_comments
         :param video_id:
         :param crawl_interval:
         :param is_fetch_sub_comments:
@@ -234,33 +240,45 @@ class BilibiliClient(AbstractApiClient):
 
         :return:
         """
-
         result = []
+        async for comment_list in self.iter_video_all_comments(video_id, crawl_interval, is_fetch_sub_comments,
+                                                               max_count):
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(video_id, comment_list)
+            result.extend(comment_list)
+        return result
+
+    async def iter_video_all_comments(self, video_id: str, crawl_interval: float = 1.0, is_fetch_sub_comments=False,
+                                      max_count: int = 10) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取视频的所有评论，每拿到一页一级评论或二级评论就 yield 出去，不在内存中累积
+        :param video_id:
+        :param crawl_interval:
+        :param is_fetch_sub_comments: 是否获取二级评论，二级评论紧跟在所属的一级评论页之后
+        :param max_count: 一次笔记爬取的最大一级评论数量
+        :return:
+        """
+        count = 0
         is_end = False
         next_page = 0
-        while not is_end and len(result) < max_count:
+        while not is_end and count < max_count:
             comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
             cursor_info: Dict = comments_res.get("cursor")
             comment_list: List[Dict] = comments_res.get("replies", [])
             is_end = cursor_info.get("is_end")
             next_page = cursor_info.get("next")
-            if is_fetch_sub_comments:
-                for comment in comment_list:
-                    comment_id = comment['rpid']
-                    if (comment.get("rcount", 0) > 0):
-                        {
-                            await self.get_video_all_level_two_comments(
-                                video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval,  callback)
-                        }
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(video_id, comment_list)
+            if count + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - count]
+            count += len(comment_list)
+            yield comment_list
             await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
-                result.extend(comment_list)
                 continue
-        return result
+            for comment in comment_list:
+                if comment.get("rcount", 0) > 0:
+                    async for sub_comment_list in self.iter_video_all_level_two_comments(
+                            video_id, comment["rpid"], CommentOrderType.DEFAULT, 10, crawl_interval):
+                        yield sub_comment_list
 
     async def get_video_all_level_two_comments(self,
                                                video_id: str,
@@ -269,7 +287,7 @@ class BilibiliClient(AbstractApiClient):
                                                ps: int = 10,
                                                crawl_interval: float = 1.0,
                                                callback: Optional[Callable] = None,
-                                               ) -> Dict:
+                                               ) -> List[Dict]:
         """
         get video all level two comments for a level one comment
         :param video_id: 视频 ID
@@ -280,14 +298,36 @@ class BilibiliClient(AbstractApiClient):
         :param callback:
         :return:
         """
+        result = []
+        async for comment_list in self.iter_video_all_level_two_comments(video_id, level_one_comment_id, order_mode,
+                                                                         ps, crawl_interval):
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(video_id, comment_list)
+            result.extend(comment_list)
+        return result
 
+    async def iter_video_all_level_two_comments(self,
+                                                video_id: str,
+                                                level_one_comment_id: int,
+                                                order_mode: CommentOrderType,
+                                                ps: int = 10,
+                                                crawl_interval: float = 1.0,
+                                                ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取一级评论下的所有二级评论
+        :param video_id: 视频 ID
+        :param level_one_comment_id: 一级评论 ID
+        :param order_mode:
+        :param ps: 一页评论数
+        :param crawl_interval:
+        :return:
+        """
         pn = 1
         while True:
             result = await self.get_video_level_two_comments(
                 video_id, level_one_comment_id, pn, ps, order_mode)
             comment_list: List[Dict] = result.get("replies", [])
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(video_id, comment_list)
+            yield comment_list
             await asyncio.sleep(crawl_interval)
             if (int(result["page"]["count"]) <= pn * ps):
                 break
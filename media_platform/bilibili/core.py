@@ -29,6 +29,8 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
+from tools.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from tools.pipeline import CrawlerPipeline
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -48,9 +50,10 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(session_key=BilibiliClient.platform)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info)
 
@@ -70,29 +73,34 @@ class BilibiliCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
-            if not await self.bili_client.pong():
-                login_obj = BilibiliLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-                await self.bili_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
-            elif config.CRAWLER_TYPE == "creator":
-                for creator_id in config.BILI_CREATOR_ID_LIST:
-                    await self.get_creator_videos(int(creator_id))
-            else:
-                pass
+            try:
+                if ip_proxy_pool:
+                    self.bili_client.bind_proxy_pool(ip_proxy_pool, ip_proxy_info)
+                if not await self.bili_client.pong():
+                    login_obj = BilibiliLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    await login_obj.begin()
+                    await self.bili_client.update_cookies(browser_context=self.browser_context)
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for video and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
+                elif config.CRAWLER_TYPE == "creator":
+                    for creator_id in config.BILI_CREATOR_ID_LIST:
+                        await self.get_creator_videos(int(creator_id))
+                else:
+                    pass
+            finally:
+                await self.bili_client.close()
             utils.logger.info(
                 "[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
@@ -129,97 +137,115 @@ class BilibiliCrawler(AbstractCrawler):
     async def search(self):
         """
         search bilibili video with keywords
+        搜索翻页、视频详情、存储、评论分为流水线的不同阶段并发执行，翻页不需要等待上一页的评论爬完
         :return:
         """
         utils.logger.info("[BilibiliCrawler.search] Begin search bilibli keywords")
+        detail_semaphore = get_concurrency_limiter("bili.detail", config.PIPELINE_DETAIL_WORKER_NUM)
+        media_semaphore = get_concurrency_limiter("bili.media")
+        comment_semaphore = get_concurrency_limiter("bili.comments", config.PIPELINE_COMMENT_WORKER_NUM)
+
+        async def detail_stage(aid: str, emit) -> None:
+            video_item = await self.get_video_info_task(aid=aid, bvid="", semaphore=detail_semaphore)
+            if video_item:
+                await emit(video_item)
+
+        async def store_stage(video_item: Dict, emit) -> None:
+            await bilibili_store.update_bilibili_video(video_item)
+            await bilibili_store.update_up_info(video_item)
+            await self.get_bilibili_video(video_item, media_semaphore)
+            await emit(video_item.get("View").get("aid"))
+
+        async def comment_stage(video_id: str, _) -> None:
+            await self.get_comments(video_id, comment_semaphore)
+
+        pipeline = (
+            CrawlerPipeline("bilibili_search")
+            .add_stage("search", self.search_videos_by_keyword)
+            .add_stage("detail", detail_stage, workers=detail_semaphore.max_limit)
+            .add_stage("store", store_stage)
+        )
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comments", comment_stage, workers=comment_semaphore.max_limit)
+        else:
+            utils.logger.info("[BilibiliCrawler.search] Crawling comment mode is not enabled")
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_videos_by_keyword(self, keyword: str, emit):
+        """
+        按关键词翻页搜索视频，把每个视频的 aid 交给详情阶段
+        :param keyword: 搜索关键词
+        :param emit: 放入详情阶段队列
+        :return:
+        """
         bili_limit_count = 20  # bilibili limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search] Current search keyword: {keyword}")
-            # 每个关键词最多返回 1000 条数据
-            if not config.ALL_DAY:
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[BilibiliCrawler.search] Current search keyword: {keyword}")
+        # 每个关键词最多返回 1000 条数据
+        if not config.ALL_DAY:
+            page = 1
+            while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+                if page < start_page:
+                    utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
+                    page += 1
+                    continue
+
+                utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, page: {page}")
+                videos_res = await self.bili_client.search_video_by_keyword(
+                    keyword=keyword,
+                    page=page,
+                    page_size=bili_limit_count,
+                    order=SearchOrderType.DEFAULT,
+                    pubtime_begin_s=0,  # 作品发布日期起始时间戳
+                    pubtime_end_s=0  # 作品发布日期结束日期时间戳
+                )
+                video_list: List[Dict] = videos_res.get("result")
+                try:
+                    aid_list = [video_item.get("aid") for video_item in video_list]
+                except Exception as e:
+                    aid_list = []
+                    utils.logger.warning(f"[BilibiliCrawler.search] error in the task list. The video for this page will not be included. {e}")
+                for aid in aid_list:
+                    await emit(aid)
+                page += 1
+        # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
+        else:
+            for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
+                # 按照每一天进行爬取的时间戳参数
+                pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
                 page = 1
+                #!该段 while 语句在发生异常时（通常情况下为当天数据为空时）会自动跳转到下一天，以实现最大程度爬取该关键词下当天的所有视频
+                #!除了仅保留现在原有的 try, except Exception 语句外，不要再添加其他的异常处理！！！否则将使该段代码失效，使其仅能爬取当天一天数据而无法跳转到下一天
+                #!除非将该段代码的逻辑进行重构以实现相同的功能，否则不要进行修改！！！
                 while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                    if page < start_page:
-                        utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
-                        page += 1
-                        continue
-
-                    utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, page: {page}")
-                    video_id_list: List[str] = []
-                    videos_res = await self.bili_client.search_video_by_keyword(
-                        keyword=keyword,
-                        page=page,
-                        page_size=bili_limit_count,
-                        order=SearchOrderType.DEFAULT,
-                        pubtime_begin_s=0,  # 作品发布日期起始时间戳
-                        pubtime_end_s=0  # 作品发布日期结束日期时间戳
-                    )
-                    video_list: List[Dict] = videos_res.get("result")
-
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = []
+                    #! Catch any error if response return nothing, go to next day
                     try:
-                        task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+                        #! Don't skip any page, to make sure gather all video in one day
+                        # if page < start_page:
+                        #     utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
+                        #     page += 1
+                        #     continue
+
+                        utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
+                        videos_res = await self.bili_client.search_video_by_keyword(
+                            keyword=keyword,
+                            page=page,
+                            page_size=bili_limit_count,
+                            order=SearchOrderType.DEFAULT,
+                            pubtime_begin_s=pubtime_begin_s,  # 作品发布日期起始时间戳
+                            pubtime_end_s=pubtime_end_s  # 作品发布日期结束日期时间戳
+                        )
+                        video_list: List[Dict] = videos_res.get("result")
+                        for video_item in video_list:
+                            await emit(video_item.get("aid"))
+                        page += 1
+                    # go to next day
                     except Exception as e:
-                        utils.logger.warning(f"[BilibiliCrawler.search] error in the task list. The video for this page will not be included. {e}")
-                    video_items = await asyncio.gather(*task_list)
-                    for video_item in video_items:
-                        if video_item:
-                            video_id_list.append(video_item.get("View").get("aid"))
-                            await bilibili_store.update_bilibili_video(video_item)
-                            await bilibili_store.update_up_info(video_item)
-                            await self.get_bilibili_video(video_item, semaphore)
-                    page += 1
-                    await self.batch_get_video_comments(video_id_list)
-            # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
-            else:
-                for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
-                    # 按照每一天进行爬取的时间戳参数
-                    pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
-                    page = 1
-                    #!该段 while 语句在发生异常时（通常情况下为当天数据为空时）会自动跳转到下一天，以实现最大程度爬取该关键词下当天的所有视频
-                    #!除了仅保留现在原有的 try, except Exception 语句外，不要再添加其他的异常处理！！！否则将使该段代码失效，使其仅能爬取当天一天数据而无法跳转到下一天
-                    #!除非将该段代码的逻辑进行重构以实现相同的功能，否则不要进行修改！！！
-                    while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                        #! Catch any error if response return nothing, go to next day
-                        try:
-                            #! Don't skip any page, to make sure gather all video in one day
-                            # if page < start_page:
-                            #     utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
-                            #     page += 1
-                            #     continue
-
-                            utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
-                            video_id_list: List[str] = []
-                            videos_res = await self.bili_client.search_video_by_keyword(
-                                keyword=keyword,
-                                page=page,
-                                page_size=bili_limit_count,
-                                order=SearchOrderType.DEFAULT,
-                                pubtime_begin_s=pubtime_begin_s,  # 作品发布日期起始时间戳
-                                pubtime_end_s=pubtime_end_s  # 作品发布日期结束日期时间戳
-                            )
-                            video_list: List[Dict] = videos_res.get("result")
-
-                            semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                            task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                            video_items = await asyncio.gather(*task_list)
-                            for video_item in video_items:
-                                if video_item:
-                                    video_id_list.append(video_item.get("View").get("aid"))
-                                    await bilibili_store.update_bilibili_video(video_item)
-                                    await bilibili_store.update_up_info(video_item)
-                                    await self.get_bilibili_video(video_item, semaphore)
-                            page += 1
-                            await self.batch_get_video_comments(video_id_list)
-                        # go to next day
-                        except Exception as e:
-                            print(e)
-                            break
+                        print(e)
+                        break
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -234,7 +260,7 @@ class BilibiliCrawler(AbstractCrawler):
 
         utils.logger.info(
             f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("bili.comments")
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(self.get_comments(
@@ -242,7 +268,7 @@ class BilibiliCrawler(AbstractCrawler):
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """
         get comment for video id
         :param video_id:
@@ -253,18 +279,20 @@ class BilibiliCrawler(AbstractCrawler):
             try:
                 utils.logger.info(
                     f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await self.bili_client.get_video_all_comments(
+                async for comments in self.bili_client.iter_video_all_comments(
                     video_id=video_id,
                     crawl_interval=random.random(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
+                ):
+                    await bilibili_store.batch_update_bilibili_video_comments(video_id, comments)
 
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
             except Exception as e:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[BilibiliCrawler.get_comments] may be been blocked, err:{e}")
 
@@ -282,7 +310,7 @@ class BilibiliCrawler(AbstractCrawler):
                 video_bvids_list.append(video["bvid"])
             if (int(result["page"]["count"]) <= pn * ps):
                 break
-            await asyncio.sleep(random.random())
+            # 翻页速率由 API 客户端的令牌桶限速控制
             pn += 1
         await self.get_specified_videos(video_bvids_list)
 
@@ -291,7 +319,7 @@ class BilibiliCrawler(AbstractCrawler):
         get specified videos info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("bili.detail")
         task_list = [
             self.get_video_info_task(aid=0, bvid=video_id, semaphore=semaphore) for video_id in
             bvids_list
@@ -309,7 +337,7 @@ class BilibiliCrawler(AbstractCrawler):
                 await self.get_bilibili_video(video_detail, semaphore)
         await self.batch_get_video_comments(video_aids_list)
 
-    async def get_video_info_task(self, aid: int, bvid: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_video_info_task(self, aid: int, bvid: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[Dict]:
         """
         Get video detail task
         :param aid:
@@ -322,6 +350,7 @@ class BilibiliCrawler(AbstractCrawler):
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
                 return result
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[BilibiliCrawler.get_video_info_task] Get video detail error: {ex}")
                 return None
@@ -330,7 +359,7 @@ class BilibiliCrawler(AbstractCrawler):
                     f"[BilibiliCrawler.get_video_info_task] have not fund note detail video_id:{bvid}, err: {ex}")
                 return None
 
-    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: asyncio.Semaphore) -> Union[Dict, None]:
+    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: AdaptiveConcurrencyLimiter) -> Union[Dict, None]:
         """
                 Get video play url
                 :param aid:
@@ -343,6 +372,7 @@ class BilibiliCrawler(AbstractCrawler):
                 result = await self.bili_client.get_video_play_url(aid=aid, cid=cid)
                 return result
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[BilibiliCrawler.get_video_play_url_task] Get video play url error: {ex}")
                 return None
@@ -431,7 +461,7 @@ class BilibiliCrawler(AbstractCrawler):
             )
             return browser_context
 
-    async def get_bilibili_video(self, video_item: Dict, semaphore: asyncio.Semaphore):
+    async def get_bilibili_video(self, video_item: Dict, semaphore: AdaptiveConcurrencyLimiter):
         """
         download bilibili video
         :param video_item:
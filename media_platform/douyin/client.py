@@ -13,13 +13,14 @@ import asyncio
 import copy
 import json
 import urllib.parse
-from typing import Any, Callable, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
-import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.js_signer import close_sign_worker_pools
+from tools.signing_context import SigningContextCache, read_local_storage
 from var import request_keyword_var
 
 from .exception import *
@@ -28,6 +29,8 @@ from .help import *
 
 
 class DOUYINClient(AbstractApiClient):
+    platform = "dy"
+
     def __init__(
             self,
             timeout=30,
@@ -42,6 +45,7 @@ class DOUYINClient(AbstractApiClient):
         self.headers = headers
         self._host = "https://www.douyin.com"
         self.playwright_page = playwright_page
+        self._sign_context = SigningContextCache()
         self.cookie_dict = cookie_dict
 
     async def __process_req_params(
@@ -52,7 +56,9 @@ class DOUYINClient(AbstractApiClient):
         if not params:
             return
         headers = headers or self.headers
-        local_storage: Dict = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
+        local_storage: Dict = await self._sign_context.get(
+            "local_storage", lambda: read_local_storage(self.playwright_page, ["xmst"])  # type: ignore
+        )
         common_params = {
             "device_platform": "webapp",
             "aid": "6383",
@@ -92,19 +98,22 @@ class DOUYINClient(AbstractApiClient):
         params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        response = None
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
+        response, _ = await self.send_request(method, url, timeout=self.timeout, **kwargs)
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
                 raise Exception("account blocked")
-            return response.json()
+            return self.parse_json(response)
         except Exception as e:
             raise DataFetchError(f"{e}, {response.text}")
 
+    async def close(self):
+        """
+        关闭连接池和常驻的签名进程
+        """
+        await super().close()
+        await close_sign_worker_pools()
+
     async def get(self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
         """
         GET请求
@@ -130,6 +139,7 @@ class DOUYINClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self._sign_context.invalidate()
 
     async def search_info_by_keyword(
             self,
@@ -234,6 +244,7 @@ class DOUYINClient(AbstractApiClient):
     ):
         """
         获取帖子的所有评论，包括子评论
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_aweme_all_comments
         :param aweme_id: 帖子ID
         :param crawl_interval: 抓取间隔
         :param is_fetch_sub_comments: 是否抓取子评论
@@ -242,20 +253,41 @@ class DOUYINClient(AbstractApiClient):
         :return: 评论列表
         """
         result = []
+        async for comments in self.iter_aweme_all_comments(aweme_id, crawl_interval, is_fetch_sub_comments, max_count):
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(aweme_id, comments)
+            result.extend(comments)
+        return result
+
+    async def iter_aweme_all_comments(
+            self,
+            aweme_id: str,
+            crawl_interval: float = 1.0,
+            is_fetch_sub_comments=False,
+            max_count: int = 10,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取帖子的所有评论，每拿到一页评论或子评论就 yield 出去，不在内存中累积
+        :param aweme_id: 帖子ID
+        :param crawl_interval: 抓取间隔
+        :param is_fetch_sub_comments: 是否抓取子评论
+        :param max_count: 一次帖子爬取的最大评论数量
+        :return:
+        """
+        count = 0
         comments_has_more = 1
         comments_cursor = 0
-        while comments_has_more and len(result) < max_count:
+        while comments_has_more and count < max_count:
             comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
             comments_has_more = comments_res.get("has_more", 0)
             comments_cursor = comments_res.get("cursor", 0)
             comments = comments_res.get("comments", [])
             if not comments:
                 continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            result.extend(comments)
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(aweme_id, comments)
+            if count + len(comments) > max_count:
+                comments = comments[:max_count - count]
+            count += len(comments)
+            yield comments
 
             await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
@@ -277,11 +309,9 @@ class DOUYINClient(AbstractApiClient):
 
                         if not sub_comments:
                             continue
-                        result.extend(sub_comments)
-                        if callback:  # 如果有回调函数，就执行回调函数
-                            await callback(aweme_id, sub_comments)
+                        count += len(sub_comments)
+                        yield sub_comments
                         await asyncio.sleep(crawl_interval)
-        return result
 
     async def get_user_info(self, sec_user_id: str):
         uri = "/aweme/v1/web/user/profile/other/"
@@ -12,10 +12,9 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
@@ -27,6 +26,8 @@ from .graphql import KuaiShouGraphQL
 
 
 class KuaiShouClient(AbstractApiClient):
+    platform = "ks"
+
     def __init__(
         self,
         timeout=10,
@@ -45,9 +46,8 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
-        data: Dict = response.json()
+        response, _ = await self.send_request(method, url, timeout=self.timeout, **kwargs)
+        data: Dict = self.parse_json(response)
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
@@ -186,32 +186,49 @@ class KuaiShouClient(AbstractApiClient):
     ):
         """
         get video all comments include sub comments
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_video_all_comments
         :param photo_id:
         :param crawl_interval:
         :param callback:
         :param max_count:
         :return:
         """
-
         result = []
+        async for comments in self.iter_video_all_comments(photo_id, crawl_interval, max_count):
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(photo_id, comments)
+            result.extend(comments)
+        return result
+
+    async def iter_video_all_comments(
+        self,
+        photo_id: str,
+        crawl_interval: float = 1.0,
+        max_count: int = 10,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取视频的所有评论（含二级评论），每拿到一页评论就 yield 出去，不在内存中累积
+        :param photo_id:
+        :param crawl_interval:
+        :param max_count:
+        :return:
+        """
+        count = 0
         pcursor = ""
 
-        while pcursor != "no_more" and len(result) < max_count:
+        while pcursor != "no_more" and count < max_count:
             comments_res = await self.get_video_comments(photo_id, pcursor)
             vision_commen_list = comments_res.get("visionCommentList", {})
             pcursor = vision_commen_list.get("pcursor", "")
             comments = vision_commen_list.get("rootComments", [])
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(photo_id, comments)
-            result.extend(comments)
+            if count + len(comments) > max_count:
+                comments = comments[: max_count - count]
+            count += len(comments)
+            yield comments
             await asyncio.sleep(crawl_interval)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments, photo_id, crawl_interval, callback
-            )
-            result.extend(sub_comments)
-        return result
+            async for sub_comments in self.iter_comments_all_sub_comments(comments, photo_id, crawl_interval):
+                count += len(sub_comments)
+                yield sub_comments
 
     async def get_comments_all_sub_comments(
         self,
@@ -229,18 +246,39 @@ class KuaiShouClient(AbstractApiClient):
             callback: 一次评论爬取结束后
         Returns:
 
+        """
+        result = []
+        async for sub_comments in self.iter_comments_all_sub_comments(comments, photo_id, crawl_interval):
+            if callback:
+                await callback(photo_id, sub_comments)
+            result.extend(sub_comments)
+        return result
+
+    async def iter_comments_all_sub_comments(
+        self,
+        comments: List[Dict],
+        photo_id,
+        crawl_interval: float = 1.0,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取指定一级评论下的所有二级评论，一级评论里自带的二级评论也作为一页 yield 出去
+        Args:
+            comments: 评论列表
+            photo_id: 视频id
+            crawl_interval: 爬取一次评论的延迟单位（秒）
+        Returns:
+
         """
         if not config.ENABLE_GET_SUB_COMMENTS:
             utils.logger.info(
-                f"[KuaiShouClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
+                f"[KuaiShouClient.iter_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
-            return []
+            return
 
-        result = []
         for comment in comments:
             sub_comments = comment.get("subComments")
-            if sub_comments and callback:
-                await callback(photo_id, sub_comments)
+            if sub_comments:
+                yield sub_comments
 
             sub_comment_pcursor = comment.get("subCommentsPcursor")
             if sub_comment_pcursor == "no_more":
@@ -256,12 +294,8 @@ class KuaiShouClient(AbstractApiClient):
                 vision_sub_comment_list = comments_res.get("visionSubCommentList", {})
                 sub_comment_pcursor = vision_sub_comment_list.get("pcursor", "no_more")
 
-                comments = vision_sub_comment_list.get("subComments", {})
-                if callback:
-                    await callback(photo_id, comments)
+                yield vision_sub_comment_list.get("subComments", {})
                 await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
@@ -12,7 +12,6 @@
 import asyncio
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -23,6 +22,9 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
+from tools.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from tools.pipeline import CrawlerPipeline
+from tools.throttle import get_throttle
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
@@ -41,11 +43,12 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(session_key=KuaiShouClient.platform)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info
             )
@@ -63,87 +66,119 @@ class KuaishouCrawler(AbstractCrawler):
 
             # Create a client to interact with the kuaishou website.
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
-            if not await self.ks_client.pong():
-                login_obj = KuaishouLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone=httpx_proxy_format,
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for videos and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their videos and comments
-                await self.get_creators_and_videos()
-            else:
-                pass
+            try:
+                if ip_proxy_pool:
+                    self.ks_client.bind_proxy_pool(ip_proxy_pool, ip_proxy_info)
+                if not await self.ks_client.pong():
+                    login_obj = KuaishouLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone=httpx_proxy_format,
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.ks_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
 
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for videos and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_videos()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their videos and comments
+                    await self.get_creators_and_videos()
+                else:
+                    pass
+            finally:
+                await self.ks_client.close()
             utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
     async def search(self):
+        """
+        search kuaishou video with keywords
+        搜索结果已经包含视频详情，翻页、存储、评论分为流水线的不同阶段并发执行
+        :return:
+        """
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
+        comment_semaphore = get_concurrency_limiter("ks.comments", config.PIPELINE_COMMENT_WORKER_NUM)
+
+        async def store_stage(video_detail: Dict, emit) -> None:
+            await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+            await emit(video_detail.get("photo", {}).get("id"))
+
+        async def comment_stage(video_id: str, _) -> None:
+            await self.get_comments(video_id, comment_semaphore)
+
+        pipeline = (
+            CrawlerPipeline("kuaishou_search")
+            .add_stage("search", self.search_videos_by_keyword)
+            .add_stage("store", store_stage)
+        )
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comments", comment_stage, workers=comment_semaphore.max_limit)
+        else:
+            utils.logger.info(
+                "[KuaishouCrawler.search] Crawling comment mode is not enabled"
+            )
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_videos_by_keyword(self, keyword: str, emit):
+        """
+        按关键词翻页搜索视频，把每个视频详情交给存储阶段
+        :param keyword: 搜索关键词
+        :param emit: 放入存储阶段队列
+        :return:
+        """
         ks_limit_count = 20  # kuaishou limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            search_session_id = ""
-            source_keyword_var.set(keyword)
+        search_session_id = ""
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[KuaishouCrawler.search] Current search keyword: {keyword}"
+        )
+        page = 1
+        while (
+            page - start_page + 1
+        ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
+                page += 1
+                continue
             utils.logger.info(
-                f"[KuaishouCrawler.search] Current search keyword: {keyword}"
+                f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
             )
-            page = 1
-            while (
-                page - start_page + 1
-            ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(
-                    f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
-                )
-                video_id_list: List[str] = []
-                videos_res = await self.ks_client.search_info_by_keyword(
-                    keyword=keyword,
-                    pcursor=str(page),
-                    search_session_id=search_session_id,
+            videos_res = await self.ks_client.search_info_by_keyword(
+                keyword=keyword,
+                pcursor=str(page),
+                search_session_id=search_session_id,
+            )
+            if not videos_res:
+                utils.logger.error(
+                    f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data"
                 )
-                if not videos_res:
-                    utils.logger.error(
-                        f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data"
-                    )
-                    continue
-
-                vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
-                if vision_search_photo.get("result") != 1:
-                    utils.logger.error(
-                        f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data "
-                    )
-                    continue
-                search_session_id = vision_search_photo.get("searchSessionId", "")
-                for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
-                    await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+                continue
 
-                # batch fetch video comments
-                page += 1
-                await self.batch_get_video_comments(video_id_list)
+            vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
+            if vision_search_photo.get("result") != 1:
+                utils.logger.error(
+                    f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data "
+                )
+                continue
+            search_session_id = vision_search_photo.get("searchSessionId", "")
+            for video_detail in vision_search_photo.get("feeds"):
+                await emit(video_detail)
+            page += 1
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("ks.detail")
         task_list = [
             self.get_video_info_task(video_id=video_id, semaphore=semaphore)
             for video_id in config.KS_SPECIFIED_ID_LIST
@@ -155,7 +190,7 @@ class KuaishouCrawler(AbstractCrawler):
         await self.batch_get_video_comments(config.KS_SPECIFIED_ID_LIST)
 
     async def get_video_info_task(
-        self, video_id: str, semaphore: asyncio.Semaphore
+        self, video_id: str, semaphore: AdaptiveConcurrencyLimiter
     ) -> Optional[Dict]:
         """Get video detail task"""
         async with semaphore:
@@ -166,6 +201,7 @@ class KuaishouCrawler(AbstractCrawler):
                 )
                 return result.get("visionVideoDetail")
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[KuaishouCrawler.get_video_info_task] Get video detail error: {ex}"
                 )
@@ -191,7 +227,7 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("ks.comments")
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(
@@ -202,7 +238,7 @@ class KuaishouCrawler(AbstractCrawler):
         comment_tasks_var.set(task_list)
         await asyncio.gather(*task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """
         get comment for video id
         :param video_id:
@@ -210,30 +246,37 @@ class KuaishouCrawler(AbstractCrawler):
         :return:
         """
         async with semaphore:
+            throttle = get_throttle("ks", self.ks_client.proxies)
+            # 被风控暂停期间，其他评论任务在这里等待，不会继续请求
+            await throttle.wait()
             try:
                 utils.logger.info(
                     f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
                 )
-                await self.ks_client.get_video_all_comments(
+                async for comments in self.ks_client.iter_video_all_comments(
                     photo_id=video_id,
                     crawl_interval=random.random(),
-                    callback=kuaishou_store.batch_update_ks_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
+                ):
+                    await kuaishou_store.batch_update_ks_video_comments(video_id, comments)
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
                 )
             except Exception as e:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
                 )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
+                # maybe kuaishou block our request, pause all kuaishou requests on this proxy,
+                # cancel running comment task, take a nap and update the cookie again
+                throttle.pause(20)
                 current_running_tasks = comment_tasks_var.get()
                 for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
+                    if task is not asyncio.current_task():
+                        task.cancel()
+                await throttle.wait()
                 await self.context_page.goto(f"{self.index_url}?isHome=1")
                 await self.ks_client.update_cookies(
                     browser_context=self.browser_context
@@ -334,7 +377,7 @@ class KuaishouCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("ks.detail")
         task_list = [
             self.get_video_info_task(post_item.get("photo", {}).get("id"), semaphore)
             for post_item in video_list
@@ -11,17 +11,18 @@
 
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
+from lxml.html import HtmlElement
 from playwright.async_api import BrowserContext
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
-from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from model.m_baidu_tieba import TiebaCommentRecord, TiebaCreator, TiebaNoteRecord
 from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.types import IpInfoModel
 from tools import utils
 
 from .field import SearchNoteType, SearchSortType
@@ -29,13 +30,17 @@ from .help import TieBaExtractor
 
 
 class BaiduTieBaClient(AbstractApiClient):
+    platform = "tieba"
+
     def __init__(
             self,
             timeout=10,
             ip_pool=None,
             default_ip_proxy=None,
+            ip_proxy_info: Optional[IpInfoModel] = None,
     ):
         self.ip_pool: Optional[ProxyIpPool] = ip_pool
+        self.ip_proxy_info = ip_proxy_info
         self.timeout = timeout
         self.headers = {
             "User-Agent": utils.get_user_agent(),
@@ -43,7 +48,7 @@ class BaiduTieBaClient(AbstractApiClient):
         }
         self._host = "https://tieba.baidu.com"
         self._page_extractor = TieBaExtractor()
-        self.default_ip_proxy = default_ip_proxy
+        self.proxies = default_ip_proxy
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, return_ori_content=False, proxies=None, **kwargs) -> Union[str, Any]:
@@ -59,12 +64,10 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
-        actual_proxies = proxies if proxies else self.default_ip_proxy
-        async with httpx.AsyncClient(proxies=actual_proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                headers=self.headers, **kwargs
-            )
+        response, _ = await self.send_request(
+            method, url, proxies=proxies, timeout=self.timeout,
+            headers=self.headers, **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -78,7 +81,7 @@ class BaiduTieBaClient(AbstractApiClient):
         if return_ori_content:
             return response.text
 
-        return response.json()
+        return self.parse_json(response)
 
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
@@ -95,6 +98,7 @@ class BaiduTieBaClient(AbstractApiClient):
         if isinstance(params, dict):
             final_uri = (f"{uri}?"
                          f"{urlencode(params)}")
+        ip_proxy_info = self.ip_proxy_info
         try:
             res = await self.request(method="GET", url=f"{self._host}{final_uri}",
                                      return_ori_content=return_ori_content,
@@ -102,13 +106,14 @@ class BaiduTieBaClient(AbstractApiClient):
             return res
         except RetryError as e:
             if self.ip_pool:
-                proxie_model = await self.ip_pool.get_proxy()
-                _, proxies = utils.format_proxy_info(proxie_model)
+                if ip_proxy_info is None:
+                    self.bind_proxy_pool(self.ip_pool, await self.ip_pool.get_proxy(session_key=self.platform))
+                else:
+                    # 默认代理重试多次都失败，视为被封禁，从代理池换一个新的
+                    await self.rotate_proxy(ip_proxy_info)
                 res = await self.request(method="GET", url=f"{self._host}{final_uri}",
                                          return_ori_content=return_ori_content,
-                                         proxies=proxies,
                                          **kwargs)
-                self.default_ip_proxy = proxies
                 return res
 
             utils.logger.error(f"[BaiduTieBaClient.get] 达到了最大重试次数，IP已经被Block，请尝试更换新的IP代理: {e}")
@@ -166,7 +171,7 @@ class BaiduTieBaClient(AbstractApiClient):
             page_size: int = 10,
             sort: SearchSortType = SearchSortType.TIME_DESC,
             note_type: SearchNoteType = SearchNoteType.FIXED_THREAD,
-    ) -> List[TiebaNote]:
+    ) -> List[TiebaNoteRecord]:
         """
         根据关键词搜索贴吧帖子
         Args:
@@ -190,7 +195,7 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, params=params, return_ori_content=True)
         return self._page_extractor.extract_search_note_list(page_content)
 
-    async def get_note_by_id(self, note_id: str) -> TiebaNote:
+    async def get_note_by_id(self, note_id: str) -> TiebaNoteRecord:
         """
         根据帖子ID获取帖子详情
         Args:
@@ -203,12 +208,13 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, return_ori_content=True)
         return self._page_extractor.extract_note_detail(page_content)
 
-    async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, note_detail: TiebaNoteRecord, crawl_interval: float = 1.0,
                                     callback: Optional[Callable] = None,
                                     max_count: int = 10,
-                                    ) -> List[TiebaComment]:
+                                    ) -> List[TiebaCommentRecord]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_note_all_comments
         Args:
             note_detail: 帖子详情对象
             crawl_interval: 爬取一次笔记的延迟单位（秒）
@@ -216,11 +222,30 @@ class BaiduTieBaClient(AbstractApiClient):
             max_count: 一次帖子爬取的最大评论数量
         Returns:
 
+        """
+        result: List[TiebaCommentRecord] = []
+        async for comments in self.iter_note_all_comments(note_detail, crawl_interval, max_count):
+            if callback:
+                await callback(note_detail.note_id, comments)
+            result.extend(comments)
+        return result
+
+    async def iter_note_all_comments(self, note_detail: TiebaNoteRecord, crawl_interval: float = 1.0,
+                                     max_count: int = 10,
+                                     ) -> AsyncIterator[List[TiebaCommentRecord]]:
+        """
+        逐页获取指定帖子下的所有评论，一级评论页之后紧跟它的子评论页，每拿到一页就 yield 出去，不在内存中累积
+        Args:
+            note_detail: 帖子详情对象
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            max_count: 一次帖子爬取的最大一级评论数量
+        Returns:
+
         """
         uri = f"/p/{note_detail.note_id}"
-        result: List[TiebaComment] = []
+        count = 0
         current_page = 1
-        while note_detail.total_replay_page >= current_page and len(result) < max_count:
+        while note_detail.total_replay_page >= current_page and count < max_count:
             params = {
                 "pn": current_page
             }
@@ -229,19 +254,18 @@ class BaiduTieBaClient(AbstractApiClient):
                                                                                 note_id=note_detail.note_id)
             if not comments:
                 break
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            if callback:
-                await callback(note_detail.note_id, comments)
-            result.extend(comments)
+            if count + len(comments) > max_count:
+                comments = comments[:max_count - count]
+            count += len(comments)
+            yield comments
             # 获取所有子评论
-            await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
+            async for sub_comments in self.iter_comments_all_sub_comments(comments, crawl_interval=crawl_interval):
+                yield sub_comments
             await asyncio.sleep(crawl_interval)
             current_page += 1
-        return result
 
-    async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
-                                            callback: Optional[Callable] = None) -> List[TiebaComment]:
+    async def get_comments_all_sub_comments(self, comments: List[TiebaCommentRecord], crawl_interval: float = 1.0,
+                                            callback: Optional[Callable] = None) -> List[TiebaCommentRecord]:
         """
         获取指定评论下的所有子评论
         Args:
@@ -251,16 +275,33 @@ class BaiduTieBaClient(AbstractApiClient):
 
         Returns:
 
+        """
+        all_sub_comments: List[TiebaCommentRecord] = []
+        async for sub_comments in self.iter_comments_all_sub_comments(comments, crawl_interval):
+            if callback:
+                await callback(sub_comments[0].note_id, sub_comments)
+            all_sub_comments.extend(sub_comments)
+        return all_sub_comments
+
+    async def iter_comments_all_sub_comments(self, comments: List[TiebaCommentRecord],
+                                             crawl_interval: float = 1.0) -> AsyncIterator[List[TiebaCommentRecord]]:
+        """
+        逐页获取指定评论下的所有子评论
+        Args:
+            comments: 评论列表
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+
+        Returns:
+
         """
         uri = "/p/comment"
         if not config.ENABLE_GET_SUB_COMMENTS:
-            return []
+            return
 
         # # 贴吧获取所有子评论需要登录态
         # if self.headers.get("Cookies") == "" or not self.pong():
         #     raise Exception(f"[BaiduTieBaClient.pong] Cookies is empty, please login first...")
 
-        all_sub_comments: List[TiebaComment] = []
         for parment_comment in comments:
             if parment_comment.sub_comment_count == 0:
                 continue
@@ -280,14 +321,11 @@ class BaiduTieBaClient(AbstractApiClient):
 
                 if not sub_comments:
                     break
-                if callback:
-                    await callback(parment_comment.note_id, sub_comments)
-                all_sub_comments.extend(sub_comments)
+                yield sub_comments
                 await asyncio.sleep(crawl_interval)
                 current_page += 1
-        return all_sub_comments
 
-    async def get_notes_by_tieba_name(self, tieba_name: str, page_num: int) -> List[TiebaNote]:
+    async def get_notes_by_tieba_name(self, tieba_name: str, page_num: int) -> List[TiebaNoteRecord]:
         """
         根据贴吧名称获取帖子列表
         Args:
@@ -336,8 +374,8 @@ class BaiduTieBaClient(AbstractApiClient):
                                                  user_name: str, crawl_interval: float = 1.0,
                                                  callback: Optional[Callable] = None,
                                                  max_note_count: int = 0,
-                                                 creator_page_html_content: str = None,
-                                                 ) -> List[TiebaNote]:
+                                                 creator_page_html_content: Union[str, HtmlElement] = None,
+                                                 ) -> List[TiebaNoteRecord]:
 
         """
         根据创作者用户名获取创作者所有帖子
@@ -346,13 +384,13 @@ class BaiduTieBaClient(AbstractApiClient):
             crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后的回调函数，是一个awaitable类型的函数
             max_note_count: 帖子最大获取数量，如果为0则获取所有
-            creator_page_html_content: 创作者主页HTML内容
+            creator_page_html_content: 创作者主页HTML内容，或者用 parse_page 解析好的页面
 
         Returns:
 
         """
         # 百度贴吧比较特殊一些，前10个帖子是直接展示在主页上的，要单独处理，通过API获取不到
-        result: List[TiebaNote] = []
+        result: List[TiebaNoteRecord] = []
         if creator_page_html_content:
             thread_id_list = (
                 self._page_extractor.extract_tieba_thread_id_list_from_creator_page(
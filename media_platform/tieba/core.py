@@ -20,16 +20,17 @@ from playwright.async_api import (BrowserContext, BrowserType, Page,
 
 import config
 from base.base_crawler import AbstractCrawler
-from model.m_baidu_tieba import TiebaCreator, TiebaNote
-from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from model.m_baidu_tieba import TiebaCreator, TiebaNoteRecord
+from proxy.proxy_ip_pool import create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
+from tools.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
 from tools.crawler_util import format_proxy_info
 from var import crawler_type_var, source_keyword_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
-from .help import TieBaExtractor
+from .help import TieBaExtractor, parse_page
 from .login import BaiduTieBaLogin
 
 
@@ -49,11 +50,11 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        ip_proxy_pool, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             utils.logger.info("[BaiduTieBaCrawler.start] Begin create ip proxy pool ...")
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(session_key=BaiduTieBaClient.platform)
             _, httpx_proxy_format = format_proxy_info(ip_proxy_info)
             utils.logger.info(f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}")
 
@@ -61,21 +62,24 @@ class TieBaCrawler(AbstractCrawler):
         self.tieba_client = BaiduTieBaClient(
             ip_pool=ip_proxy_pool,
             default_ip_proxy=httpx_proxy_format,
+            ip_proxy_info=ip_proxy_info,
         )
-        crawler_type_var.set(config.CRAWLER_TYPE)
-        if config.CRAWLER_TYPE == "search":
-            # Search for notes and retrieve their comment information.
-            await self.search()
-            await self.get_specified_tieba_notes()
-        elif config.CRAWLER_TYPE == "detail":
-            # Get the information and comments of the specified post
-            await self.get_specified_notes()
-        elif config.CRAWLER_TYPE == "creator":
-            # Get creator's information and their notes and comments
-            await self.get_creators_and_notes()
-        else:
-            pass
-
+        try:
+            crawler_type_var.set(config.CRAWLER_TYPE)
+            if config.CRAWLER_TYPE == "search":
+                # Search for notes and retrieve their comment information.
+                await self.search()
+                await self.get_specified_tieba_notes()
+            elif config.CRAWLER_TYPE == "detail":
+                # Get the information and comments of the specified post
+                await self.get_specified_notes()
+            elif config.CRAWLER_TYPE == "creator":
+                # Get creator's information and their notes and comments
+                await self.get_creators_and_notes()
+            else:
+                pass
+        finally:
+            await self.tieba_client.close()
         utils.logger.info("[BaiduTieBaCrawler.start] Tieba Crawler finished ...")
 
     async def search(self) -> None:
@@ -100,7 +104,7 @@ class TieBaCrawler(AbstractCrawler):
                     continue
                 try:
                     utils.logger.info(f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}")
-                    notes_list: List[TiebaNote] = await self.tieba_client.get_notes_by_keyword(
+                    notes_list: List[TiebaNoteRecord] = await self.tieba_client.get_notes_by_keyword(
                         keyword=keyword,
                         page=page,
                         page_size=tieba_limit_count,
@@ -132,7 +136,7 @@ class TieBaCrawler(AbstractCrawler):
                 f"[BaiduTieBaCrawler.get_specified_tieba_notes] Begin get tieba name: {tieba_name}")
             page_number = 0
             while page_number <= config.CRAWLER_MAX_NOTES_COUNT:
-                note_list: List[TiebaNote] = await self.tieba_client.get_notes_by_tieba_name(
+                note_list: List[TiebaNoteRecord] = await self.tieba_client.get_notes_by_tieba_name(
                     tieba_name=tieba_name,
                     page_num=page_number
                 )
@@ -155,19 +159,19 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("tieba.detail")
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore) for note_id in note_id_list
         ]
         note_details = await asyncio.gather(*task_list)
-        note_details_model: List[TiebaNote] = []
+        note_details_model: List[TiebaNoteRecord] = []
         for note_detail in note_details:
             if note_detail is not None:
                 note_details_model.append(note_detail)
                 await tieba_store.update_tieba_note(note_detail)
         await self.batch_get_note_comments(note_details_model)
 
-    async def get_note_detail_async_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[TiebaNote]:
+    async def get_note_detail_async_task(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[TiebaNoteRecord]:
         """
         Get note detail
         Args:
@@ -180,13 +184,14 @@ class TieBaCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] Begin get note detail, note_id: {note_id}")
-                note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
+                note_detail: TiebaNoteRecord = await self.tieba_client.get_note_by_id(note_id)
                 if not note_detail:
                     utils.logger.error(
                         f"[BaiduTieBaCrawler.get_note_detail] Get note detail error, note_id: {note_id}")
                     return None
                 return note_detail
             except Exception as ex:
+                semaphore.record_error()
                 utils.logger.error(f"[BaiduTieBaCrawler.get_note_detail] Get note detail error: {ex}")
                 return None
             except KeyError as ex:
@@ -194,7 +199,7 @@ class TieBaCrawler(AbstractCrawler):
                     f"[BaiduTieBaCrawler.get_note_detail] have not fund note detail note_id:{note_id}, err: {ex}")
                 return None
 
-    async def batch_get_note_comments(self, note_detail_list: List[TiebaNote]):
+    async def batch_get_note_comments(self, note_detail_list: List[TiebaNoteRecord]):
         """
         Batch get note comments
         Args:
@@ -206,14 +211,14 @@ class TieBaCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("tieba.comments")
         task_list: List[Task] = []
         for note_detail in note_detail_list:
             task = asyncio.create_task(self.get_comments_async_task(note_detail, semaphore), name=note_detail.note_id)
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_comments_async_task(self, note_detail: TiebaNote, semaphore: asyncio.Semaphore):
+    async def get_comments_async_task(self, note_detail: TiebaNoteRecord, semaphore: AdaptiveConcurrencyLimiter):
         """
         Get comments async task
         Args:
@@ -225,12 +230,12 @@ class TieBaCrawler(AbstractCrawler):
         """
         async with semaphore:
             utils.logger.info(f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}")
-            await self.tieba_client.get_note_all_comments(
+            async for comments in self.tieba_client.iter_note_all_comments(
                 note_detail=note_detail,
                 crawl_interval=random.random(),
-                callback=tieba_store.batch_update_tieba_note_comments,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-            )
+            ):
+                await tieba_store.batch_update_tieba_note_comments(note_detail.note_id, comments)
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -241,7 +246,9 @@ class TieBaCrawler(AbstractCrawler):
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
         for creator_url in config.TIEBA_CREATOR_URL_LIST:
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(creator_url=creator_url)
-            creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page_html_content)
+            # 创作者信息和主页上的帖子列表都从同一个页面提取，只解析一次
+            creator_page = parse_page(creator_page_html_content)
+            creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page)
             if creator_info:
                 utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {creator_info}")
                 if not creator_info:
@@ -255,7 +262,7 @@ class TieBaCrawler(AbstractCrawler):
                     crawl_interval=0,
                     callback=tieba_store.batch_update_tieba_notes,
                     max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
-                    creator_page_html_content=creator_page_html_content,
+                    creator_page_html_content=creator_page,
                 )
 
                 await self.batch_get_note_comments(all_notes_list)
@@ -10,92 +10,186 @@
 
 
 # -*- coding: utf-8 -*-
+import functools
 import html
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 from urllib.parse import parse_qs, unquote
 
-from parsel import Selector
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.html import HtmlElement
 
 from constant import baidu_tieba as const
-from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from model.m_baidu_tieba import TiebaCommentRecord, TiebaCreator, TiebaNoteRecord
 from tools import utils
 
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
+# 提取用到的 XPath 全部预编译，不返回 smart string，和 parsel 的取值结果一致
+_xpath = functools.partial(etree.XPath, smart_strings=False)
+
+# 关键词搜索结果页
+_SEARCH_POST = _xpath("//div[@class='s_post']")
+_SEARCH_NOTE_ID = _xpath(".//span[@class='p_title']/a/@data-tid")
+_SEARCH_TITLE = _xpath(".//span[@class='p_title']/a/text()")
+_SEARCH_DESC = _xpath(".//div[@class='p_content']/text()")
+_SEARCH_NOTE_HREF = _xpath(".//span[@class='p_title']/a/@href")
+_SEARCH_USER_NICKNAME = _xpath(".//a[starts-with(@href, '/home/main')]/font/text()")
+_SEARCH_USER_HREF = _xpath(".//a[starts-with(@href, '/home/main')]/@href")
+_SEARCH_FORUM_NAME = _xpath(".//a[@class='p_forum']/font/text()")
+_SEARCH_FORUM_HREF = _xpath(".//a[@class='p_forum']/@href")
+_SEARCH_PUBLISH_TIME = _xpath(".//font[@class='p_green p_date']/text()")
+
+# 贴吧名称、链接，多个页面共用
+_FORUM_NAME = _xpath("//a[@class='card_title_fname']/text()")
+_FORUM_HREF = _xpath("//a[@class='card_title_fname']/@href")
+
+# 贴吧帖子列表页
+_THREAD_LIST_POST = _xpath("//ul[@id='thread_list']/li")
+_THREAD_TITLE = _xpath(".//a[@class='j_th_tit ']/text()")
+_THREAD_DESC = _xpath(".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()")
+_THREAD_AUTHOR_HREF = _xpath(".//a[@class='frs-author-name j_user_card ']/@href")
+
+# 帖子详情页、一级评论页
+_ONLY_VIEW_AUTHOR_HREF = _xpath("//*[@id='lzonly_cntn']/@href")
+_THREAD_NUM_INFOS = _xpath("//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+_POST_TAIL_WRAP = _xpath(".//div[@class='post-tail-wrap']")
+_TITLE = _xpath("//title/text()")
+_META_DESCRIPTION = _xpath("//meta[@name='description']/@content")
+_FIRST_FLOOR_AUTHOR_FACE_HREF = _xpath("//div[@class='p_postlist'][1]//a[@class='p_author_face ']/@href")
+_FIRST_FLOOR_AUTHOR_NAME = _xpath("//div[@class='p_postlist'][1]//a[@class='p_author_name j_user_card']/text()")
+_FIRST_FLOOR_AUTHOR_AVATAR = _xpath("//div[@class='p_postlist'][1]//a[@class='p_author_face ']/img/@src")
+_COMMENT_POST = _xpath("//div[@class='l_post l_post_bright j_l_post clearfix  ']")
+_AUTHOR_FACE_HREF = _xpath(".//a[@class='p_author_face ']/@href")
+_AUTHOR_NAME = _xpath(".//a[@class='p_author_name j_user_card']/text()")
+_AUTHOR_AVATAR = _xpath(".//a[@class='p_author_face ']/img/@src")
+
+# 二级评论页
+_SUB_COMMENT_FIRST = _xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
+_SUB_COMMENT_OTHERS = _xpath("//li[@class='lzl_single_post j_lzl_s_p ']")
+_SUB_COMMENT_USER = _xpath("./a[@class='j_user_card lzl_p_p']")
+_SUB_COMMENT_CONTENT = _xpath(".//span[@class='lzl_content_main']")
+_SUB_COMMENT_TIME = _xpath(".//span[@class='lzl_time']/text()")
+_IMG_SRC = _xpath("./img/@src")
+_TEXT = _xpath("./text()")
+
+# 创作者主页
+_CREATOR_LINK_HREF = _xpath("//p[@class='space']/a/@href")
+_CREATOR_USERDATA = _xpath("//div[@class='userinfo_userdata']")
+_CREATOR_CONCERN_NUM = _xpath("//span[@class='concern_num']")
+_CREATOR_NICKNAME = _xpath(".//span[@class='userinfo_username ']/text()")
+_CREATOR_AVATAR = _xpath(".//div[@class='userinfo_left_head']//img/@src")
+_CREATOR_THREAD_HREF = _xpath("//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href")
+
+_PUB_TIME_PATTERN = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
+_IP_PATTERN = re.compile(r'IP属地:(\S+)</span>')
+_CONCERN_NUM_PATTERN = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
+_REGISTRATION_DURATION_PATTERN = re.compile(r'<span>吧龄:(\S+)</span>')
+
+
+def _first(xpath: etree.XPath, node: HtmlElement, default: str = "") -> str:
+    """
+    取 XPath 第一个结果，等同于 parsel 的 .get(default=...)
+    """
+    result = xpath(node)
+    if not result:
+        return default
+    value = result[0]
+    return value if isinstance(value, str) else _outer_html(value)
+
+
+def _outer_html(element: HtmlElement) -> str:
+    return etree.tostring(element, method="html", encoding="unicode", with_tail=False)
+
+
+def parse_page(page_content: str) -> HtmlElement:
+    """
+    解析页面，解析方式和 parsel.Selector(text=...) 相同
+    同一个页面需要多次提取时，先解析一次再把结果传给 TieBaExtractor 的各个提取方法
+    Args:
+        page_content: 页面内容的HTML字符串
+
+    Returns:
+        页面根节点
+    """
+    parser = lxml_html.HTMLParser(recover=True, encoding="utf8", huge_tree=True)
+    body = page_content.strip().replace("\x00", "").encode("utf8") or b"<html/>"
+    root = etree.fromstring(body, parser=parser)
+    if root is None:
+        root = etree.fromstring(b"<html/>", parser=parser)
+    return root
+
+
+def _ensure_root(page: Union[str, HtmlElement]) -> HtmlElement:
+    return parse_page(page) if isinstance(page, str) else page
+
 
 class TieBaExtractor:
     def __init__(self):
         pass
 
     @staticmethod
-    def extract_search_note_list(page_content: str) -> List[TiebaNote]:
+    def extract_search_note_list(page_content: Union[str, HtmlElement]) -> List[TiebaNoteRecord]:
         """
         提取贴吧帖子列表，这里提取的关键词搜索结果页的数据，还缺少帖子的回复数和回复页等数据
         Args:
-            page_content: 页面内容的HTML字符串
+            page_content: 页面内容的HTML字符串或解析好的页面
 
         Returns:
             包含帖子信息的字典列表
         """
-        xpath_selector = "//div[@class='s_post']"
-        post_list = Selector(text=page_content).xpath(xpath_selector)
-        result: List[TiebaNote] = []
-        for post in post_list:
-            tieba_note = TiebaNote(note_id=post.xpath(".//span[@class='p_title']/a/@data-tid").get(default='').strip(),
-                                   title=post.xpath(".//span[@class='p_title']/a/text()").get(default='').strip(),
-                                   desc=post.xpath(".//div[@class='p_content']/text()").get(default='').strip(),
-                                   note_url=const.TIEBA_URL + post.xpath(".//span[@class='p_title']/a/@href").get(
-                                       default=''),
-                                   user_nickname=post.xpath(".//a[starts-with(@href, '/home/main')]/font/text()").get(
-                                       default='').strip(), user_link=const.TIEBA_URL + post.xpath(
-                    ".//a[starts-with(@href, '/home/main')]/@href").get(default=''),
-                                   tieba_name=post.xpath(".//a[@class='p_forum']/font/text()").get(default='').strip(),
-                                   tieba_link=const.TIEBA_URL + post.xpath(".//a[@class='p_forum']/@href").get(
-                                       default=''),
-                                   publish_time=post.xpath(".//font[@class='p_green p_date']/text()").get(
-                                       default='').strip(), )
+        root = _ensure_root(page_content)
+        result: List[TiebaNoteRecord] = []
+        for post in _SEARCH_POST(root):
+            tieba_note = TiebaNoteRecord(note_id=_first(_SEARCH_NOTE_ID, post).strip(),
+                                   title=_first(_SEARCH_TITLE, post).strip(),
+                                   desc=_first(_SEARCH_DESC, post).strip(),
+                                   note_url=const.TIEBA_URL + _first(_SEARCH_NOTE_HREF, post),
+                                   user_nickname=_first(_SEARCH_USER_NICKNAME, post).strip(),
+                                   user_link=const.TIEBA_URL + _first(_SEARCH_USER_HREF, post),
+                                   tieba_name=_first(_SEARCH_FORUM_NAME, post).strip(),
+                                   tieba_link=const.TIEBA_URL + _first(_SEARCH_FORUM_HREF, post),
+                                   publish_time=_first(_SEARCH_PUBLISH_TIME, post).strip(), )
             result.append(tieba_note)
         return result
 
-    def extract_tieba_note_list(self, page_content: str) -> List[TiebaNote]:
+    def extract_tieba_note_list(self, page_content: Union[str, HtmlElement]) -> List[TiebaNoteRecord]:
         """
         提取贴吧帖子列表
         Args:
-            page_content:
+            page_content: 页面内容的HTML字符串，或去掉注释标记'<!--'后解析好的页面
 
         Returns:
 
         """
-        page_content = page_content.replace('<!--', "")
-        content_selector = Selector(text=page_content)
-        xpath_selector = "//ul[@id='thread_list']/li"
-        post_list = content_selector.xpath(xpath_selector)
-        result: List[TiebaNote] = []
-        for post_selector in post_list:
-            post_field_value: Dict = self.extract_data_field_value(post_selector)
+        if isinstance(page_content, str):
+            # 帖子列表被包在注释里，去掉注释开始标记后才能解析到
+            page_content = page_content.replace('<!--', "")
+        root = _ensure_root(page_content)
+        tieba_name = _first(_FORUM_NAME, root).strip()
+        tieba_link = const.TIEBA_URL + _first(_FORUM_HREF, root)
+        result: List[TiebaNoteRecord] = []
+        for post in _THREAD_LIST_POST(root):
+            post_field_value: Dict = self.extract_data_field_value(post)
             if not post_field_value:
                 continue
             note_id = str(post_field_value.get("id"))
-            tieba_note = TiebaNote(note_id=note_id,
-                                   title=post_selector.xpath(".//a[@class='j_th_tit ']/text()").get(default='').strip(),
-                                   desc=post_selector.xpath(
-                                       ".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()").get(
-                                       default='').strip(), note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                   user_link=const.TIEBA_URL + post_selector.xpath(
-                                       ".//a[@class='frs-author-name j_user_card ']/@href").get(default='').strip(),
+            tieba_note = TiebaNoteRecord(note_id=note_id,
+                                   title=_first(_THREAD_TITLE, post).strip(),
+                                   desc=_first(_THREAD_DESC, post).strip(),
+                                   note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                   user_link=const.TIEBA_URL + _first(_THREAD_AUTHOR_HREF, post).strip(),
                                    user_nickname=post_field_value.get("authoer_nickname") or post_field_value.get(
                                        "author_name"),
-                                   tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                                       default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                    "//a[@class='card_title_fname']/@href").get(default=''),
+                                   tieba_name=tieba_name, tieba_link=tieba_link,
                                    total_replay_num=post_field_value.get("reply_num", 0))
             result.append(tieba_note)
         return result
 
-    def extract_note_detail(self, page_content: str) -> TiebaNote:
+    def extract_note_detail(self, page_content: Union[str, HtmlElement]) -> TiebaNoteRecord:
         """
         提取贴吧帖子详情
         Args:
@@ -104,35 +198,30 @@ class TieBaExtractor:
         Returns:
 
         """
-        content_selector = Selector(text=page_content)
-        first_floor_selector = content_selector.xpath("//div[@class='p_postlist'][1]")
-        only_view_author_link = content_selector.xpath("//*[@id='lzonly_cntn']/@href").get(default='').strip()
+        root = _ensure_root(page_content)
+        only_view_author_link = _first(_ONLY_VIEW_AUTHOR_HREF, root).strip()
         note_id = only_view_author_link.split("?")[0].split("/")[-1]
         # 帖子回复数、回复页数
-        thread_num_infos = content_selector.xpath(
-            "//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+        thread_num_infos = _THREAD_NUM_INFOS(root)
         # IP地理位置、发表时间
-        other_info_content = content_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+        other_info_content = _first(_POST_TAIL_WRAP, root).strip()
         ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-        note = TiebaNote(note_id=note_id, title=content_selector.xpath("//title/text()").get(default='').strip(),
-                         desc=content_selector.xpath("//meta[@name='description']/@content").get(default='').strip(),
+        note = TiebaNoteRecord(note_id=note_id, title=_first(_TITLE, root).strip(),
+                         desc=_first(_META_DESCRIPTION, root).strip(),
                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                         user_link=const.TIEBA_URL + first_floor_selector.xpath(
-                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                         user_nickname=first_floor_selector.xpath(
-                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                         user_avatar=first_floor_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(
-                             default='').strip(),
-                         tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                             default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                "//a[@class='card_title_fname']/@href").get(default=''), ip_location=ip_location,
+                         user_link=const.TIEBA_URL + _first(_FIRST_FLOOR_AUTHOR_FACE_HREF, root).strip(),
+                         user_nickname=_first(_FIRST_FLOOR_AUTHOR_NAME, root).strip(),
+                         user_avatar=_first(_FIRST_FLOOR_AUTHOR_AVATAR, root).strip(),
+                         tieba_name=_first(_FORUM_NAME, root).strip(),
+                         tieba_link=const.TIEBA_URL + _first(_FORUM_HREF, root), ip_location=ip_location,
                          publish_time=publish_time,
-                         total_replay_num=thread_num_infos[0].xpath("./text()").get(default='').strip(),
-                         total_replay_page=thread_num_infos[1].xpath("./text()").get(default='').strip(), )
+                         total_replay_num=int(_first(_TEXT, thread_num_infos[0]).strip()),
+                         total_replay_page=int(_first(_TEXT, thread_num_infos[1]).strip()), )
         note.title = note.title.replace(f"【{note.tieba_name}】_百度贴吧", "")
         return note
 
-    def extract_tieba_note_parment_comments(self, page_content: str, note_id: str) -> List[TiebaComment]:
+    def extract_tieba_note_parment_comments(self, page_content: Union[str, HtmlElement],
+                                            note_id: str) -> List[TiebaCommentRecord]:
         """
         提取贴吧帖子一级评论
         Args:
@@ -142,34 +231,31 @@ class TieBaExtractor:
         Returns:
 
         """
-        xpath_selector = "//div[@class='l_post l_post_bright j_l_post clearfix  ']"
-        comment_list = Selector(text=page_content).xpath(xpath_selector)
-        result: List[TiebaComment] = []
-        for comment_selector in comment_list:
-            comment_field_value: Dict = self.extract_data_field_value(comment_selector)
+        root = _ensure_root(page_content)
+        tieba_name = _first(_FORUM_NAME, root).strip()
+        result: List[TiebaCommentRecord] = []
+        for comment in _COMMENT_POST(root):
+            comment_field_value: Dict = self.extract_data_field_value(comment)
             if not comment_field_value:
                 continue
-            tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
-            other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+            other_info_content = _first(_POST_TAIL_WRAP, comment).strip()
             ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-            tieba_comment = TiebaComment(comment_id=str(comment_field_value.get("content").get("post_id")),
+            tieba_comment = TiebaCommentRecord(comment_id=str(comment_field_value.get("content").get("post_id")),
                                          sub_comment_count=comment_field_value.get("content").get("comment_num"),
                                          content=utils.extract_text_from_html(
                                              comment_field_value.get("content").get("content")),
                                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                         user_link=const.TIEBA_URL + comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                                         user_nickname=comment_selector.xpath(
-                                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                                         user_avatar=comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
+                                         user_link=const.TIEBA_URL + _first(_AUTHOR_FACE_HREF, comment).strip(),
+                                         user_nickname=_first(_AUTHOR_NAME, comment).strip(),
+                                         user_avatar=_first(_AUTHOR_AVATAR, comment).strip(),
                                          tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
                                          tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
                                          ip_location=ip_location, publish_time=publish_time, note_id=note_id, )
             result.append(tieba_comment)
         return result
 
-    def extract_tieba_note_sub_comments(self, page_content: str, parent_comment: TiebaComment) -> List[TiebaComment]:
+    def extract_tieba_note_sub_comments(self, page_content: Union[str, HtmlElement],
+                                        parent_comment: TiebaCommentRecord) -> List[TiebaCommentRecord]:
         """
         提取贴吧帖子二级评论
         Args:
@@ -179,23 +265,21 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(page_content)
+        root = _ensure_root(page_content)
         comments = []
-        comment_ele_list = selector.xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
-        comment_ele_list.extend(selector.xpath("//li[@class='lzl_single_post j_lzl_s_p ']"))
+        comment_ele_list = _SUB_COMMENT_FIRST(root) + _SUB_COMMENT_OTHERS(root)
         for comment_ele in comment_ele_list:
             comment_value = self.extract_data_field_value(comment_ele)
             if not comment_value:
                 continue
-            comment_user_a_selector = comment_ele.xpath("./a[@class='j_user_card lzl_p_p']")[0]
-            content = utils.extract_text_from_html(
-                comment_ele.xpath(".//span[@class='lzl_content_main']").get(default=""))
-            comment = TiebaComment(
+            comment_user_a_ele = _SUB_COMMENT_USER(comment_ele)[0]
+            content = utils.extract_text_from_html(_first(_SUB_COMMENT_CONTENT, comment_ele))
+            comment = TiebaCommentRecord(
                 comment_id=str(comment_value.get("spid")), content=content,
-                user_link=comment_user_a_selector.xpath("./@href").get(default=""),
+                user_link=comment_user_a_ele.get("href", ""),
                 user_nickname=comment_value.get("showname"),
-                user_avatar=comment_user_a_selector.xpath("./img/@src").get(default=""),
-                publish_time=comment_ele.xpath(".//span[@class='lzl_time']/text()").get(default="").strip(),
+                user_avatar=_first(_IMG_SRC, comment_user_a_ele),
+                publish_time=_first(_SUB_COMMENT_TIME, comment_ele).strip(),
                 parent_comment_id=parent_comment.comment_id,
                 note_id=parent_comment.note_id, note_url=parent_comment.note_url,
                 tieba_id=parent_comment.tieba_id, tieba_name=parent_comment.tieba_name,
@@ -204,7 +288,7 @@ class TieBaExtractor:
 
         return comments
 
-    def extract_creator_info(self, html_content: str) -> TiebaCreator:
+    def extract_creator_info(self, html_content: Union[str, HtmlElement]) -> TiebaCreator:
         """
         提取贴吧创作者信息
         Args:
@@ -213,23 +297,19 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
-        user_link_selector = selector.xpath("//p[@class='space']/a")
-        user_link: str = user_link_selector.xpath("./@href").get(default='')
+        root = _ensure_root(html_content)
+        user_link: str = _first(_CREATOR_LINK_HREF, root)
         user_link_params: Dict = parse_qs(unquote(user_link.split("?")[-1]))
         user_name = user_link_params.get("un")[0] if user_link_params.get("un") else ""
         user_id = user_link_params.get("id")[0] if user_link_params.get("id") else ""
-        userinfo_userdata_selector = selector.xpath("//div[@class='userinfo_userdata']")
-        follow_fans_selector = selector.xpath("//span[@class='concern_num']")
+        follow_fans_elements = _CREATOR_CONCERN_NUM(root)
         follows, fans = 0, 0
-        if len(follow_fans_selector) == 2:
-            follows, fans = self.extract_follow_and_fans(follow_fans_selector)
-        user_content = userinfo_userdata_selector.get(default='')
+        if len(follow_fans_elements) == 2:
+            follows, fans = self.extract_follow_and_fans([_outer_html(ele) for ele in follow_fans_elements])
+        user_content = _first(_CREATOR_USERDATA, root)
         return TiebaCreator(user_id=user_id, user_name=user_name,
-                            nickname=selector.xpath(".//span[@class='userinfo_username ']/text()").get(
-                                default='').strip(),
-                            avatar=selector.xpath(".//div[@class='userinfo_left_head']//img/@src").get(
-                                default='').strip(),
+                            nickname=_first(_CREATOR_NICKNAME, root).strip(),
+                            avatar=_first(_CREATOR_AVATAR, root).strip(),
                             gender=self.extract_gender(user_content),
                             ip_location=self.extract_ip(user_content),
                             follows=follows,
@@ -239,7 +319,7 @@ class TieBaExtractor:
 
     @staticmethod
     def extract_tieba_thread_id_list_from_creator_page(
-        html_content: str
+        html_content: Union[str, HtmlElement]
     ) -> List[str]:
         """
         提取贴吧创作者主页的帖子列表
@@ -249,13 +329,9 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
+        root = _ensure_root(html_content)
         thread_id_list = []
-        xpath_selector = (
-            "//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href"
-        )
-        thread_url_list = selector.xpath(xpath_selector).getall()
-        for thread_url in thread_url_list:
+        for thread_url in _CREATOR_THREAD_HREF(root):
             thread_id = thread_url.split("?")[0].split("/")[-1]
             thread_id_list.append(thread_id)
         return thread_id_list
@@ -269,8 +345,7 @@ class TieBaExtractor:
         Returns:
 
         """
-        pattern_pub_time = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
-        time_match = pattern_pub_time.search(html_content)
+        time_match = _PUB_TIME_PATTERN.search(html_content)
         pub_time = time_match.group(1) if time_match else ""
         return self.extract_ip(html_content), pub_time
 
@@ -284,8 +359,7 @@ class TieBaExtractor:
         Returns:
 
         """
-        pattern_ip = re.compile(r'IP属地:(\S+)</span>')
-        ip_match = pattern_ip.search(html_content)
+        ip_match = _IP_PATTERN.search(html_content)
         ip = ip_match.group(1) if ip_match else ""
         return ip
 
@@ -306,18 +380,17 @@ class TieBaExtractor:
         return '未知'
 
     @staticmethod
-    def extract_follow_and_fans(selectors: List[Selector]) -> Tuple[str, str]:
+    def extract_follow_and_fans(html_contents: List[str]) -> Tuple[str, str]:
         """
         提取关注数和粉丝数
         Args:
-            selectors:
+            html_contents: 关注数、粉丝数两个 concern_num 节点的HTML
 
         Returns:
 
         """
-        pattern = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
-        follow_match = pattern.findall(selectors[0].get())
-        fans_match = pattern.findall(selectors[1].get())
+        follow_match = _CONCERN_NUM_PATTERN.findall(html_contents[0])
+        fans_match = _CONCERN_NUM_PATTERN.findall(html_contents[1])
         follows = follow_match[0] if follow_match else 0
         fans = fans_match[0] if fans_match else 0
         return follows, fans
@@ -329,21 +402,20 @@ class TieBaExtractor:
         Returns: 1.9年
 
         """
-        pattern = re.compile(r'<span>吧龄:(\S+)</span>')
-        match = pattern.search(html_content)
+        match = _REGISTRATION_DURATION_PATTERN.search(html_content)
         return match.group(1) if match else ""
 
     @staticmethod
-    def extract_data_field_value(selector: Selector) -> Dict:
+    def extract_data_field_value(element: HtmlElement) -> Dict:
         """
         提取data-field的值
         Args:
-            selector:
+            element:
 
         Returns:
 
         """
-        data_field_value = selector.xpath("./@data-field").get(default='').strip()
+        data_field_value = element.get("data-field", "").strip()
         if not data_field_value or data_field_value == "{}":
             return {}
         try:
@@ -384,7 +456,7 @@ def test_extract_tieba_note_sub_comments():
     with open("test_data/note_sub_comments.html", "r", encoding="utf-8") as f:
         content = f.read()
         extractor = TieBaExtractor()
-        fake_parment_comment = TiebaComment(comment_id="123456", content="content", user_link="user_link",
+        fake_parment_comment = TiebaCommentRecord(comment_id="123456", content="content", user_link="user_link",
                                             user_nickname="user_nickname", user_avatar="user_avatar",
                                             publish_time="publish_time", parent_comment_id="parent_comment_id",
                                             note_id="note_id", note_url="note_url", tieba_id="tieba_id",
@@ -18,21 +18,23 @@ import asyncio
 import copy
 import json
 import re
-from typing import Callable, Dict, List, Optional, Union
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
-from tools import utils
+from base.base_crawler import AbstractApiClient
+from tools import json_codec, utils
 
 from .exception import DataFetchError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
+    platform = "wb"
+
     def __init__(
             self,
             timeout=10,
@@ -52,16 +54,15 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        response, _ = await self.send_request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
 
         if enable_return_response:
             return response
 
-        data: Dict = response.json()
+        data: Dict = self.parse_json(response)
         ok_code = data.get("ok")
         if ok_code == 0:  # response error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
@@ -160,6 +161,7 @@ class WeiboClient:
     ):
         """
         get note all comments include sub comments
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_note_all_comments
         :param note_id:
         :param crawl_interval:
         :param callback:
@@ -167,24 +169,43 @@ class WeiboClient:
         :return:
         """
         result = []
+        async for comment_list in self.iter_note_all_comments(note_id, crawl_interval, max_count):
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(note_id, comment_list)
+            result.extend(comment_list)
+        return result
+
+    async def iter_note_all_comments(
+        self,
+        note_id: str,
+        crawl_interval: float = 1.0,
+        max_count: int = 10,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取帖子的所有评论（含子评论），每拿到一页评论就 yield 出去，不在内存中累积
+        :param note_id:
+        :param crawl_interval:
+        :param max_count:
+        :return:
+        """
+        count = 0
         is_end = False
         max_id = -1
         max_id_type = 0
-        while not is_end and len(result) < max_count:
+        while not is_end and count < max_count:
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
             max_id_type: int = comments_res.get("max_id_type")
             comment_list: List[Dict] = comments_res.get("data", [])
             is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(note_id, comment_list)
+            if count + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - count]
+            count += len(comment_list)
+            yield comment_list
             await asyncio.sleep(crawl_interval)
-            result.extend(comment_list)
-            sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
-            result.extend(sub_comment_result)
-        return result
+            for sub_comments in self.iter_comments_all_sub_comments(comment_list):
+                count += len(sub_comments)
+                yield sub_comments
 
     @staticmethod
     async def get_comments_all_sub_comments(note_id: str, comment_list: List[Dict],
@@ -198,19 +219,33 @@ class WeiboClient:
 
         Returns:
 
+        """
+        res_sub_comments = []
+        for sub_comments in WeiboClient.iter_comments_all_sub_comments(comment_list):
+            if callback:
+                await callback(note_id, sub_comments)
+            res_sub_comments.extend(sub_comments)
+        return res_sub_comments
+
+    @staticmethod
+    def iter_comments_all_sub_comments(comment_list: List[Dict]) -> Iterator[List[Dict]]:
+        """
+        逐条取出评论里自带的子评论，微博的子评论随一级评论一起返回，不需要额外请求
+        Args:
+            comment_list:
+
+        Returns:
+
         """
         if not config.ENABLE_GET_SUB_COMMENTS:
             utils.logger.info(
-                f"[WeiboClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled")
-            return []
+                f"[WeiboClient.iter_comments_all_sub_comments] Crawling sub_comment mode is not enabled")
+            return
 
-        res_sub_comments = []
         for comment in comment_list:
             sub_comments = comment.get("comments")
             if sub_comments and isinstance(sub_comments, list):
-                await callback(note_id, sub_comments)
-                res_sub_comments.extend(sub_comments)
-        return res_sub_comments
+                yield sub_comments
 
     async def get_note_info_by_id(self, note_id: str) -> Dict:
         """
@@ -219,24 +254,23 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                "GET", url, timeout=self.timeout, headers=self.headers
-            )
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {
-                    "mblog": note_detail
-                }
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        response, _ = await self.send_request(
+            "GET", url, timeout=self.timeout, headers=self.headers
+        )
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json_codec.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {
+                "mblog": note_detail
+            }
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
     async def get_note_image(self, image_url: str) -> bytes:
         image_url = image_url[8:]  # 去掉 https://
@@ -252,13 +286,12 @@ class WeiboClient:
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
         final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", final_uri, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        response, _ = await self.send_request("GET", final_uri, rate_limit=False, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
+            return None
+        else:
+            return response.content
 
 
 
@@ -29,6 +29,8 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
+from tools.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from tools.pipeline import CrawlerPipeline
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
@@ -51,9 +53,10 @@ class WeiboCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(session_key=WeiboClient.platform)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
@@ -72,80 +75,107 @@ class WeiboCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
-            if not await self.wb_client.pong():
-                login_obj = WeiboLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-
-                # 登录成功后重定向到手机端的网站，再更新手机端登录成功的cookie
-                utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
-                await self.context_page.goto(self.mobile_index_url)
-                await asyncio.sleep(2)
-                await self.wb_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            try:
+                if ip_proxy_pool:
+                    self.wb_client.bind_proxy_pool(ip_proxy_pool, ip_proxy_info)
+                if not await self.wb_client.pong():
+                    login_obj = WeiboLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    await login_obj.begin()
+
+                    # 登录成功后重定向到手机端的网站，再更新手机端登录成功的cookie
+                    utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
+                    await self.context_page.goto(self.mobile_index_url)
+                    await asyncio.sleep(2)
+                    await self.wb_client.update_cookies(browser_context=self.browser_context)
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for video and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                await self.wb_client.close()
             utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
     async def search(self):
         """
         search weibo note with keywords
+        搜索结果已经包含微博内容，翻页、存储、评论分为流水线的不同阶段并发执行
         :return:
         """
         utils.logger.info("[WeiboCrawler.search] Begin search weibo keywords")
+        comment_semaphore = get_concurrency_limiter("wb.comments", config.PIPELINE_COMMENT_WORKER_NUM)
+
+        async def store_stage(note_item: Dict, emit) -> None:
+            mblog: Dict = note_item.get("mblog")
+            await weibo_store.update_weibo_note(note_item)
+            await self.get_note_images(mblog)
+            await emit(mblog.get("id"))
+
+        async def comment_stage(note_id: str, _) -> None:
+            await self.get_note_comments(note_id, comment_semaphore)
+
+        pipeline = (
+            CrawlerPipeline("weibo_search")
+            .add_stage("search", self.search_notes_by_keyword)
+            .add_stage("store", store_stage)
+        )
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comments", comment_stage, workers=comment_semaphore.max_limit)
+        else:
+            utils.logger.info(f"[WeiboCrawler.search] Crawling comment mode is not enabled")
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_notes_by_keyword(self, keyword: str, emit):
+        """
+        按关键词翻页搜索微博，把每条微博交给存储阶段
+        :param keyword: 搜索关键词
+        :param emit: 放入存储阶段队列
+        :return:
+        """
         weibo_limit_count = 10  # weibo limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
-                search_res = await self.wb_client.get_note_by_keyword(
-                    keyword=keyword,
-                    page=page,
-                    search_type=SearchType.DEFAULT
-                )
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
-
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
                 page += 1
-                await self.batch_get_notes_comments(note_id_list)
+                continue
+            utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
+            search_res = await self.wb_client.get_note_by_keyword(
+                keyword=keyword,
+                page=page,
+                search_type=SearchType.DEFAULT
+            )
+            note_list = filter_search_result_card(search_res.get("cards"))
+            for note_item in note_list:
+                if note_item and note_item.get("mblog"):
+                    await emit(note_item)
+            page += 1
 
     async def get_specified_notes(self):
         """
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("wb.detail")
         task_list = [
             self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in
             config.WEIBO_SPECIFIED_ID_LIST
@@ -156,7 +186,7 @@ class WeiboCrawler(AbstractCrawler):
                 await weibo_store.update_weibo_note(note_item)
         await self.batch_get_notes_comments(config.WEIBO_SPECIFIED_ID_LIST)
 
-    async def get_note_info_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_note_info_task(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[Dict]:
         """
         Get note detail task
         :param note_id:
@@ -168,6 +198,7 @@ class WeiboCrawler(AbstractCrawler):
                 result = await self.wb_client.get_note_info_by_id(note_id)
                 return result
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(f"[WeiboCrawler.get_note_info_task] Get note detail error: {ex}")
                 return None
             except KeyError as ex:
@@ -186,14 +217,14 @@ class WeiboCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("wb.comments")
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_note_comments(self, note_id: str, semaphore: asyncio.Semaphore):
+    async def get_note_comments(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """
         get comment for note id
         :param note_id:
@@ -203,15 +234,17 @@ class WeiboCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
-                await self.wb_client.get_note_all_comments(
+                async for comments in self.wb_client.iter_note_all_comments(
                     note_id=note_id,
                     crawl_interval=random.randint(1,3), # 微博对API的限流比较严重，所以延时提高一些
-                    callback=weibo_store.batch_update_weibo_note_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-                )
+                ):
+                    await weibo_store.batch_update_weibo_note_comments(note_id, comments)
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
             except Exception as e:
+                semaphore.record_error()
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] may be been blocked, err:{e}")
 
     async def get_note_images(self, mblog: Dict):
@@ -12,24 +12,26 @@
 import asyncio
 import json
 import re
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.signing_context import BrowserBatchSigner, SigningContextCache, read_local_storage
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import get_search_id, parse_note_detail_from_html, sign
 
 
 class XiaoHongShuClient(AbstractApiClient):
+    platform = "xhs"
+
     def __init__(
         self,
         timeout=10,
@@ -50,6 +52,8 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self._sign_context = SigningContextCache()
+        self._signer = BrowserBatchSigner(playwright_page, "_webmsxyw")
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
@@ -61,13 +65,14 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate(
-            "([url, data]) => window._webmsxyw(url,data)", [url, data]
+        # 并发请求的签名合并成一次 evaluate
+        encrypt_params = await self._signer.sign(url, data)
+        local_storage = await self._sign_context.get(
+            "local_storage", lambda: read_local_storage(self.playwright_page, ["b1"])
         )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
         signs = sign(
             a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
+            b1=local_storage.get("b1") or "",
             x_s=encrypt_params.get("X-s", ""),
             x_t=str(encrypt_params.get("X-t", "")),
         )
@@ -78,8 +83,8 @@ class XiaoHongShuClient(AbstractApiClient):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        # 每个请求单独一份请求头，签名和发送之间有限速、选代理等 await，不能写回共享的 self.headers
+        return {**self.headers, **headers}
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -96,8 +101,7 @@ class XiaoHongShuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop("return_response", False)
 
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response, ip_proxy_info = await self.send_request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -109,10 +113,12 @@ class XiaoHongShuClient(AbstractApiClient):
 
         if return_response:
             return response.text
-        data: Dict = response.json()
+        data: Dict = self.parse_json(response)
         if data["success"]:
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
+            # 换一个代理后抛出异常，由 retry 使用新的代理重试
+            await self.rotate_proxy(ip_proxy_info)
             raise IPBlockError(self.IP_ERROR_STR)
         else:
             raise DataFetchError(data.get("msg", None))
@@ -156,15 +162,14 @@ class XiaoHongShuClient(AbstractApiClient):
         )
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                )
-                return None
-            else:
-                return response.content
+        response, _ = await self.send_request("GET", url, rate_limit=False, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
+            )
+            return None
+        else:
+            return response.content
 
     async def pong(self) -> bool:
         """
@@ -198,6 +203,7 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self._sign_context.invalidate()
 
     async def get_note_by_keyword(
         self,
@@ -330,6 +336,7 @@ class XiaoHongShuClient(AbstractApiClient):
     ) -> List[Dict]:
         """
         获取指定笔记下的所有评论, 该方法会一直查找一个笔记下的所有评论信息
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_note_all_comments
         Args:
             note_id: 笔记ID
             xsec_token: 验证token
@@ -341,9 +348,34 @@ class XiaoHongShuClient(AbstractApiClient):
 
         """
         result = []
+        async for comments in self.iter_note_all_comments(note_id, xsec_token, crawl_interval, max_count):
+            if callback:
+                await callback(note_id, comments)
+            result.extend(comments)
+        return result
+
+    async def iter_note_all_comments(
+        self,
+        note_id: str,
+        xsec_token: str,
+        crawl_interval: float = config.REQUEST_INTERVAL if hasattr(config, 'REQUEST_INTERVAL') else 1.0,
+        max_count: int = 10,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取指定笔记下的所有评论（含二级评论），每拿到一页评论就 yield 出去，不在内存中累积
+        Args:
+            note_id: 笔记ID
+            xsec_token: 验证token
+            crawl_interval: 爬取一次评论的延迟单位（秒）
+            max_count: 最大获取评论数量
+
+        Returns:
+
+        """
+        count = 0
         comments_has_more = True
         comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
+        while comments_has_more and count < max_count:
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
             )
@@ -351,24 +383,22 @@ class XiaoHongShuClient(AbstractApiClient):
             comments_cursor = comments_res.get("cursor", "")
             if "comments" not in comments_res:
                 utils.logger.info(
-                    f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}"
+                    f"[XiaoHongShuClient.iter_note_all_comments] No 'comments' key found in response: {comments_res}"
                 )
                 break
             comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:
-                await callback(note_id, comments)
+            if count + len(comments) > max_count:
+                comments = comments[: max_count - count]
+            count += len(comments)
+            yield comments
             await asyncio.sleep(crawl_interval)
-            result.extend(comments)
-            sub_comments = await self.get_comments_all_sub_comments(
+            async for sub_comments in self.iter_comments_all_sub_comments(
                 comments=comments,
                 xsec_token=xsec_token,
                 crawl_interval=crawl_interval,
-                callback=callback,
-            )
-            result.extend(sub_comments)
-        return result
+            ):
+                count += len(sub_comments)
+                yield sub_comments
 
     async def get_comments_all_sub_comments(
         self,
@@ -387,19 +417,43 @@ class XiaoHongShuClient(AbstractApiClient):
 
         Returns:
 
+        """
+        result = []
+        # 同一批一级评论属于同一篇笔记
+        note_id = comments[0].get("note_id") if comments else ""
+        async for sub_comments in self.iter_comments_all_sub_comments(comments, xsec_token, crawl_interval):
+            if callback:
+                await callback(note_id, sub_comments)
+            result.extend(sub_comments)
+        return result
+
+    async def iter_comments_all_sub_comments(
+        self,
+        comments: List[Dict],
+        xsec_token: str,
+        crawl_interval: float = config.REQUEST_INTERVAL if hasattr(config, 'REQUEST_INTERVAL') else 1.0,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页获取指定一级评论下的所有二级评论，一级评论里自带的二级评论也作为一页 yield 出去
+        Args:
+            comments: 评论列表
+            xsec_token: 验证token
+            crawl_interval: 爬取一次评论的延迟单位（秒）
+
+        Returns:
+
         """
         if not config.ENABLE_GET_SUB_COMMENTS:
             utils.logger.info(
-                f"[XiaoHongShuCrawler.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
+                f"[XiaoHongShuCrawler.iter_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
-            return []
+            return
 
-        result = []
         for comment in comments:
             note_id = comment.get("note_id")
             sub_comments = comment.get("sub_comments")
-            if sub_comments and callback:
-                await callback(note_id, sub_comments)
+            if sub_comments:
+                yield sub_comments
 
             sub_comment_has_more = comment.get("sub_comment_has_more")
             if not sub_comment_has_more:
@@ -416,25 +470,21 @@ class XiaoHongShuClient(AbstractApiClient):
                     num=10,
                     cursor=sub_comment_cursor,
                 )
-                
+
                 if comments_res is None:
                     utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
+                        f"[XiaoHongShuClient.iter_comments_all_sub_comments] No response found for note_id: {note_id}"
                     )
                     continue
                 sub_comment_has_more = comments_res.get("has_more", False)
                 sub_comment_cursor = comments_res.get("cursor", "")
                 if "comments" not in comments_res:
                     utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
+                        f"[XiaoHongShuClient.iter_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
                     )
                     break
-                comments = comments_res["comments"]
-                if callback:
-                    await callback(note_id, comments)
+                yield comments_res["comments"]
                 await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
@@ -559,32 +609,6 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-
-        def camel_to_underscore(key):
-            return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
-
-        def transform_json_keys(json_data):
-            data_dict = json.loads(json_data)
-            dict_new = {}
-            for key, value in data_dict.items():
-                new_key = camel_to_underscore(key)
-                if not value:
-                    dict_new[new_key] = value
-                elif isinstance(value, dict):
-                    dict_new[new_key] = transform_json_keys(json.dumps(value))
-                elif isinstance(value, list):
-                    dict_new[new_key] = [
-                        (
-                            transform_json_keys(json.dumps(item))
-                            if (item and isinstance(item, dict))
-                            else item
-                        )
-                        for item in value
-                    ]
-                else:
-                    dict_new[new_key] = value
-            return dict_new
-
         url = (
             "https://www.xiaohongshu.com/explore/"
             + note_id
@@ -598,17 +622,7 @@ class XiaoHongShuClient(AbstractApiClient):
             method="GET", url=url, return_response=True, headers=copy_headers
         )
 
-        def get_note_dict(html):
-            state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-                0
-            ].replace("undefined", '""')
-
-            if state != "{}":
-                note_dict = transform_json_keys(state)
-                return note_dict["note"]["note_detail_map"][note_id]["note"]
-            return {}
-
         try:
-            return get_note_dict(html)
-        except:
+            return parse_note_detail_from_html(html, note_id)
+        except Exception:
             return None
@@ -12,7 +12,6 @@
 import asyncio
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -26,6 +25,9 @@ from model.m_xiaohongshu import NoteUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
+from tools.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from tools.pipeline import CrawlerPipeline
+from tools.throttle import get_throttle
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -47,11 +49,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(session_key=XiaoHongShuClient.platform)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info
             )
@@ -80,108 +83,140 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
-            if not await self.xhs_client.pong():
-                login_obj = XiaoHongShuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.xhs_client.update_cookies(
-                    browser_context=self.browser_context
-                )
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            try:
+                if ip_proxy_pool:
+                    self.xhs_client.bind_proxy_pool(ip_proxy_pool, ip_proxy_info)
+                if not await self.xhs_client.pong():
+                    login_obj = XiaoHongShuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.xhs_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
 
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                await self.xhs_client.close()
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
     async def search(self) -> None:
-        """Search for notes and retrieve their comment information."""
+        """Search for notes and retrieve their comment information.
+
+        搜索翻页、笔记详情、存储、评论分为流水线的不同阶段并发执行，
+        翻页不需要等待上一页的评论爬完
+        """
         utils.logger.info(
             "[XiaoHongShuCrawler.search] Begin search xiaohongshu keywords"
         )
+        detail_semaphore = get_concurrency_limiter("xhs.detail", config.PIPELINE_DETAIL_WORKER_NUM)
+        comment_semaphore = get_concurrency_limiter("xhs.comments", config.PIPELINE_COMMENT_WORKER_NUM)
+
+        async def detail_stage(post_item: Dict, emit) -> None:
+            note_detail = await self.get_note_detail_async_task(
+                note_id=post_item.get("id"),
+                xsec_source=post_item.get("xsec_source"),
+                xsec_token=post_item.get("xsec_token"),
+                semaphore=detail_semaphore,
+            )
+            if note_detail:
+                await emit(note_detail)
+
+        async def store_stage(note_detail: Dict, emit) -> None:
+            await xhs_store.update_xhs_note(note_detail)
+            await self.get_notice_media(note_detail)
+            await emit(note_detail)
+
+        async def comment_stage(note_detail: Dict, _) -> None:
+            await self.get_comments(
+                note_id=note_detail.get("note_id"),
+                xsec_token=note_detail.get("xsec_token"),
+                semaphore=comment_semaphore,
+            )
+
+        pipeline = (
+            CrawlerPipeline("xhs_search")
+            .add_stage("search", self.search_notes_by_keyword)
+            .add_stage("detail", detail_stage, workers=detail_semaphore.max_limit)
+            .add_stage("store", store_stage)
+        )
+        if config.ENABLE_GET_COMMENTS:
+            pipeline.add_stage("comments", comment_stage, workers=comment_semaphore.max_limit)
+        else:
+            utils.logger.info(
+                "[XiaoHongShuCrawler.search] Crawling comment mode is not enabled"
+            )
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_notes_by_keyword(self, keyword: str, emit) -> None:
+        """Search notes page by page and hand every post item to the next stage
+
+        Args:
+            keyword: search keyword
+            emit: put a post item into the detail stage queue
+        """
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
+        )
         xhs_limit_count = 20  # xhs limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            search_id = get_search_id()
-            while (
-                page - start_page + 1
-            ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-
-                try:
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] search xhs keyword: {keyword}, page: {page}"
-                    )
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
-                    notes_res = await self.xhs_client.get_note_by_keyword(
-                        keyword=keyword,
-                        search_id=search_id,
-                        page=page,
-                        sort=(
-                            SearchSortType(config.SORT_TYPE)
-                            if config.SORT_TYPE != ""
-                            else SearchSortType.GENERAL
-                        ),
-                    )
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
-                    )
-                    if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("No more content!")
-                        break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        )
-                        for post_item in notes_res.get("items", {})
-                        if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
-                    page += 1
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Note details: {note_details}"
-                    )
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
-                except DataFetchError:
-                    utils.logger.error(
-                        "[XiaoHongShuCrawler.search] Get note detail error"
-                    )
+        page = 1
+        search_id = get_search_id()
+        while (
+            page - start_page + 1
+        ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            if page < start_page:
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
+                page += 1
+                continue
+
+            try:
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search] search xhs keyword: {keyword}, page: {page}"
+                )
+                notes_res = await self.xhs_client.get_note_by_keyword(
+                    keyword=keyword,
+                    search_id=search_id,
+                    page=page,
+                    sort=(
+                        SearchSortType(config.SORT_TYPE)
+                        if config.SORT_TYPE != ""
+                        else SearchSortType.GENERAL
+                    ),
+                )
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
+                )
+                if not notes_res or not notes_res.get("has_more", False):
+                    utils.logger.info("No more content!")
                     break
+                for post_item in notes_res.get("items", {}):
+                    if post_item.get("model_type") not in ("rec_query", "hot_query"):
+                        await emit(post_item)
+                page += 1
+            except DataFetchError:
+                utils.logger.error(
+                    "[XiaoHongShuCrawler.search] Get note detail error"
+                )
+                break
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
@@ -219,7 +254,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("xhs.detail")
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
@@ -252,7 +287,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
                 xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=get_concurrency_limiter("xhs.detail"),
             )
             get_note_detail_task_list.append(crawler_task)
 
@@ -271,7 +306,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         note_id: str,
         xsec_source: str,
         xsec_token: str,
-        semaphore: asyncio.Semaphore,
+        semaphore: AdaptiveConcurrencyLimiter,
     ) -> Optional[Dict]:
         """Get note detail
 
@@ -291,6 +326,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 crawl_interval = random.random()
             else:
                 crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
+            # 同一平台、同一代理下的详情请求按间隔排队，等待时不阻塞其他协程
+            await get_throttle("xhs", self.xhs_client.proxies).wait(crawl_interval)
             try:
                 # 尝试直接获取网页版笔记详情，携带cookie
                 note_detail_from_html: Optional[Dict] = (
@@ -298,7 +335,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         note_id, xsec_source, xsec_token, enable_cookie=True
                     )
                 )
-                time.sleep(crawl_interval)
                 if not note_detail_from_html:
                     # 如果网页版笔记详情获取失败，则尝试不使用cookie获取
                     note_detail_from_html = (
@@ -323,6 +359,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     )
                     return note_detail
             except DataFetchError as ex:
+                semaphore.record_error()
                 utils.logger.error(
                     f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}"
                 )
@@ -346,7 +383,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("xhs.comments")
         task_list: List[Task] = []
         for index, note_id in enumerate(note_list):
             task = asyncio.create_task(
@@ -359,7 +396,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         await asyncio.gather(*task_list)
 
     async def get_comments(
-        self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore
+        self, note_id: str, xsec_token: str, semaphore: AdaptiveConcurrencyLimiter
     ):
         """Get note comments with keyword filtering and quantity limitation"""
         async with semaphore:
@@ -371,13 +408,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 crawl_interval = random.random()
             else:
                 crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
-            await self.xhs_client.get_note_all_comments(
+            async for comments in self.xhs_client.iter_note_all_comments(
                 note_id=note_id,
                 xsec_token=xsec_token,
                 crawl_interval=crawl_interval,
-                callback=xhs_store.batch_update_xhs_note_comments,
                 max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-            )
+            ):
+                await xhs_store.batch_update_xhs_note_comments(note_id, comments)
 
     @staticmethod
     def format_proxy_info(
@@ -9,11 +9,17 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
+import base64
 import ctypes
+import functools
 import json
 import random
+import re
 import time
 import urllib.parse
+import zlib
+
+from typing import Dict, Optional
 
 from model.m_xiaohongshu import NoteUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
@@ -35,12 +41,11 @@ def sign(a1="", b1="", x_s="", x_t=""):
         "x6": x_t,
         "x7": x_s,
         "x8": b1,  # localStorage.getItem("b1")
-        "x9": mrc(x_t + x_s + b1),
+        "x9": mrc_fast(x_t + x_s + b1),
         "x10": 154,  # getSigCount
     }
-    encode_str = encodeUtf8(json.dumps(common, separators=(',', ':')))
-    x_s_common = b64Encode(encode_str)
-    x_b3_traceid = get_b3_trace_id()
+    x_s_common = b64_encode_fast(json.dumps(common, separators=(',', ':')).encode("utf-8"))
+    x_b3_traceid = get_b3_trace_id_fast()
     return {
         "x-s": x_s,
         "x-t": x_t,
@@ -239,6 +244,44 @@ def encodeUtf8(e):
     return b
 
 
+# 下面的 *_fast 函数和上面从 js 移植过来的 mrc、encodeUtf8、b64Encode、get_b3_trace_id 输出完全一致，
+# 改为由 zlib、base64 等 C 实现的标准库完成，签名时使用
+MRC_LENGTH = 57
+_B64_TRANSLATION = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    "".join(lookup).encode(),
+)
+
+
+def mrc_fast(e: str) -> int:
+    """
+    mrc 是对前 57 个字符做标准 CRC32 后再做一次异或，这里用 zlib.crc32 计算
+    和 mrc 一样，字符串不足 57 个字符或者包含码点大于 255 的字符时抛出 IndexError
+    """
+    try:
+        data = e[:MRC_LENGTH].encode("latin-1")
+    except UnicodeEncodeError:
+        raise IndexError("list index out of range")
+    if len(data) < MRC_LENGTH:
+        raise IndexError("string index out of range")
+    return (zlib.crc32(data) ^ 0xFFFFFFFF ^ -1) ^ 3988292384
+
+
+def b64_encode_fast(data: bytes) -> str:
+    """
+    b64Encode 是使用 lookup 字母表的 base64，先做标准 base64 再替换字母表
+    encodeUtf8(s) 的结果和 s.encode("utf-8") 相同，所以 b64Encode(encodeUtf8(s)) == b64_encode_fast(s.encode("utf-8"))
+    """
+    return base64.b64encode(data).translate(_B64_TRANSLATION).decode()
+
+
+def get_b3_trace_id_fast() -> str:
+    """
+    16 位随机十六进制字符串，一次生成 64 个随机位
+    """
+    return "%016x" % random.getrandbits(64)
+
+
 def base36encode(number, alphabet='0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'):
     """Converts an integer to a base36 string."""
     if not isinstance(number, int):
@@ -314,3 +357,48 @@ if __name__ == '__main__':
     print(final_img_url)
 
 
+_INITIAL_STATE_MARKER = "window.__INITIAL_STATE__="
+_CAMEL_PATTERN = re.compile(r"(?<!^)(?=[A-Z])")
+# 只替换处于值位置的 undefined，字符串里的 undefined 保持不变
+_UNDEFINED_VALUE_PATTERN = re.compile(r"([:,\[]\s*)undefined(?=\s*[,}\]])")
+
+
+@functools.lru_cache(maxsize=4096)
+def camel_to_underscore(key: str) -> str:
+    """
+    驼峰转下划线，页面里的键名重复度很高，结果做了缓存
+    """
+    return _CAMEL_PATTERN.sub("_", key).lower()
+
+
+def _underscore_keys_hook(obj: Dict) -> Dict:
+    return {camel_to_underscore(key): value for key, value in obj.items()}
+
+
+_initial_state_decoder = json.JSONDecoder(object_hook=_underscore_keys_hook)
+
+
+def parse_note_detail_from_html(html: str, note_id: str) -> Optional[Dict]:
+    """
+    从笔记详情页HTML中解析笔记详情
+    只截取 window.__INITIAL_STATE__ 所在的 script，解码一次，解码时把所有键名由驼峰转成下划线
+    Args:
+        html: 笔记详情页HTML
+        note_id: 笔记ID
+
+    Returns:
+        笔记详情；页面里没有 window.__INITIAL_STATE__ 或者它所在的 script 不完整时返回 None，
+        初始化数据是空对象 {} 时返回空字典
+    """
+    start = html.find(_INITIAL_STATE_MARKER)
+    if start == -1:
+        return None
+    start += len(_INITIAL_STATE_MARKER)
+    end = html.find("</script>", start)
+    if end == -1:
+        return None
+    state = html[start:end].rstrip().rstrip(";")
+    if state == "{}":
+        return {}
+    state_dict = _initial_state_decoder.decode(_UNDEFINED_VALUE_PATTERN.sub(r'\1""', state))
+    return state_dict["note"]["note_detail_map"][note_id]["note"]
@@ -12,10 +12,9 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -23,8 +22,9 @@ from tenacity import retry, stop_after_attempt, wait_fixed
 import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
-from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from model.m_zhihu import ZhihuCommentRecord, ZhihuContentRecord, ZhihuCreator
 from tools import utils
+from tools.js_signer import close_sign_worker_pools
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
@@ -32,6 +32,8 @@ from .help import ZhihuExtractor, sign
 
 
 class ZhiHuClient(AbstractApiClient):
+    platform = "zhihu"
+
     def __init__(
             self,
             timeout=10,
@@ -58,12 +60,19 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
+    async def close(self):
+        """
+        关闭连接池和常驻的签名进程
+        """
+        await super().close()
+        await close_sign_worker_pools()
+
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
@@ -79,11 +88,10 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxies=self.proxies, ) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
+        response, _ = await self.send_request(
+            method, url, timeout=self.timeout,
+            **kwargs
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
@@ -97,7 +105,7 @@ class ZhiHuClient(AbstractApiClient):
         if return_response:
             return response.text
         try:
-            data: Dict = response.json()
+            data: Dict = self.parse_json(response)
             if data.get("error"):
                 utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
                 raise DataFetchError(data.get("error", {}).get("message"))
@@ -179,7 +187,7 @@ class ZhiHuClient(AbstractApiClient):
             sort: SearchSort = SearchSort.DEFAULT,
             note_type: SearchType = SearchType.DEFAULT,
             search_time: SearchTime = SearchTime.DEFAULT
-    ) -> List[ZhihuContent]:
+    ) -> List[ZhihuContentRecord]:
         """
         根据关键词搜索
         Args:
@@ -259,10 +267,11 @@ class ZhiHuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_note_all_comments(self, content: ZhihuContent, crawl_interval: float = 1.0,
-                                    callback: Optional[Callable] = None) -> List[ZhihuComment]:
+    async def get_note_all_comments(self, content: ZhihuContentRecord, crawl_interval: float = 1.0,
+                                    callback: Optional[Callable] = None) -> List[ZhihuCommentRecord]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        所有评论都会累积在返回的列表里，只需要逐页处理时使用 iter_note_all_comments
         Args:
             content: 内容详情对象(问题｜文章｜视频)
             crawl_interval: 爬取一次笔记的延迟单位（秒）
@@ -271,7 +280,24 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        result: List[ZhihuComment] = []
+        result: List[ZhihuCommentRecord] = []
+        async for comments in self.iter_note_all_comments(content, crawl_interval):
+            if callback:
+                await callback(comments)
+            result.extend(comments)
+        return result
+
+    async def iter_note_all_comments(self, content: ZhihuContentRecord,
+                                     crawl_interval: float = 1.0) -> AsyncIterator[List[ZhihuCommentRecord]]:
+        """
+        逐页获取指定帖子下的所有评论，一级评论页之后紧跟它的子评论页，每拿到一页就 yield 出去，不在内存中累积
+        Args:
+            content: 内容详情对象(问题｜文章｜视频)
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+
+        Returns:
+
+        """
         is_end: bool = False
         offset: str = ""
         limit: int = 10
@@ -287,16 +313,14 @@ class ZhiHuClient(AbstractApiClient):
             if not comments:
                 break
 
-            if callback:
-                await callback(comments)
-
-            result.extend(comments)
-            await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
+            yield comments
+            async for sub_comments in self.iter_comments_all_sub_comments(content, comments,
+                                                                          crawl_interval=crawl_interval):
+                yield sub_comments
             await asyncio.sleep(crawl_interval)
-        return result
 
-    async def get_comments_all_sub_comments(self, content: ZhihuContent, comments: List[ZhihuComment], crawl_interval: float = 1.0,
-                                            callback: Optional[Callable] = None) -> List[ZhihuComment]:
+    async def get_comments_all_sub_comments(self, content: ZhihuContentRecord, comments: List[ZhihuCommentRecord], crawl_interval: float = 1.0,
+                                            callback: Optional[Callable] = None) -> List[ZhihuCommentRecord]:
         """
         获取指定评论下的所有子评论
         Args:
@@ -307,11 +331,29 @@ class ZhiHuClient(AbstractApiClient):
 
         Returns:
 
+        """
+        all_sub_comments: List[ZhihuCommentRecord] = []
+        async for sub_comments in self.iter_comments_all_sub_comments(content, comments, crawl_interval):
+            if callback:
+                await callback(sub_comments)
+            all_sub_comments.extend(sub_comments)
+        return all_sub_comments
+
+    async def iter_comments_all_sub_comments(self, content: ZhihuContentRecord, comments: List[ZhihuCommentRecord],
+                                             crawl_interval: float = 1.0) -> AsyncIterator[List[ZhihuCommentRecord]]:
+        """
+        逐页获取指定评论下的所有子评论
+        Args:
+            content: 内容详情对象(问题｜文章｜视频)
+            comments: 评论列表
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+
+        Returns:
+
         """
         if not config.ENABLE_GET_SUB_COMMENTS:
-            return []
+            return
 
-        all_sub_comments: List[ZhihuComment] = []
         for parment_comment in comments:
             if parment_comment.sub_comment_count == 0:
                 continue
@@ -331,12 +373,8 @@ class ZhiHuClient(AbstractApiClient):
                 if not sub_comments:
                     break
 
-                if callback:
-                    await callback(sub_comments)
-
-                all_sub_comments.extend(sub_comments)
+                yield sub_comments
                 await asyncio.sleep(crawl_interval)
-        return all_sub_comments
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
         """
@@ -413,7 +451,7 @@ class ZhiHuClient(AbstractApiClient):
         return await self.get(uri, params)
 
     async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
-                                        callback: Optional[Callable] = None) -> List[ZhihuContent]:
+                                        callback: Optional[Callable] = None) -> List[ZhihuContentRecord]:
         """
         获取创作者的所有回答
         Args:
@@ -424,7 +462,7 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
+        all_contents: List[ZhihuContentRecord] = []
         is_end: bool = False
         offset: int = 0
         limit: int = 20
@@ -445,7 +483,7 @@ class ZhiHuClient(AbstractApiClient):
 
 
     async def get_all_articles_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
-                                          callback: Optional[Callable] = None) -> List[ZhihuContent]:
+                                          callback: Optional[Callable] = None) -> List[ZhihuContentRecord]:
         """
         获取创作者的所有文章
         Args:
@@ -456,7 +494,7 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
+        all_contents: List[ZhihuContentRecord] = []
         is_end: bool = False
         offset: int = 0
         limit: int = 20
@@ -476,7 +514,7 @@ class ZhiHuClient(AbstractApiClient):
 
 
     async def get_all_videos_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
-                                        callback: Optional[Callable] = None) -> List[ZhihuContent]:
+                                        callback: Optional[Callable] = None) -> List[ZhihuContentRecord]:
         """
         获取创作者的所有视频
         Args:
@@ -487,7 +525,7 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
+        all_contents: List[ZhihuContentRecord] = []
         is_end: bool = False
         offset: int = 0
         limit: int = 20
@@ -508,7 +546,7 @@ class ZhiHuClient(AbstractApiClient):
 
     async def get_answer_info(
         self, question_id: str, answer_id: str
-    ) -> Optional[ZhihuContent]:
+    ) -> Optional[ZhihuContentRecord]:
         """
         获取回答信息
         Args:
@@ -522,7 +560,7 @@ class ZhiHuClient(AbstractApiClient):
         response_html = await self.get(uri, return_response=True)
         return self._extractor.extract_answer_content_from_html(response_html)
 
-    async def get_article_info(self, article_id: str) -> Optional[ZhihuContent]:
+    async def get_article_info(self, article_id: str) -> Optional[ZhihuContentRecord]:
         """
         获取文章信息
         Args:
@@ -535,7 +573,7 @@ class ZhiHuClient(AbstractApiClient):
         response_html = await self.get(uri, return_response=True)
         return self._extractor.extract_article_content_from_html(response_html)
 
-    async def get_video_info(self, video_id: str) -> Optional[ZhihuContent]:
+    async def get_video_info(self, video_id: str) -> Optional[ZhihuContentRecord]:
         """
         获取视频信息
         Args:
@@ -22,10 +22,11 @@ from playwright.async_api import (BrowserContext, BrowserType, Page,
 import config
 from constant import zhihu as constant
 from base.base_crawler import AbstractCrawler
-from model.m_zhihu import ZhihuContent, ZhihuCreator
+from model.m_zhihu import ZhihuContentRecord, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
+from tools.concurrency import AdaptiveConcurrencyLimiter, get_concurrency_limiter
 from var import crawler_type_var, source_keyword_var
 
 from .client import ZhiHuClient
@@ -52,9 +53,10 @@ class ZhihuCrawler(AbstractCrawler):
 
         """
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(session_key=ZhiHuClient.platform)
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
@@ -74,36 +76,40 @@ class ZhihuCrawler(AbstractCrawler):
 
             # Create a client to interact with the zhihu website.
             self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
-            if not await self.zhihu_client.pong():
-                login_obj = ZhiHuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+            try:
+                if ip_proxy_pool:
+                    self.zhihu_client.bind_proxy_pool(ip_proxy_pool, ip_proxy_info)
+                if not await self.zhihu_client.pong():
+                    login_obj = ZhiHuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    await login_obj.begin()
+                    await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
-            # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
-            utils.logger.info("[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右")
-            await self.context_page.goto(f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content")
-            await asyncio.sleep(5)
-            await self.zhihu_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+                # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
+                utils.logger.info("[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右")
+                await self.context_page.goto(f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content")
+                await asyncio.sleep(5)
+                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                await self.zhihu_client.close()
             utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
 
     async def search(self) -> None:
@@ -125,7 +131,7 @@ class ZhihuCrawler(AbstractCrawler):
 
                 try:
                     utils.logger.info(f"[ZhihuCrawler.search] search zhihu keyword: {keyword}, page: {page}")
-                    content_list: List[ZhihuContent]  = await self.zhihu_client.get_note_by_keyword(
+                    content_list: List[ZhihuContentRecord]  = await self.zhihu_client.get_note_by_keyword(
                         keyword=keyword,
                         page=page,
                     )
@@ -143,7 +149,7 @@ class ZhihuCrawler(AbstractCrawler):
                     utils.logger.error("[ZhihuCrawler.search] Search content error")
                     return
 
-    async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
+    async def batch_get_content_comments(self, content_list: List[ZhihuContentRecord]):
         """
         Batch get content comments
         Args:
@@ -156,14 +162,14 @@ class ZhihuCrawler(AbstractCrawler):
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("zhihu.comments")
         task_list: List[Task] = []
         for content_item in content_list:
             task = asyncio.create_task(self.get_comments(content_item, semaphore), name=content_item.content_id)
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_comments(self, content_item: ZhihuContent, semaphore: asyncio.Semaphore):
+    async def get_comments(self, content_item: ZhihuContentRecord, semaphore: AdaptiveConcurrencyLimiter):
         """
         Get note comments with keyword filtering and quantity limitation
         Args:
@@ -175,11 +181,11 @@ class ZhihuCrawler(AbstractCrawler):
         """
         async with semaphore:
             utils.logger.info(f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}")
-            await self.zhihu_client.get_note_all_comments(
+            async for comments in self.zhihu_client.iter_note_all_comments(
                 content=content_item,
-                crawl_interval=random.random(),
-                callback=zhihu_store.batch_update_zhihu_note_comments
-            )
+                crawl_interval=random.random()
+            ):
+                await zhihu_store.batch_update_zhihu_note_comments(comments)
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -228,8 +234,8 @@ class ZhihuCrawler(AbstractCrawler):
             await self.batch_get_content_comments(all_content_list)
 
     async def get_note_detail(
-        self, full_note_url: str, semaphore: asyncio.Semaphore
-    ) -> Optional[ZhihuContent]:
+        self, full_note_url: str, semaphore: AdaptiveConcurrencyLimiter
+    ) -> Optional[ZhihuContentRecord]:
         """
         Get note detail
         Args:
@@ -279,11 +285,11 @@ class ZhihuCrawler(AbstractCrawler):
             full_note_url = full_note_url.split("?")[0]
             crawler_task = self.get_note_detail(
                 full_note_url=full_note_url,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=get_concurrency_limiter("zhihu.detail"),
             )
             get_note_detail_task_list.append(crawler_task)
 
-        need_get_comment_notes: List[ZhihuContent] = []
+        need_get_comment_notes: List[ZhihuContentRecord] = []
         note_details = await asyncio.gather(*get_note_detail_task_list)
         for index, note_detail in enumerate(note_details):
             if not note_detail:
@@ -292,7 +298,7 @@ class ZhihuCrawler(AbstractCrawler):
                 )
                 continue
 
-            note_detail = cast(ZhihuContent, note_detail)  # only for type check
+            note_detail = cast(ZhihuContentRecord, note_detail)  # only for type check
             need_get_comment_notes.append(note_detail)
             await zhihu_store.update_zhihu_content(note_detail)
 
@@ -10,23 +10,23 @@
 
 
 # -*- coding: utf-8 -*-
-import json
 from typing import Dict, List, Optional
 from urllib.parse import parse_qs, urlparse
 
-import execjs
 from parsel import Selector
 
 from constant import zhihu as zhihu_constant
-from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from model.m_zhihu import ZhihuCommentRecord, ZhihuContentRecord, ZhihuCreator
+from tools import json_codec
 from tools.crawler_util import extract_text_from_html
+from tools.js_signer import get_sign_worker_pool
 
-ZHIHU_SGIN_JS = None
+ZHIHU_SGIN_JS = "libs/zhihu.js"
 
 
-def sign(url: str, cookies: str) -> Dict:
+async def sign(url: str, cookies: str) -> Dict:
     """
-    zhihu sign algorithm
+    zhihu sign algorithm, 签名在常驻的 node 进程池中执行
     Args:
         url: request url with query string
         cookies: request cookies with d_c0 key
@@ -34,19 +34,14 @@ def sign(url: str, cookies: str) -> Dict:
     Returns:
 
     """
-    global ZHIHU_SGIN_JS
-    if not ZHIHU_SGIN_JS:
-        with open("libs/zhihu.js", mode="r", encoding="utf-8-sig") as f:
-            ZHIHU_SGIN_JS = execjs.compile(f.read())
-
-    return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
+    return await get_sign_worker_pool(ZHIHU_SGIN_JS).call("get_sign", url, cookies)
 
 
 class ZhihuExtractor:
     def __init__(self):
         pass
 
-    def extract_contents_from_search(self, json_data: Dict) -> List[ZhihuContent]:
+    def extract_contents_from_search(self, json_data: Dict) -> List[ZhihuContentRecord]:
         """
         extract zhihu contents
         Args:
@@ -63,7 +58,7 @@ class ZhihuExtractor:
         return self._extract_content_list([sr_item.get("object") for sr_item in search_result if sr_item.get("object")])
 
 
-    def _extract_content_list(self, content_list: List[Dict]) -> List[ZhihuContent]:
+    def _extract_content_list(self, content_list: List[Dict]) -> List[ZhihuContentRecord]:
         """
         extract zhihu content list
         Args:
@@ -75,7 +70,7 @@ class ZhihuExtractor:
         if not content_list:
             return []
 
-        res: List[ZhihuContent] = []
+        res: List[ZhihuContentRecord] = []
         for content in content_list:
             if content.get("type") == zhihu_constant.ANSWER_NAME:
                 res.append(self._extract_answer_content(content))
@@ -87,7 +82,7 @@ class ZhihuExtractor:
                 continue
         return res
 
-    def _extract_answer_content(self, answer: Dict) -> ZhihuContent:
+    def _extract_answer_content(self, answer: Dict) -> ZhihuContentRecord:
         """
         extract zhihu answer content
         Args:
@@ -95,7 +90,7 @@ class ZhihuExtractor:
 
         Returns:
         """
-        res = ZhihuContent()
+        res = ZhihuContentRecord()
         res.content_id = answer.get("id")
         res.content_type = answer.get("type")
         res.content_text = extract_text_from_html(answer.get("content", ""))
@@ -117,7 +112,7 @@ class ZhihuExtractor:
         res.user_url_token = author_info.url_token
         return res
 
-    def _extract_article_content(self, article: Dict) -> ZhihuContent:
+    def _extract_article_content(self, article: Dict) -> ZhihuContentRecord:
         """
         extract zhihu article content
         Args:
@@ -126,7 +121,7 @@ class ZhihuExtractor:
         Returns:
 
         """
-        res = ZhihuContent()
+        res = ZhihuContentRecord()
         res.content_id = article.get("id")
         res.content_type = article.get("type")
         res.content_text = extract_text_from_html(article.get("content"))
@@ -147,7 +142,7 @@ class ZhihuExtractor:
         res.user_url_token = author_info.url_token
         return res
 
-    def _extract_zvideo_content(self, zvideo: Dict) -> ZhihuContent:
+    def _extract_zvideo_content(self, zvideo: Dict) -> ZhihuContentRecord:
         """
         extract zhihu zvideo content
         Args:
@@ -156,7 +151,7 @@ class ZhihuExtractor:
         Returns:
 
         """
-        res = ZhihuContent()
+        res = ZhihuContentRecord()
 
         if "video" in zvideo and isinstance(zvideo.get("video"), dict): # 说明是从创作者主页的视频列表接口来的
             res.content_url = f"{zhihu_constant.ZHIHU_URL}/zvideo/{res.content_id}"
@@ -209,7 +204,7 @@ class ZhihuExtractor:
             )
         return res
 
-    def extract_comments(self, page_content: ZhihuContent, comments: List[Dict]) -> List[ZhihuComment]:
+    def extract_comments(self, page_content: ZhihuContentRecord, comments: List[Dict]) -> List[ZhihuCommentRecord]:
         """
         extract zhihu comments
         Args:
@@ -221,14 +216,14 @@ class ZhihuExtractor:
         """
         if not comments:
             return []
-        res: List[ZhihuComment] = []
+        res: List[ZhihuCommentRecord] = []
         for comment in comments:
             if comment.get("type") != "comment":
                 continue
             res.append(self._extract_comment(page_content, comment))
         return res
 
-    def _extract_comment(self, page_content: ZhihuContent, comment: Dict) -> ZhihuComment:
+    def _extract_comment(self, page_content: ZhihuContentRecord, comment: Dict) -> ZhihuCommentRecord:
         """
         extract zhihu comment
         Args:
@@ -238,7 +233,7 @@ class ZhihuExtractor:
         Returns:
 
         """
-        res = ZhihuComment()
+        res = ZhihuCommentRecord()
         res.comment_id = str(comment.get("id", ""))
         res.parent_comment_id = comment.get("reply_comment_id")
         res.content = extract_text_from_html(comment.get("content"))
@@ -332,7 +327,7 @@ class ZhihuExtractor:
         if not js_init_data:
             return None
 
-        js_init_data_dict: Dict = json.loads(js_init_data)
+        js_init_data_dict: Dict = json_codec.loads(js_init_data)
         users_info: Dict = js_init_data_dict.get("initialState", {}).get("entities", {}).get("users", {})
         if not users_info:
             return None
@@ -360,7 +355,7 @@ class ZhihuExtractor:
         return res
 
 
-    def extract_content_list_from_creator(self, anwser_list: List[Dict]) -> List[ZhihuContent]:
+    def extract_content_list_from_creator(self, anwser_list: List[Dict]) -> List[ZhihuContentRecord]:
         """
         extract content list from creator
         Args:
@@ -377,7 +372,7 @@ class ZhihuExtractor:
 
 
 
-    def extract_answer_content_from_html(self, html_content: str) -> Optional[ZhihuContent]:
+    def extract_answer_content_from_html(self, html_content: str) -> Optional[ZhihuContentRecord]:
         """
         extract zhihu answer content from html
         Args:
@@ -389,14 +384,14 @@ class ZhihuExtractor:
         js_init_data: str = Selector(text=html_content).xpath("//script[@id='js-initialData']/text()").get(default="")
         if not js_init_data:
             return None
-        json_data: Dict = json.loads(js_init_data)
+        json_data: Dict = json_codec.loads(js_init_data)
         answer_info: Dict = json_data.get("initialState", {}).get("entities", {}).get("answers", {})
         if not answer_info:
             return None
 
         return self._extract_answer_content(answer_info.get(list(answer_info.keys())[0]))
 
-    def extract_article_content_from_html(self, html_content: str) -> Optional[ZhihuContent]:
+    def extract_article_content_from_html(self, html_content: str) -> Optional[ZhihuContentRecord]:
         """
         extract zhihu article content from html
         Args:
@@ -408,14 +403,14 @@ class ZhihuExtractor:
         js_init_data: str = Selector(text=html_content).xpath("//script[@id='js-initialData']/text()").get(default="")
         if not js_init_data:
             return None
-        json_data: Dict = json.loads(js_init_data)
+        json_data: Dict = json_codec.loads(js_init_data)
         article_info: Dict = json_data.get("initialState", {}).get("entities", {}).get("articles", {})
         if not article_info:
             return None
 
         return self._extract_article_content(article_info.get(list(article_info.keys())[0]))
 
-    def extract_zvideo_content_from_html(self, html_content: str) -> Optional[ZhihuContent]:
+    def extract_zvideo_content_from_html(self, html_content: str) -> Optional[ZhihuContentRecord]:
         """
         extract zhihu zvideo content from html
         Args:
@@ -427,7 +422,7 @@ class ZhihuExtractor:
         js_init_data: str = Selector(text=html_content).xpath("//script[@id='js-initialData']/text()").get(default="")
         if not js_init_data:
             return None
-        json_data: Dict = json.loads(js_init_data)
+        json_data: Dict = json_codec.loads(js_init_data)
         zvideo_info: Dict = json_data.get("initialState", {}).get("entities", {}).get("zvideos", {})
         users: Dict = json_data.get("initialState", {}).get("entities", {}).get("users", {})
         if not zvideo_info:
@@ -14,6 +14,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from model.record import SlotsRecord, record_slots
+
 
 class TiebaNote(BaseModel):
     """
@@ -56,6 +58,20 @@ class TiebaComment(BaseModel):
     tieba_link: str = Field(..., description="贴吧链接")
 
 
+class TiebaNoteRecord(SlotsRecord, model=TiebaNote):
+    """
+    百度贴吧帖子，__slots__ 记录，提取器直接构造，不做校验
+    """
+    __slots__ = record_slots(TiebaNote)
+
+
+class TiebaCommentRecord(SlotsRecord, model=TiebaComment):
+    """
+    百度贴吧评论，__slots__ 记录，提取器直接构造，不做校验
+    """
+    __slots__ = record_slots(TiebaComment)
+
+
 class TiebaCreator(BaseModel):
     """
     百度贴吧创作者
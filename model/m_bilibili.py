@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from model.record import SlotsRecord, record_slots
+
+
+class BilibiliVideoContent(BaseModel):
+    """
+    B站视频
+    """
+    video_id: str = Field(..., description="视频ID")
+    video_type: str = Field(default="video", description="视频类型")
+    title: str = Field(default="", description="视频标题")
+    desc: str = Field(default="", description="视频描述")
+    create_time: Optional[int] = Field(default=None, description="发布时间")
+    user_id: str = Field(..., description="UP主ID")
+    nickname: Optional[str] = Field(default=None, description="UP主昵称")
+    avatar: str = Field(default="", description="UP主头像地址")
+    liked_count: str = Field(default="", description="点赞数")
+    disliked_count: str = Field(default="", description="点踩数")
+    video_play_count: str = Field(default="", description="播放数")
+    video_favorite_count: str = Field(default="", description="收藏数")
+    video_share_count: str = Field(default="", description="分享数")
+    video_coin_count: str = Field(default="", description="投币数")
+    video_danmaku: str = Field(default="", description="弹幕数")
+    video_comment: str = Field(default="", description="评论数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    video_url: str = Field(..., description="视频链接")
+    video_cover_url: str = Field(default="", description="视频封面地址")
+    source_keyword: str = Field(default="", description="来源关键词")
+
+
+class BilibiliVideoComment(BaseModel):
+    """
+    B站视频评论
+    """
+    comment_id: str = Field(..., description="评论ID")
+    parent_comment_id: str = Field(default="0", description="父评论ID")
+    create_time: Optional[int] = Field(default=None, description="评论时间")
+    video_id: str = Field(..., description="视频ID")
+    content: Optional[str] = Field(default=None, description="评论内容")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    sex: Optional[str] = Field(default=None, description="用户性别")
+    sign: Optional[str] = Field(default=None, description="用户签名")
+    avatar: Optional[str] = Field(default=None, description="用户头像地址")
+    sub_comment_count: str = Field(default="0", description="子评论数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+
+
+class BilibiliVideoContentRecord(SlotsRecord, model=BilibiliVideoContent):
+    """
+    B站视频，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(BilibiliVideoContent)
+
+
+class BilibiliVideoCommentRecord(SlotsRecord, model=BilibiliVideoComment):
+    """
+    B站视频评论，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(BilibiliVideoComment)
@@ -10,3 +10,71 @@
 
 
 # -*- coding: utf-8 -*-
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from model.record import SlotsRecord, record_slots
+
+
+class DouyinAweme(BaseModel):
+    """
+    抖音视频
+    """
+    aweme_id: str = Field(..., description="视频ID")
+    aweme_type: str = Field(default="", description="视频类型")
+    title: str = Field(default="", description="视频标题")
+    desc: str = Field(default="", description="视频描述")
+    create_time: Optional[int] = Field(default=None, description="发布时间")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    sec_uid: Optional[str] = Field(default=None, description="用户sec_uid")
+    short_user_id: Optional[str] = Field(default=None, description="用户短ID")
+    user_unique_id: Optional[str] = Field(default=None, description="用户唯一ID")
+    user_signature: Optional[str] = Field(default=None, description="用户签名")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    avatar: str = Field(default="", description="用户头像地址")
+    liked_count: str = Field(default="", description="点赞数")
+    collected_count: str = Field(default="", description="收藏数")
+    comment_count: str = Field(default="", description="评论数")
+    share_count: str = Field(default="", description="分享数")
+    ip_location: str = Field(default="", description="IP地理位置")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    aweme_url: str = Field(..., description="视频链接")
+    source_keyword: str = Field(default="", description="来源关键词")
+
+
+class DouyinAwemeComment(BaseModel):
+    """
+    抖音视频评论
+    """
+    comment_id: str = Field(..., description="评论ID")
+    create_time: Optional[int] = Field(default=None, description="评论时间")
+    ip_location: str = Field(default="", description="IP地理位置")
+    aweme_id: str = Field(..., description="视频ID")
+    content: Optional[str] = Field(default=None, description="评论内容")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    sec_uid: Optional[str] = Field(default=None, description="用户sec_uid")
+    short_user_id: Optional[str] = Field(default=None, description="用户短ID")
+    user_unique_id: Optional[str] = Field(default=None, description="用户唯一ID")
+    user_signature: Optional[str] = Field(default=None, description="用户签名")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    avatar: str = Field(default="", description="用户头像地址")
+    sub_comment_count: str = Field(default="0", description="子评论数")
+    like_count: int = Field(default=0, description="点赞数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    parent_comment_id: str = Field(default="0", description="父评论ID")
+    pictures: str = Field(default="", description="评论图片地址，多个用逗号分隔")
+
+
+class DouyinAwemeRecord(SlotsRecord, model=DouyinAweme):
+    """
+    抖音视频，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(DouyinAweme)
+
+
+class DouyinAwemeCommentRecord(SlotsRecord, model=DouyinAwemeComment):
+    """
+    抖音视频评论，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(DouyinAwemeComment)
@@ -10,3 +10,58 @@
 
 
 # -*- coding: utf-8 -*-
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from model.record import SlotsRecord, record_slots
+
+
+class KuaishouVideo(BaseModel):
+    """
+    快手视频
+    """
+    video_id: str = Field(..., description="视频ID")
+    video_type: str = Field(default="", description="视频类型")
+    title: str = Field(default="", description="视频标题")
+    desc: str = Field(default="", description="视频描述")
+    create_time: Optional[int] = Field(default=None, description="发布时间")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    avatar: str = Field(default="", description="用户头像地址")
+    liked_count: str = Field(default="", description="点赞数")
+    viewd_count: str = Field(default="", description="播放数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    video_url: str = Field(..., description="视频链接")
+    video_cover_url: str = Field(default="", description="视频封面地址")
+    video_play_url: str = Field(default="", description="视频播放地址")
+    source_keyword: str = Field(default="", description="来源关键词")
+
+
+class KuaishouVideoComment(BaseModel):
+    """
+    快手视频评论
+    """
+    comment_id: Optional[str] = Field(default=None, description="评论ID")
+    create_time: Optional[int] = Field(default=None, description="评论时间")
+    video_id: str = Field(..., description="视频ID")
+    content: Optional[str] = Field(default=None, description="评论内容")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    avatar: Optional[str] = Field(default=None, description="用户头像地址")
+    sub_comment_count: str = Field(default="0", description="子评论数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+
+
+class KuaishouVideoRecord(SlotsRecord, model=KuaishouVideo):
+    """
+    快手视频，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(KuaishouVideo)
+
+
+class KuaishouVideoCommentRecord(SlotsRecord, model=KuaishouVideoComment):
+    """
+    快手视频评论，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(KuaishouVideoComment)
@@ -10,3 +10,63 @@
 
 
 # -*- coding: utf-8 -*-
+from pydantic import BaseModel, Field
+
+from model.record import SlotsRecord, record_slots
+
+
+class WeiboNote(BaseModel):
+    """
+    微博
+    """
+    note_id: str = Field(..., description="微博ID")
+    content: str = Field(default="", description="微博内容，已去掉 html 标签")
+    create_time: int = Field(..., description="发布时间戳")
+    create_date_time: str = Field(..., description="发布时间")
+    liked_count: str = Field(default="0", description="点赞数")
+    comments_count: str = Field(default="0", description="评论数")
+    shared_count: str = Field(default="0", description="转发数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    note_url: str = Field(..., description="微博链接")
+    ip_location: str = Field(default="", description="IP地理位置")
+    user_id: str = Field(..., description="用户ID")
+    nickname: str = Field(default="", description="用户昵称")
+    gender: str = Field(default="", description="用户性别")
+    profile_url: str = Field(default="", description="用户主页链接")
+    avatar: str = Field(default="", description="用户头像地址")
+    source_keyword: str = Field(default="", description="来源关键词")
+
+
+class WeiboNoteComment(BaseModel):
+    """
+    微博评论
+    """
+    comment_id: str = Field(..., description="评论ID")
+    create_time: int = Field(..., description="评论时间戳")
+    create_date_time: str = Field(..., description="评论时间")
+    note_id: str = Field(..., description="微博ID")
+    content: str = Field(default="", description="评论内容，已去掉 html 标签")
+    sub_comment_count: str = Field(default="0", description="子评论数")
+    comment_like_count: str = Field(default="0", description="点赞数")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    ip_location: str = Field(default="", description="IP地理位置")
+    parent_comment_id: str = Field(default="", description="父评论ID")
+    user_id: str = Field(..., description="用户ID")
+    nickname: str = Field(default="", description="用户昵称")
+    gender: str = Field(default="", description="用户性别")
+    profile_url: str = Field(default="", description="用户主页链接")
+    avatar: str = Field(default="", description="用户头像地址")
+
+
+class WeiboNoteRecord(SlotsRecord, model=WeiboNote):
+    """
+    微博，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(WeiboNote)
+
+
+class WeiboNoteCommentRecord(SlotsRecord, model=WeiboNoteComment):
+    """
+    微博评论，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(WeiboNoteComment)
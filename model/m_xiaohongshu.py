@@ -12,10 +12,74 @@
 # -*- coding: utf-8 -*-
 
 
+from typing import Optional, Union
+
 from pydantic import BaseModel, Field
 
+from model.record import SlotsRecord, record_slots
+
 
 class NoteUrlInfo(BaseModel):
     note_id: str = Field(title="note id")
     xsec_token: str = Field(title="xsec token")
-    xsec_source: str = Field(title="xsec source")
\ No newline at end of file
+    xsec_source: str = Field(title="xsec source")
+
+
+class XhsNote(BaseModel):
+    """
+    小红书笔记
+    """
+    note_id: str = Field(..., description="笔记ID")
+    type: Optional[str] = Field(default=None, description="笔记类型")
+    title: str = Field(default="", description="笔记标题")
+    desc: str = Field(default="", description="笔记描述")
+    video_url: str = Field(default="", description="视频地址，多个用逗号分隔")
+    time: Optional[int] = Field(default=None, description="发布时间")
+    last_update_time: Optional[int] = Field(default=0, description="最后更新时间")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    avatar: Optional[str] = Field(default=None, description="用户头像地址")
+    liked_count: Optional[str] = Field(default=None, description="点赞数")
+    collected_count: Optional[str] = Field(default=None, description="收藏数")
+    comment_count: Optional[str] = Field(default=None, description="评论数")
+    share_count: Optional[str] = Field(default=None, description="分享数")
+    ip_location: Optional[str] = Field(default="", description="IP地理位置")
+    image_list: str = Field(default="", description="图片地址，多个用逗号分隔")
+    tag_list: str = Field(default="", description="话题标签，多个用逗号分隔")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    note_url: str = Field(..., description="笔记链接")
+    source_keyword: str = Field(default="", description="来源关键词")
+    xsec_token: Optional[str] = Field(default=None, description="xsec token")
+
+
+class XhsNoteComment(BaseModel):
+    """
+    小红书笔记评论
+    """
+    comment_id: str = Field(..., description="评论ID")
+    create_time: Optional[int] = Field(default=None, description="评论时间")
+    ip_location: Optional[str] = Field(default=None, description="IP地理位置")
+    note_id: str = Field(..., description="笔记ID")
+    content: Optional[str] = Field(default=None, description="评论内容")
+    user_id: Optional[str] = Field(default=None, description="用户ID")
+    nickname: Optional[str] = Field(default=None, description="用户昵称")
+    avatar: Optional[str] = Field(default=None, description="用户头像地址")
+    sub_comment_count: Union[int, str] = Field(default=0, description="子评论数")
+    pictures: str = Field(default="", description="评论图片地址，多个用逗号分隔")
+    parent_comment_id: Union[int, str] = Field(default=0, description="父评论ID")
+    last_modify_ts: int = Field(..., description="最后更新时间戳")
+    like_count: Union[int, str] = Field(default=0, description="点赞数")
+
+
+class XhsNoteRecord(SlotsRecord, model=XhsNote):
+    """
+    小红书笔记，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(XhsNote)
+
+
+class XhsNoteCommentRecord(SlotsRecord, model=XhsNoteComment):
+    """
+    小红书笔记评论，__slots__ 记录，存储层直接构造，不做校验
+    """
+    __slots__ = record_slots(XhsNoteComment)
@@ -14,6 +14,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from model.record import SlotsRecord, record_slots
+
 
 class ZhihuContent(BaseModel):
     """
@@ -61,6 +63,20 @@ class ZhihuComment(BaseModel):
     user_avatar: str = Field(default="", description="用户头像地址")
 
 
+class ZhihuContentRecord(SlotsRecord, model=ZhihuContent):
+    """
+    知乎内容，__slots__ 记录，提取器直接构造，不做校验
+    """
+    __slots__ = record_slots(ZhihuContent)
+
+
+class ZhihuCommentRecord(SlotsRecord, model=ZhihuComment):
+    """
+    知乎评论，__slots__ 记录，提取器直接构造，不做校验
+    """
+    __slots__ = record_slots(ZhihuComment)
+
+
 class ZhihuCreator(BaseModel):
     """
     知乎创作者
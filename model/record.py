@@ -0,0 +1,126 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 轻量的 __slots__ 数据记录，字段和默认值取自对应的 pydantic 模型
+#            构造时不做校验，用于解析器产出的可信数据；不可信的数据用 validate 走 pydantic 校验
+from typing import Any, Dict, FrozenSet, Iterator, Tuple, Type
+
+from pydantic import BaseModel
+
+
+def record_slots(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """
+    按 pydantic 模型的字段顺序生成 __slots__
+    :param model: pydantic 模型
+    :return:
+    """
+    return tuple(model.model_fields)
+
+
+class SlotsRecord:
+    """
+    __slots__ 数据记录基类，子类这样定义：
+
+        class TiebaCommentRecord(SlotsRecord, model=TiebaComment):
+            __slots__ = record_slots(TiebaComment)
+
+    实例没有 __dict__，占用内存远小于 dict 和 pydantic 模型；对外提供和 pydantic 一样的 model_dump，存储层不用区分
+    同时支持只读的 dict 接口（keys、values、items、get、下标），csv、词云等按 dict 读取字段的存储代码可以直接使用
+    """
+    __slots__ = ()
+
+    model: Type[BaseModel]
+    _fields: FrozenSet[str]
+    _defaults: Dict[str, Any]
+
+    def __init_subclass__(cls, model: Type[BaseModel], **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.__slots__ != record_slots(model):
+            raise TypeError(f"{cls.__name__}.__slots__ must be record_slots({model.__name__})")
+        cls.model = model
+        cls._fields = frozenset(cls.__slots__)
+        cls._defaults = {name: field.get_default(call_default_factory=True)
+                         for name, field in model.model_fields.items() if not field.is_required()}
+
+    def __init__(self, **kwargs: Any) -> None:
+        """
+        构造时不做任何校验，缺少必填字段或者有多余字段时抛出 TypeError
+        """
+        for name in self.__slots__:
+            if name in kwargs:
+                setattr(self, name, kwargs.pop(name))
+            elif name in self._defaults:
+                setattr(self, name, self._defaults[name])
+            else:
+                raise TypeError(f"{type(self).__name__} missing required field: {name}")
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} got unexpected fields: {', '.join(kwargs)}")
+
+    @classmethod
+    def validate(cls, **kwargs: Any) -> "SlotsRecord":
+        """
+        经过 pydantic 模型校验、类型转换后再创建记录，用于不可信的数据
+        :param kwargs:
+        :return:
+        """
+        return cls(**cls.model(**kwargs).model_dump())
+
+    def model_dump(self) -> Dict[str, Any]:
+        """
+        转换为 dict，字段顺序和 pydantic 模型一致
+        :return:
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self.__slots__, self.values())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return self.values()
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
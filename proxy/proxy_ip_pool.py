@@ -13,8 +13,15 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
+import asyncio
+import bisect
+import itertools
+import math
 import random
-from typing import Dict, List
+import statistics
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -22,78 +29,396 @@ from tenacity import retry, stop_after_attempt, wait_fixed
 import config
 from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy, new_ppool_proxy
 from tools import utils
+from tools.http_client import create_async_client
 
 from .base_proxy import ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
 
+class ProxyStats:
+    """
+    单个代理的健康统计：成功率、最近请求延迟的中位数、连续失败次数
+    """
+
+    def __init__(self) -> None:
+        self.success_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.latencies: Deque[float] = deque(maxlen=config.IP_PROXY_LATENCY_WINDOW)
+        # 延迟中位数在上报时计算并缓存，选择代理时不再重新排序
+        self.p50_latency: Optional[float] = None
+
+    @property
+    def success_rate(self) -> float:
+        # 加一平滑，新代理没有任何记录时成功率为 0.5
+        return (self.success_count + 1) / (self.success_count + self.failure_count + 2)
+
+    def record_success(self, latency: float) -> None:
+        self.success_count += 1
+        self.consecutive_failures = 0
+        self.latencies.append(latency)
+        self.p50_latency = statistics.median(self.latencies)
+
+    def record_failure(self) -> None:
+        self.failure_count += 1
+        self.consecutive_failures += 1
+
+
 class ProxyIpPool:
-    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider) -> None:
+    def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider,
+                 low_watermark: Optional[int] = None, valid_ip_url: str = "https://httpbin.org/ip") -> None:
         """
-
+        代理池中保存已经验证过的代理，按健康分加权选择，代理被封或连续失败后才移出池子；
+        可用代理低于 low_watermark 时在后台补充并并发验证
         Args:
-            ip_pool_count:
-            enable_validate_ip:
-            ip_provider:
+            ip_pool_count: 代理池补满时的代理数量
+            enable_validate_ip: 是否验证代理可用
+            ip_provider: 代理商
+            low_watermark: 低水位，默认 IP_PROXY_POOL_LOW_WATERMARK
+            valid_ip_url: 验证 IP 是否有效的地址
         """
-        self.valid_ip_url = "https://httpbin.org/ip"  # 验证 IP 是否有效的地址
+        self.valid_ip_url = valid_ip_url
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
-        self.proxy_list: List[IpInfoModel] = []
+        self.low_watermark = min(ip_pool_count, low_watermark or config.IP_PROXY_POOL_LOW_WATERMARK)
+        self.proxy_list: Deque[IpInfoModel] = deque()
         self.ip_provider: ProxyProvider = ip_provider
+        self._stats: Dict[str, ProxyStats] = {}
+        # 池子中的代理：key -> 代理、key -> 健康分，两者的顺序一致，健康分在上报、加入池子时更新
+        self._proxies: Dict[str, IpInfoModel] = {}
+        self._scores: Dict[str, float] = {}
+        # 选择用的代理列表和累积权重，健康分变化后置空，下次选择时重建
+        self._choices: Optional[Tuple[List[IpInfoModel], List[float]]] = None
+        # 池子中有延迟记录的代理的延迟中位数（有序），用于计算没有延迟记录的代理的默认延迟
+        self._sorted_latencies: List[float] = []
+        self._default_latency: float = config.IP_PROXY_DEFAULT_LATENCY
+        # 池子中最早有代理过期或进入过期预警的时间戳，到这个时间才需要检查过期
+        self._next_expire_check: float = math.inf
+        # 会话（账号）-> 代理的粘性绑定，同一个会话在代理可用期间一直使用同一个代理
+        self._sessions: Dict[str, str] = {}
+        # 被平台封禁过的代理，代理商再次返回时不再放入池子
+        self._blocked_keys: Set[str] = set()
+        self._refill_task: Optional[asyncio.Task] = None
+        # 每个代理都要新建客户端验证，共用一个 SSL 上下文，避免每次重新加载证书
+        self._ssl_context = None
+
+    @staticmethod
+    def get_proxy_key(proxy: IpInfoModel) -> str:
+        return f"{proxy.ip}:{proxy.port}"
+
+    def get_stats(self, proxy: IpInfoModel) -> ProxyStats:
+        """
+        获取代理的健康统计，不存在时创建
+        :param proxy:
+        :return:
+        """
+        proxy_key = self.get_proxy_key(proxy)
+        stats = self._stats.get(proxy_key)
+        if stats is None:
+            stats = self._stats[proxy_key] = ProxyStats()
+        return stats
 
     async def load_proxies(self) -> None:
         """
-        加载IP代理
+        加载IP代理，等待代理池补满
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxies(self.ip_pool_count)
+        await self._wait_refill()
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
-        验证代理IP是否有效
+        验证代理IP是否有效，验证请求的耗时作为代理的第一个延迟样本
         :param proxy:
         :return:
         """
         utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid ")
         try:
-            httpx_proxy = {
-                f"{proxy.protocol}": f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            }
-            async with httpx.AsyncClient(proxies=httpx_proxy) as client:
+            _, httpx_proxy = utils.format_proxy_info(proxy)
+            if self._ssl_context is None:
+                self._ssl_context = httpx.create_ssl_context()
+            async with create_async_client(proxies=httpx_proxy, verify=self._ssl_context,
+                                           timeout=config.IP_PROXY_VALIDATE_TIMEOUT) as client:
+                start = time.monotonic()
                 response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
+            if response.status_code != 200:
                 return False
+            self.get_stats(proxy).record_success(time.monotonic() - start)
+            return True
         except Exception as e:
             utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}")
-            raise e
+            return False
+
+    @staticmethod
+    def _is_expired(proxy: IpInfoModel, margin: float = 0) -> bool:
+        return bool(proxy.expired_time_ts) and proxy.expired_time_ts - margin <= utils.get_unix_timestamp()
+
+    def _score(self, proxy: IpInfoModel, default_latency: float) -> float:
+        """
+        代理的健康分：成功率越高、延迟中位数越低分数越高，快过期的代理分数降到很低
+        :param proxy:
+        :param default_latency: 还没有延迟记录的代理使用的延迟
+        :return:
+        """
+        stats = self.get_stats(proxy)
+        latency = stats.p50_latency
+        score = stats.success_rate / max(latency if latency is not None else default_latency, 0.01)
+        if self._is_expired(proxy, margin=config.IP_PROXY_EXPIRE_MARGIN):
+            score *= 0.01
+        return score
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def get_proxy(self) -> IpInfoModel:
+    async def get_proxy(self, session_key: Optional[str] = None) -> IpInfoModel:
         """
-        从代理池中随机提取一个代理IP
+        从代理池中按健康分加权选择一个代理IP，代理会留在池子中继续被其他请求使用
+        :param session_key: 会话（账号）标识，传入时同一个会话粘性地使用同一个代理
         :return:
         """
-        if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+        self._check_expired()
+        # 每次取代理时检查水位，低于水位就在后台补充，不等到池子取空
+        if len(self.proxy_list) < self.low_watermark:
+            self._start_refill()
+        if session_key is not None:
+            proxy = self._get_session_proxy(session_key)
+            if proxy is not None:
+                return proxy
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy) # 取出来一个IP就应该移出掉
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception("[ProxyIpPool.get_proxy] current ip invalid and again get it")
+        if not self.proxy_list:
+            # 池子被取空了只能等待这一轮补充完成
+            await self._wait_refill()
+            if not self.proxy_list:
+                raise Exception("[ProxyIpPool.get_proxy] no valid ip in the pool and again get it")
+
+        if self._choices is None:
+            self._choices = (list(self._proxies.values()), list(itertools.accumulate(self._scores.values())))
+        # 传入累积权重时 random.choices 只需要二分查找
+        population, cum_weights = self._choices
+        proxy = random.choices(population, cum_weights=cum_weights)[0]
+        if session_key is not None:
+            self._sessions[session_key] = self.get_proxy_key(proxy)
         return proxy
 
-    async def _reload_proxies(self):
+    def _get_session_proxy(self, session_key: str) -> Optional[IpInfoModel]:
+        proxy_key = self._sessions.get(session_key)
+        if proxy_key is None:
+            return None
+        proxy = self._proxies.get(proxy_key)
+        if proxy is None:
+            del self._sessions[session_key]
+        return proxy
+
+    def _add_proxy(self, proxy: IpInfoModel) -> None:
+        """
+        把代理加入池子，计算健康分
+        :param proxy:
+        :return:
+        """
+        proxy_key = self.get_proxy_key(proxy)
+        self.proxy_list.append(proxy)
+        self._proxies[proxy_key] = proxy
+        latency = self.get_stats(proxy).p50_latency
+        if latency is not None:
+            bisect.insort(self._sorted_latencies, latency)
+            self._update_default_latency()
+        self._update_score(proxy)
+        if proxy.expired_time_ts:
+            self._next_expire_check = min(self._next_expire_check,
+                                          proxy.expired_time_ts - config.IP_PROXY_EXPIRE_MARGIN)
+
+    def _update_score(self, proxy: IpInfoModel) -> None:
+        self._scores[self.get_proxy_key(proxy)] = self._score(proxy, self._default_latency)
+        self._choices = None
+
+    def _update_default_latency(self) -> None:
+        """
+        新代理按池子中已有代理的延迟中位数计算，避免一开始就被有记录的代理挤掉；
+        默认延迟变化时只需要重新计算没有延迟记录的代理的健康分
+        :return:
+        """
+        latencies = self._sorted_latencies
+        if latencies:
+            mid = len(latencies) // 2
+            default_latency = latencies[mid] if len(latencies) % 2 else (latencies[mid - 1] + latencies[mid]) / 2
+        else:
+            default_latency = config.IP_PROXY_DEFAULT_LATENCY
+        if default_latency == self._default_latency:
+            return
+        self._default_latency = default_latency
+        for proxy in self.proxy_list:
+            if self.get_stats(proxy).p50_latency is None:
+                self._update_score(proxy)
+
+    def _check_expired(self) -> None:
+        """
+        到了最早的过期检查时间才遍历池子：移除已过期的代理，重新计算进入过期预警的代理的健康分
+        :return:
+        """
+        now = utils.get_unix_timestamp()
+        if now < self._next_expire_check:
+            return
+        for proxy in [proxy for proxy in self.proxy_list if self._is_expired(proxy)]:
+            self._remove_proxy(proxy)
+        next_check = math.inf
+        for proxy in self.proxy_list:
+            if not proxy.expired_time_ts:
+                continue
+            self._update_score(proxy)
+            warn_ts = proxy.expired_time_ts - config.IP_PROXY_EXPIRE_MARGIN
+            next_check = min(next_check, warn_ts if warn_ts > now else proxy.expired_time_ts)
+        self._next_expire_check = next_check
+
+    def _remove_proxy(self, proxy: IpInfoModel) -> None:
+        """
+        把代理移出池子并解除绑定在该代理上的会话，池子低于水位时触发后台补充
+        :param proxy:
+        :return:
+        """
+        proxy_key = self.get_proxy_key(proxy)
+        if self._proxies.pop(proxy_key, None) is not None:
+            for item in list(self.proxy_list):
+                if self.get_proxy_key(item) == proxy_key:
+                    self.proxy_list.remove(item)
+            self._scores.pop(proxy_key, None)
+            self._choices = None
+            latency = self.get_stats(proxy).p50_latency
+            if latency is not None:
+                del self._sorted_latencies[bisect.bisect_left(self._sorted_latencies, latency)]
+                self._update_default_latency()
+        self._stats.pop(proxy_key, None)
+        for session_key in [key for key, value in self._sessions.items() if value == proxy_key]:
+            del self._sessions[session_key]
+        if len(self.proxy_list) < self.low_watermark:
+            self._start_refill()
+
+    def report_success(self, proxy: IpInfoModel, latency: float) -> None:
+        """
+        上报一次通过该代理成功的请求
+        :param proxy:
+        :param latency: 请求耗时，单位秒
+        :return:
+        """
+        stats = self.get_stats(proxy)
+        old_latency = stats.p50_latency
+        stats.record_success(latency)
+        if self.get_proxy_key(proxy) not in self._proxies:
+            return
+        if old_latency != stats.p50_latency:
+            if old_latency is not None:
+                del self._sorted_latencies[bisect.bisect_left(self._sorted_latencies, old_latency)]
+            bisect.insort(self._sorted_latencies, stats.p50_latency)
+            self._update_default_latency()
+        self._update_score(proxy)
+
+    def report_failure(self, proxy: IpInfoModel) -> None:
+        """
+        上报一次通过该代理失败的请求，连续失败次数过多时移出池子
+        :param proxy:
+        :return:
+        """
+        stats = self.get_stats(proxy)
+        stats.record_failure()
+        if stats.consecutive_failures >= config.IP_PROXY_MAX_CONSECUTIVE_FAILURES:
+            utils.logger.warning(
+                f"[ProxyIpPool.report_failure] proxy {proxy.ip} failed {stats.consecutive_failures} times, remove it"
+            )
+            self._remove_proxy(proxy)
+        elif self.get_proxy_key(proxy) in self._proxies:
+            self._update_score(proxy)
+
+    def mark_blocked(self, proxy: IpInfoModel) -> None:
+        """
+        代理被平台封禁，立即移出池子
+        :param proxy:
+        :return:
+        """
+        utils.logger.warning(f"[ProxyIpPool.mark_blocked] proxy {proxy.ip} is blocked, remove it")
+        self._blocked_keys.add(self.get_proxy_key(proxy))
+        self._remove_proxy(proxy)
+
+    async def rotate_proxy(self, session_key: str, blocked_proxy: Optional[IpInfoModel] = None) -> IpInfoModel:
+        """
+        会话当前的代理被封禁时换一个新的代理，不需要重启爬虫
+        :param session_key: 会话（账号）标识
+        :param blocked_proxy: 被封禁的代理
+        :return: 新绑定的代理
+        """
+        if blocked_proxy is not None:
+            self.mark_blocked(blocked_proxy)
+        self._sessions.pop(session_key, None)
+        return await self.get_proxy(session_key)
+
+    def _start_refill(self) -> asyncio.Task:
+        """
+        启动后台补充任务，同一时间只有一个补充任务在运行；补充失败时由回调记录日志，不需要调用方取结果
+        :return: 补充任务
+        """
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+            self._refill_task.add_done_callback(self._on_refill_done)
+        return self._refill_task
+
+    @staticmethod
+    def _on_refill_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            utils.logger.error(f"[ProxyIpPool._refill] refill proxy pool err: {task.exception()!r}")
+
+    async def _wait_refill(self) -> None:
+        """
+        启动后台补充任务（已有则复用）并等待补充完成
+        :return:
+        """
+        # shield 防止等待方被取消时连带取消补充任务
+        await asyncio.shield(self._start_refill())
+
+    async def _refill(self) -> None:
+        """
+        从代理商拉取代理，并发验证后放入代理池
+        :return:
+        """
+        lack_count = self.ip_pool_count - len(self.proxy_list)
+        if lack_count <= 0:
+            return
+        try:
+            new_proxies = await self.ip_provider.get_proxies(lack_count)
+        except Exception as e:
+            utils.logger.error(f"[ProxyIpPool._refill] get proxies from provider err: {e}")
+            return
+
+        exist_keys: Set[str] = {self.get_proxy_key(proxy) for proxy in self.proxy_list} | self._blocked_keys
+        candidates: List[IpInfoModel] = []
+        for proxy in new_proxies:
+            proxy_key = self.get_proxy_key(proxy)
+            if proxy_key not in exist_keys and not self._is_expired(proxy):
+                exist_keys.add(proxy_key)
+                candidates.append(proxy)
+
+        if self.enable_validate_ip:
+            semaphore = asyncio.Semaphore(config.IP_PROXY_VALIDATE_CONCURRENCY)
+
+            async def validate(proxy: IpInfoModel) -> None:
+                async with semaphore:
+                    if await self._is_valid_proxy(proxy):
+                        self._add_proxy(proxy)
+
+            await asyncio.gather(*[validate(proxy) for proxy in candidates])
+        else:
+            for proxy in candidates:
+                self._add_proxy(proxy)
+        utils.logger.info(
+            f"[ProxyIpPool._refill] got {len(candidates)} new proxies, pool size: {len(self.proxy_list)}"
+        )
+
+    async def close(self) -> None:
         """
-        # 重新加载代理池
+        停止后台补充任务
         :return:
         """
-        self.proxy_list = []
-        await self.load_proxies()
+        if self._refill_task is not None and not self._refill_task.done():
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
 
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
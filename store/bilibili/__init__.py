@@ -17,6 +17,7 @@
 from typing import List
 
 import config
+from model.m_bilibili import BilibiliVideoCommentRecord, BilibiliVideoContentRecord
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -27,7 +28,8 @@ class BiliStoreFactory:
     STORES = {
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
-        "json": BiliJsonStoreImplement
+        "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonlStoreImplement
     }
 
     @staticmethod
@@ -35,7 +37,7 @@ class BiliStoreFactory:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
@@ -44,28 +46,28 @@ async def update_bilibili_video(video_item: Dict):
     video_user_info: Dict = video_item_view.get("owner")
     video_item_stat: Dict = video_item_view.get("stat")
     video_id = str(video_item_view.get("aid"))
-    save_content_item = {
-        "video_id": video_id,
-        "video_type": "video",
-        "title": video_item_view.get("title", "")[:500],
-        "desc": video_item_view.get("desc", "")[:500],
-        "create_time": video_item_view.get("pubdate"),
-        "user_id": str(video_user_info.get("mid")),
-        "nickname": video_user_info.get("name"),
-        "avatar": video_user_info.get("face", ""),
-        "liked_count": str(video_item_stat.get("like", "")),
-        "disliked_count": str(video_item_stat.get("dislike", "")),
-        "video_play_count": str(video_item_stat.get("view", "")),
-        "video_favorite_count": str(video_item_stat.get("favorite", "")),
-        "video_share_count": str(video_item_stat.get("share", "")),
-        "video_coin_count": str(video_item_stat.get("coin", "")),
-        "video_danmaku": str(video_item_stat.get("danmaku", "")),
-        "video_comment": str(video_item_stat.get("reply", "")),
-        "last_modify_ts": utils.get_current_timestamp(),
-        "video_url": f"https://www.bilibili.com/video/av{video_id}",
-        "video_cover_url": video_item_view.get("pic", ""),
-        "source_keyword": source_keyword_var.get(),
-    }
+    save_content_item = BilibiliVideoContentRecord(
+        video_id=video_id,
+        video_type="video",
+        title=video_item_view.get("title", "")[:500],
+        desc=video_item_view.get("desc", "")[:500],
+        create_time=video_item_view.get("pubdate"),
+        user_id=str(video_user_info.get("mid")),
+        nickname=video_user_info.get("name"),
+        avatar=video_user_info.get("face", ""),
+        liked_count=str(video_item_stat.get("like", "")),
+        disliked_count=str(video_item_stat.get("dislike", "")),
+        video_play_count=str(video_item_stat.get("view", "")),
+        video_favorite_count=str(video_item_stat.get("favorite", "")),
+        video_share_count=str(video_item_stat.get("share", "")),
+        video_coin_count=str(video_item_stat.get("coin", "")),
+        video_danmaku=str(video_item_stat.get("danmaku", "")),
+        video_comment=str(video_item_stat.get("reply", "")),
+        last_modify_ts=utils.get_current_timestamp(),
+        video_url=f"https://www.bilibili.com/video/av{video_id}",
+        video_cover_url=video_item_view.get("pic", ""),
+        source_keyword=source_keyword_var.get(),
+    )
     utils.logger.info(
         f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
     await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
@@ -103,20 +105,20 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
     user_info: Dict = comment_item.get("member")
-    save_comment_item = {
-        "comment_id": comment_id,
-        "parent_comment_id": parent_comment_id,
-        "create_time": comment_item.get("ctime"),
-        "video_id": str(video_id),
-        "content": content.get("message"),
-        "user_id": user_info.get("mid"),
-        "nickname": user_info.get("uname"),
-        "sex": user_info.get("sex"),
-        "sign": user_info.get("sign"),
-        "avatar": user_info.get("avatar"),
-        "sub_comment_count": str(comment_item.get("rcount", 0)),
-        "last_modify_ts": utils.get_current_timestamp(),
-    }
+    save_comment_item = BilibiliVideoCommentRecord(
+        comment_id=comment_id,
+        parent_comment_id=parent_comment_id,
+        create_time=comment_item.get("ctime"),
+        video_id=str(video_id),
+        content=content.get("message"),
+        user_id=user_info.get("mid"),
+        nickname=user_info.get("uname"),
+        sex=user_info.get("sex"),
+        sign=user_info.get("sign"),
+        avatar=user_info.get("avatar"),
+        sub_comment_count=str(comment_item.get("rcount", 0)),
+        last_modify_ts=utils.get_current_timestamp(),
+    )
     utils.logger.info(
         f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
     await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
@@ -16,8 +16,8 @@
 
 from typing import Dict, List
 
-from db import AsyncMysqlDB
-from var import media_crawler_db_var
+from db import AsyncMysqlDB, AsyncMysqlWriteBehind
+from var import media_crawler_db_var, media_crawler_db_writer_var
 
 
 async def query_content_by_content_id(content_id: str) -> Dict:
@@ -158,3 +158,41 @@ async def update_creator_by_creator_id(creator_id: str, creator_item: Dict) -> i
     effect_row: int = await async_db_conn.update_table("bilibili_up_info", creator_item, "user_id", creator_id)
     return effect_row
 
+
+async def add_or_update_content(content_item: Dict):
+    """
+    新增或更新一条内容记录，放入后台批量写入队列，按 video_id 唯一索引 upsert
+    Args:
+        content_item:
+
+    Returns:
+
+    """
+    db_writer: AsyncMysqlWriteBehind = media_crawler_db_writer_var.get()
+    await db_writer.put("bilibili_video", "video_id", content_item)
+
+
+async def add_or_update_comment(comment_item: Dict):
+    """
+    新增或更新一条评论记录，放入后台批量写入队列，按 comment_id 唯一索引 upsert
+    Args:
+        comment_item:
+
+    Returns:
+
+    """
+    db_writer: AsyncMysqlWriteBehind = media_crawler_db_writer_var.get()
+    await db_writer.put("bilibili_video_comment", "comment_id", comment_item)
+
+
+async def add_or_update_creator(creator_item: Dict):
+    """
+    新增或更新一条创作者信息，放入后台批量写入队列，按 user_id 唯一索引 upsert
+    Args:
+        creator_item:
+
+    Returns:
+
+    """
+    db_writer: AsyncMysqlWriteBehind = media_crawler_db_writer_var.get()
+    await db_writer.put("bilibili_up_info", "user_id", creator_item)
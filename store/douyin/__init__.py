@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from model.m_douyin import DouyinAwemeCommentRecord, DouyinAwemeRecord
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -26,6 +27,7 @@ class DouyinStoreFactory:
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonlStoreImplement,
     }
 
     @staticmethod
@@ -33,7 +35,7 @@ class DouyinStoreFactory:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ..."
             )
         return store_class()
 
@@ -66,28 +68,28 @@ async def update_douyin_aweme(aweme_item: Dict):
     aweme_id = aweme_item.get("aweme_id")
     user_info = aweme_item.get("author", {})
     interact_info = aweme_item.get("statistics", {})
-    save_content_item = {
-        "aweme_id": aweme_id,
-        "aweme_type": str(aweme_item.get("aweme_type")),
-        "title": aweme_item.get("desc", ""),
-        "desc": aweme_item.get("desc", ""),
-        "create_time": aweme_item.get("create_time"),
-        "user_id": user_info.get("uid"),
-        "sec_uid": user_info.get("sec_uid"),
-        "short_user_id": user_info.get("short_id"),
-        "user_unique_id": user_info.get("unique_id"),
-        "user_signature": user_info.get("signature"),
-        "nickname": user_info.get("nickname"),
-        "avatar": user_info.get("avatar_thumb", {}).get("url_list", [""])[0],
-        "liked_count": str(interact_info.get("digg_count")),
-        "collected_count": str(interact_info.get("collect_count")),
-        "comment_count": str(interact_info.get("comment_count")),
-        "share_count": str(interact_info.get("share_count")),
-        "ip_location": aweme_item.get("ip_label", ""),
-        "last_modify_ts": utils.get_current_timestamp(),
-        "aweme_url": f"https://www.douyin.com/video/{aweme_id}",
-        "source_keyword": source_keyword_var.get(),
-    }
+    save_content_item = DouyinAwemeRecord(
+        aweme_id=aweme_id,
+        aweme_type=str(aweme_item.get("aweme_type")),
+        title=aweme_item.get("desc", ""),
+        desc=aweme_item.get("desc", ""),
+        create_time=aweme_item.get("create_time"),
+        user_id=user_info.get("uid"),
+        sec_uid=user_info.get("sec_uid"),
+        short_user_id=user_info.get("short_id"),
+        user_unique_id=user_info.get("unique_id"),
+        user_signature=user_info.get("signature"),
+        nickname=user_info.get("nickname"),
+        avatar=user_info.get("avatar_thumb", {}).get("url_list", [""])[0],
+        liked_count=str(interact_info.get("digg_count")),
+        collected_count=str(interact_info.get("collect_count")),
+        comment_count=str(interact_info.get("comment_count")),
+        share_count=str(interact_info.get("share_count")),
+        ip_location=aweme_item.get("ip_label", ""),
+        last_modify_ts=utils.get_current_timestamp(),
+        aweme_url=f"https://www.douyin.com/video/{aweme_id}",
+        source_keyword=source_keyword_var.get(),
+    )
     utils.logger.info(
         f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}"
     )
@@ -120,27 +122,27 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         or user_info.get("avatar_thumb", {})
         or {}
     )
-    save_comment_item = {
-        "comment_id": comment_id,
-        "create_time": comment_item.get("create_time"),
-        "ip_location": comment_item.get("ip_label", ""),
-        "aweme_id": aweme_id,
-        "content": comment_item.get("text"),
-        "user_id": user_info.get("uid"),
-        "sec_uid": user_info.get("sec_uid"),
-        "short_user_id": user_info.get("short_id"),
-        "user_unique_id": user_info.get("unique_id"),
-        "user_signature": user_info.get("signature"),
-        "nickname": user_info.get("nickname"),
-        "avatar": avatar_info.get("url_list", [""])[0],
-        "sub_comment_count": str(comment_item.get("reply_comment_total", 0)),
-        "like_count": (
+    save_comment_item = DouyinAwemeCommentRecord(
+        comment_id=comment_id,
+        create_time=comment_item.get("create_time"),
+        ip_location=comment_item.get("ip_label", ""),
+        aweme_id=aweme_id,
+        content=comment_item.get("text"),
+        user_id=user_info.get("uid"),
+        sec_uid=user_info.get("sec_uid"),
+        short_user_id=user_info.get("short_id"),
+        user_unique_id=user_info.get("unique_id"),
+        user_signature=user_info.get("signature"),
+        nickname=user_info.get("nickname"),
+        avatar=avatar_info.get("url_list", [""])[0],
+        sub_comment_count=str(comment_item.get("reply_comment_total", 0)),
+        like_count=(
             comment_item.get("digg_count") if comment_item.get("digg_count") else 0
         ),
-        "last_modify_ts": utils.get_current_timestamp(),
-        "parent_comment_id": parent_comment_id,
-        "pictures": ",".join(_extract_comment_image_list(comment_item)),
-    }
+        last_modify_ts=utils.get_current_timestamp(),
+        parent_comment_id=parent_comment_id,
+        pictures=",".join(_extract_comment_image_list(comment_item)),
+    )
     utils.logger.info(
         f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}"
     )
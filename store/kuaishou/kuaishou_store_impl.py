@@ -15,7 +15,6 @@
 # @Desc    : 快手存储实现类
 import asyncio
 import csv
-import json
 import os
 import pathlib
 from typing import Dict
@@ -24,7 +23,8 @@ import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
-from tools import utils, words
+from tools import json_codec, utils, words
+from tools.jsonl_writer import jsonl_writer
 from var import crawler_type_var
 
 
@@ -116,16 +116,10 @@ class KuaishouDbStoreImplement(AbstractStore):
 
         """
 
-        from .kuaishou_store_sql import (add_new_content,
-                                         query_content_by_content_id,
-                                         update_content_by_content_id)
-        video_id = content_item.get("video_id")
-        video_detail: Dict = await query_content_by_content_id(content_id=video_id)
-        if not video_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(video_id, content_item=content_item)
+        from .kuaishou_store_sql import add_or_update_content
+        # 内容、评论是只读的 __slots__ 记录，复制成 dict 再补上 add_ts，评论同理
+        content_item = dict(content_item, add_ts=utils.get_current_timestamp())
+        await add_or_update_content(content_item)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -136,16 +130,9 @@ class KuaishouDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .kuaishou_store_sql import (add_new_comment,
-                                         query_comment_by_comment_id,
-                                         update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        from .kuaishou_store_sql import add_or_update_comment
+        comment_item = dict(comment_item, add_ts=utils.get_current_timestamp())
+        await add_or_update_comment(comment_item)
 
 
 class KuaishouJsonStoreImplement(AbstractStore):
@@ -153,7 +140,7 @@ class KuaishouJsonStoreImplement(AbstractStore):
     words_store_path: str = "data/kuaishou/words"
     lock = asyncio.Lock()
     file_count:int=calculate_number_of_files(json_store_path)
-    WordCloud = words.AsyncWordCloudGenerator()
+    WordCloud = words.word_cloud_generator
 
 
 
@@ -190,17 +177,14 @@ class KuaishouJsonStoreImplement(AbstractStore):
         async with self.lock:
             if os.path.exists(save_file_name):
                 async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
-                    save_data = json.loads(await file.read())
+                    save_data = json_codec.loads(await file.read())
 
             save_data.append(save_item)
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
-                await file.write(json.dumps(save_data, ensure_ascii=False))
+                await file.write(json_codec.dumps(save_data))
 
             if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+                self.WordCloud.add_items([save_item], words_file_name_prefix)
 
     async def store_content(self, content_item: Dict):
         """
@@ -233,4 +217,71 @@ class KuaishouJsonStoreImplement(AbstractStore):
         Returns:
 
         """
-        await self.save_data_to_json(creator, "creator")
\ No newline at end of file
+        await self.save_data_to_json(creator, "creator")
+
+
+class KuaishouJsonlStoreImplement(AbstractStore):
+    jsonl_store_path: str = "data/kuaishou/jsonl"
+    words_store_path: str = "data/kuaishou/words"
+    file_count: int = calculate_number_of_files(jsonl_store_path)
+    WordCloud = words.word_cloud_generator
+
+    def make_save_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: data/kuaishou/jsonl/1_search_comments_20240114.jsonl ...
+
+        """
+        return f"{self.jsonl_store_path}/{self.file_count}_{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.jsonl"
+
+    async def save_data_to_jsonl(self, save_item: Dict, store_type: str):
+        """
+        追加一行到 jsonl 文件，由共享的写入器缓冲批量落盘
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        save_file_name = self.make_save_file_name(store_type=store_type)
+        await jsonl_writer.write(save_file_name, save_item)
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            words_file_name_prefix = f"{self.words_store_path}/{pathlib.Path(save_file_name).stem}"
+            self.WordCloud.add_items([save_item], words_file_name_prefix)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSONL storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(creator, "creator")
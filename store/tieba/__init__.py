@@ -12,7 +12,7 @@
 # -*- coding: utf-8 -*-
 from typing import List
 
-from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from model.m_baidu_tieba import TiebaCommentRecord, TiebaCreator, TiebaNoteRecord
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -23,7 +23,8 @@ class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonlStoreImplement
     }
 
     @staticmethod
@@ -31,11 +32,11 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
 
-async def batch_update_tieba_notes(note_list: List[TiebaNote]):
+async def batch_update_tieba_notes(note_list: List[TiebaNoteRecord]):
     """
     Batch update tieba notes
     Args:
@@ -50,7 +51,7 @@ async def batch_update_tieba_notes(note_list: List[TiebaNote]):
         await update_tieba_note(note_item)
 
 
-async def update_tieba_note(note_item: TiebaNote):
+async def update_tieba_note(note_item: TiebaNoteRecord):
     """
     Add or Update tieba note
     Args:
@@ -67,7 +68,7 @@ async def update_tieba_note(note_item: TiebaNote):
     await TieBaStoreFactory.create_store().store_content(save_note_item)
 
 
-async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
+async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCommentRecord]):
     """
     Batch update tieba note comments
     Args:
@@ -83,7 +84,7 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
         await update_tieba_note_comment(note_id, comment_item)
 
 
-async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
+async def update_tieba_note_comment(note_id: str, comment_item: TiebaCommentRecord):
     """
     Update tieba note comment
     Args:
@@ -15,7 +15,6 @@
 # @Desc    : 小红书存储实现类
 import asyncio
 import csv
-import json
 import os
 import pathlib
 from typing import Dict
@@ -24,7 +23,8 @@ import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
-from tools import utils, words
+from tools import json_codec, utils, words
+from tools.jsonl_writer import jsonl_writer
 from var import crawler_type_var
 
 
@@ -121,16 +121,10 @@ class XhsDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .xhs_store_sql import (add_new_content,
-                                    query_content_by_content_id,
-                                    update_content_by_content_id)
-        note_id = content_item.get("note_id")
-        note_detail: Dict = await query_content_by_content_id(content_id=note_id)
-        if not note_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(note_id, content_item=content_item)
+        from .xhs_store_sql import add_or_update_content
+        # 内容、评论是只读的 __slots__ 记录，复制成 dict 再补上 add_ts，评论同理
+        content_item = dict(content_item, add_ts=utils.get_current_timestamp())
+        await add_or_update_content(content_item)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -141,16 +135,9 @@ class XhsDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .xhs_store_sql import (add_new_comment,
-                                    query_comment_by_comment_id,
-                                    update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        from .xhs_store_sql import add_or_update_comment
+        comment_item = dict(comment_item, add_ts=utils.get_current_timestamp())
+        await add_or_update_comment(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -161,15 +148,9 @@ class XhsDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .xhs_store_sql import (add_new_creator, query_creator_by_user_id,
-                                    update_creator_by_user_id)
-        user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
-            creator["add_ts"] = utils.get_current_timestamp()
-            await add_new_creator(creator)
-        else:
-            await update_creator_by_user_id(user_id, creator)
+        from .xhs_store_sql import add_or_update_creator
+        creator["add_ts"] = utils.get_current_timestamp()
+        await add_or_update_creator(creator)
 
 
 class XhsJsonStoreImplement(AbstractStore):
@@ -177,7 +158,9 @@ class XhsJsonStoreImplement(AbstractStore):
     words_store_path: str = "data/xhs/words"
     lock = asyncio.Lock()
     file_count:int=calculate_number_of_files(json_store_path)
-    WordCloud = words.AsyncWordCloudGenerator()
+    WordCloud = words.word_cloud_generator
+    # 同一次运行的数据追加到同一个文件，词频也按同一个文件累加
+    run_timestamp: int = utils.get_current_timestamp()
 
     def make_save_file_name(self, store_type: str) -> (str,str):
         """
@@ -188,8 +171,7 @@ class XhsJsonStoreImplement(AbstractStore):
         Returns:
             Tuple of (json file path, word cloud file prefix)
         """
-        # 获取当前时间戳
-        timestamp = utils.get_current_timestamp()
+        timestamp = self.run_timestamp
         # 获取搜索关键词，将逗号替换为下划线
         keywords = config.KEYWORDS.replace(',', '_').replace(' ', '_')
         # 创建基于关键词的目录
@@ -224,17 +206,14 @@ class XhsJsonStoreImplement(AbstractStore):
         async with self.lock:
             if os.path.exists(save_file_name):
                 async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
-                    save_data = json.loads(await file.read())
+                    save_data = json_codec.loads(await file.read())
 
             save_data.append(save_item)
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
-                await file.write(json.dumps(save_data, ensure_ascii=False, indent=4))
+                await file.write(json_codec.dumps(save_data, indent=4))
 
             if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+                self.WordCloud.add_items([save_item], words_file_name_prefix)
     async def store_content(self, content_item: Dict):
         """
         content JSON storage implementation
@@ -267,3 +246,73 @@ class XhsJsonStoreImplement(AbstractStore):
 
         """
         await self.save_data_to_json(creator, "creator")
+
+
+class XhsJsonlStoreImplement(AbstractStore):
+    jsonl_store_path: str = "data/xhs/jsonl"
+    words_store_path: str = "data/xhs/words"
+    # 同一次运行的数据追加到同一个文件
+    run_timestamp: int = utils.get_current_timestamp()
+    WordCloud = words.word_cloud_generator
+
+    def make_save_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type and keywords
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: data/xhs/jsonl/关键词/search_comments_1705221600000.jsonl ...
+
+        """
+        keywords = config.KEYWORDS.replace(',', '_').replace(' ', '_')
+        return f"{self.jsonl_store_path}/{keywords}/{crawler_type_var.get()}_{store_type}_{self.run_timestamp}.jsonl"
+
+    async def save_data_to_jsonl(self, save_item: Dict, store_type: str):
+        """
+        追加一行到 jsonl 文件，由共享的写入器缓冲批量落盘
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        save_file_name = self.make_save_file_name(store_type=store_type)
+        await jsonl_writer.write(save_file_name, save_item)
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            keywords = config.KEYWORDS.replace(',', '_').replace(' ', '_')
+            words_file_name_prefix = f"{self.words_store_path}/{keywords}/{pathlib.Path(save_file_name).stem}"
+            self.WordCloud.add_items([save_item], words_file_name_prefix)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        Xiaohongshu creator JSONL storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(creator, "creator")
@@ -14,9 +14,10 @@ from typing import List
 
 import config
 from base.base_crawler import AbstractStore
-from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from model.m_zhihu import ZhihuCommentRecord, ZhihuContentRecord, ZhihuCreator
 from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
+                                          ZhihuJsonlStoreImplement,
                                           ZhihuJsonStoreImplement)
 from tools import utils
 from var import source_keyword_var
@@ -26,17 +27,18 @@ class ZhihuStoreFactory:
     STORES = {
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
-        "json": ZhihuJsonStoreImplement
+        "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonlStoreImplement
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
         return store_class()
 
-async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
+async def batch_update_zhihu_contents(contents: List[ZhihuContentRecord]):
     """
     批量更新知乎内容
     Args:
@@ -51,7 +53,7 @@ async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     for content_item in contents:
         await update_zhihu_content(content_item)
 
-async def update_zhihu_content(content_item: ZhihuContent):
+async def update_zhihu_content(content_item: ZhihuContentRecord):
     """
     更新知乎内容
     Args:
@@ -68,7 +70,7 @@ async def update_zhihu_content(content_item: ZhihuContent):
 
 
 
-async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
+async def batch_update_zhihu_note_comments(comments: List[ZhihuCommentRecord]):
     """
     批量更新知乎内容评论
     Args:
@@ -84,7 +86,7 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
         await update_zhihu_content_comment(comment_item)
 
 
-async def update_zhihu_content_comment(comment_item: ZhihuComment):
+async def update_zhihu_content_comment(comment_item: ZhihuCommentRecord):
     """
     更新知乎内容评论
     Args:
@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 累积全部评论再返回的 get_note_all_comments 与逐页 yield 的 iter_note_all_comments，爬取一篇笔记时的内存峰值对比
+#            运行方式: python -m test.benchmark_comment_iterators
+import asyncio
+import tracemalloc
+
+from media_platform.xhs.client import XiaoHongShuClient
+
+PAGE_SIZE = 20
+PAGE_NUMS = (50, 500, 2000)
+
+
+class PagedXhsClient(XiaoHongShuClient):
+    """
+    每次请求返回一页新生成的一级评论，不包含二级评论
+    """
+
+    def __init__(self, page_num: int):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.page_num = page_num
+
+    async def get_note_comments(self, note_id, xsec_token, cursor=""):
+        page = int(cursor or 0)
+        comments = [{"id": f"{page}-{i}", "note_id": note_id, "content": "评论内容" * 20, "sub_comments": [],
+                     "user_info": {"user_id": f"user_{i}", "nickname": "昵称", "image": "https://example.com/a.jpg"}}
+                    for i in range(PAGE_SIZE)]
+        return {"comments": comments, "has_more": page + 1 < self.page_num, "cursor": str(page + 1)}
+
+
+async def store_comments(note_id, comments):
+    """存储层替身，处理完即丢弃"""
+
+
+async def legacy(client: PagedXhsClient):
+    await client.get_note_all_comments("n1", "token", crawl_interval=0, callback=store_comments,
+                                       max_count=client.page_num * PAGE_SIZE)
+
+
+async def streaming(client: PagedXhsClient):
+    async for comments in client.iter_note_all_comments("n1", "token", crawl_interval=0,
+                                                        max_count=client.page_num * PAGE_SIZE):
+        await store_comments("n1", comments)
+
+
+def peak_memory(crawl, page_num: int) -> float:
+    client = PagedXhsClient(page_num)
+    tracemalloc.start()
+    asyncio.run(crawl(client))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    print(f"peak memory (MB) while crawling one note, {PAGE_SIZE} comments per page")
+    print(f"{'comments':>10}{'get_note_all_comments':>24}{'iter_note_all_comments':>25}")
+    for page_num in PAGE_NUMS:
+        print(f"{page_num * PAGE_SIZE:>10}{peak_memory(legacy, page_num):>24.2f}"
+              f"{peak_memory(streaming, page_num):>25.2f}")
+
+
+if __name__ == '__main__':
+    main()
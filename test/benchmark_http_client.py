@@ -0,0 +1,58 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 每次请求新建 httpx.AsyncClient 与共享长连接池的请求耗时对比
+#            运行方式: python -m test.benchmark_http_client
+import asyncio
+import time
+
+import httpx
+
+from test.local_http_server import LocalHttpServer
+from tools.http_client import AsyncHttpClientPool
+
+REQUEST_COUNT = 500
+
+
+async def bench_new_client_per_request(url: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUEST_COUNT):
+        async with httpx.AsyncClient() as client:
+            await client.request("GET", url, timeout=10)
+    return time.perf_counter() - start
+
+
+async def bench_pooled_client(url: str) -> float:
+    pool = AsyncHttpClientPool()
+    start = time.perf_counter()
+    for _ in range(REQUEST_COUNT):
+        await pool.get_client().request("GET", url, timeout=10)
+    cost = time.perf_counter() - start
+    await pool.aclose()
+    return cost
+
+
+async def main():
+    async with LocalHttpServer() as server:
+        url = f"{server.base_url}/api/ping"
+        before = await bench_new_client_per_request(url)
+        before_conn = server.connection_count
+        server.connection_count = 0
+        after = await bench_pooled_client(url)
+        print(f"requests: {REQUEST_COUNT}")
+        print(f"new client per request: {before * 1000 / REQUEST_COUNT:.3f} ms/req, tcp connections: {before_conn}")
+        print(f"shared pooled client:   {after * 1000 / REQUEST_COUNT:.3f} ms/req, tcp connections: {server.connection_count}")
+        print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : execjs 逐次调用与常驻 node 签名进程池的签名吞吐对比
+#            运行方式: python -m test.benchmark_js_signer
+import asyncio
+import time
+
+import execjs
+
+from tools.js_signer import JsSignWorkerPool
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+DOUYIN_PARAMS = "device_platform=webapp&aid=6383&channel=channel_pc_web&aweme_id=7381345880318774564&cursor=0&count=20"
+ZHIHU_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+ZHIHU_COOKIES = "d_c0=AHDTnZ0XEhmPTqyTm2mXNPpRZ1XVqXfYSAY=|1723014488"
+
+CASES = [
+    ("douyin a_bogus", "libs/douyin.js", "sign_datail", (DOUYIN_PARAMS, USER_AGENT)),
+    ("zhihu x-zse-96", "libs/zhihu.js", "get_sign", (ZHIHU_URL, ZHIHU_COOKIES)),
+]
+EXECJS_CALLS = 30
+POOL_CALLS = 3000
+
+
+def bench_execjs(js_path: str, func_name: str, args: tuple) -> float:
+    with open(js_path, encoding="utf-8-sig") as f:
+        ctx = execjs.compile(f.read())
+    start = time.perf_counter()
+    for _ in range(EXECJS_CALLS):
+        ctx.call(func_name, *args)
+    return EXECJS_CALLS / (time.perf_counter() - start)
+
+
+async def bench_pool(js_path: str, func_name: str, args: tuple) -> float:
+    pool = JsSignWorkerPool(js_path)
+    await pool.call(func_name, *args)
+    start = time.perf_counter()
+    await asyncio.gather(*[pool.call(func_name, *args) for _ in range(POOL_CALLS)])
+    cost = time.perf_counter() - start
+    await pool.close()
+    return POOL_CALLS / cost
+
+
+async def main():
+    for name, js_path, func_name, args in CASES:
+        before = bench_execjs(js_path, func_name, args)
+        after = await bench_pool(js_path, func_name, args)
+        print(f"{name}: execjs {before:.1f} sign/s ({1000 / before:.2f} ms/sign), "
+              f"worker pool {after:.1f} sign/s ({1000 / after:.3f} ms/sign), speedup {after / before:.1f}x")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
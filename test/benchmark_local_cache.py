@@ -0,0 +1,94 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 旧版全量扫描的本地缓存与最小堆索引的 ExpiringLocalCache 在 100 万个键下的耗时对比
+#            运行方式: python -m test.benchmark_local_cache
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from cache.local_cache import ExpiringLocalCache
+
+KEY_COUNT = 1_000_000
+# 每次定时清理时过期的键的比例
+EXPIRED_RATIO = 0.01
+
+
+class LegacyLocalCache:
+    """
+    旧版实现：定时清理扫描所有键，keys 为子串匹配
+    旧版 _clear 在遍历字典时删除元素，遇到过期键会抛出 RuntimeError，这里先拷贝一份再删除
+    """
+
+    def __init__(self) -> None:
+        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+
+    def get(self, key: str):
+        value, expire_time = self._cache_container.get(key, (None, 0))
+        if value is None:
+            return None
+        if expire_time < time.time():
+            del self._cache_container[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        self._cache_container[key] = (value, time.time() + expire_time)
+
+    def keys(self, pattern: str) -> List[str]:
+        if '*' in pattern:
+            pattern = pattern.replace('*', '')
+        return [key for key in self._cache_container.keys() if pattern in key]
+
+    def _clear(self):
+        for key, (value, expire_time) in list(self._cache_container.items()):
+            if expire_time < time.time():
+                del self._cache_container[key]
+
+
+def timeit(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench(cache) -> Dict[str, float]:
+    expired_every = int(1 / EXPIRED_RATIO)
+    keys = [f"ppool_{i}" for i in range(KEY_COUNT)]
+    result = {
+        "set": timeit(lambda: [cache.set(key, 1, -1 if i % expired_every == 0 else 600) for i, key in enumerate(keys)]),
+        "get": timeit(lambda: [cache.get(key) for key in keys[1::2]]),
+        "clear": timeit(cache._clear),
+        # 过期键清理完之后的下一次定时清理
+        "clear (nothing expired)": timeit(cache._clear),
+        "keys": timeit(lambda: cache.keys("ppool_99999*")),
+    }
+    return result
+
+
+async def main():
+    legacy = bench(LegacyLocalCache())
+    cache = ExpiringLocalCache(cron_interval=3600)
+    current = bench(cache)
+    print(f"keys: {KEY_COUNT}, expired ratio: {EXPIRED_RATIO}")
+    print(f"{'operation':<26}{'legacy (s)':>12}{'heap (s)':>12}")
+    for name in legacy:
+        print(f"{name:<26}{legacy[name]:>12.3f}{current[name]:>12.3f}")
+    print(f"stats: {cache.get_stats()}")
+
+    lru_cache = ExpiringLocalCache(cron_interval=3600, max_entries=100_000)
+    cost = timeit(lambda: [lru_cache.set(f"ppool_{i}", 1, 600) for i in range(KEY_COUNT)])
+    print(f"lru bound 100000, set {KEY_COUNT} keys: {cost:.3f}s, stats: {lru_cache.get_stats()}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
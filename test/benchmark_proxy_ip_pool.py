@@ -0,0 +1,108 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 旧版取出时同步验证的代理池与后台补充的代理池，取代理的耗时对比
+#            运行方式: python -m test.benchmark_proxy_ip_pool
+import asyncio
+import random
+import time
+from typing import List
+
+import httpx
+
+from proxy.base_proxy import ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.types import IpInfoModel
+from test.local_http_server import LocalHttpServer
+
+PROXY_SERVER_NUM = 10
+GET_PROXY_NUM = 50
+# 模拟验证请求经过代理的耗时
+VALIDATE_DELAY = 0.05
+# 模拟爬虫拿到代理后使用的耗时，后台补充在这段时间内完成
+CRAWL_DELAY = 0.02
+
+
+class CycleProxyProvider(ProxyProvider):
+    """
+    本地代理商替身，循环返回本地代理服务
+    """
+
+    def __init__(self, ports: List[int]):
+        self.ports = ports
+        self.index = 0
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        result = []
+        for _ in range(num):
+            port = self.ports[self.index % len(self.ports)]
+            self.index += 1
+            result.append(IpInfoModel(ip="127.0.0.1", port=port, user="user", password="pwd", protocol="http://",
+                                      expired_time_ts=None))
+        return result
+
+
+class LegacyProxyIpPool:
+    """
+    旧版实现：取出时随机选择并用新建的 httpx 客户端同步验证，取空后才重新加载
+    """
+
+    def __init__(self, ip_pool_count: int, ip_provider: ProxyProvider, valid_ip_url: str):
+        self.ip_pool_count = ip_pool_count
+        self.ip_provider = ip_provider
+        self.valid_ip_url = valid_ip_url
+        self.proxy_list: List[IpInfoModel] = []
+
+    async def get_proxy(self) -> IpInfoModel:
+        if not self.proxy_list:
+            self.proxy_list = await self.ip_provider.get_proxies(self.ip_pool_count)
+        proxy = random.choice(self.proxy_list)
+        self.proxy_list.remove(proxy)
+        httpx_proxy = {proxy.protocol: f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"}
+        async with httpx.AsyncClient(proxies=httpx_proxy) as client:
+            response = await client.get(self.valid_ip_url)
+        assert response.status_code == 200
+        return proxy
+
+
+async def bench(pool) -> float:
+    start = time.perf_counter()
+    for _ in range(GET_PROXY_NUM):
+        await pool.get_proxy()
+        await asyncio.sleep(CRAWL_DELAY)
+    return time.perf_counter() - start
+
+
+async def main():
+    servers = [await LocalHttpServer(delay=VALIDATE_DELAY).start() for _ in range(PROXY_SERVER_NUM)]
+    ports = [server.port for server in servers]
+    valid_ip_url = f"{servers[0].base_url}/ip"
+
+    legacy = await bench(LegacyProxyIpPool(PROXY_SERVER_NUM, CycleProxyProvider(ports), valid_ip_url))
+
+    pool = ProxyIpPool(PROXY_SERVER_NUM, True, CycleProxyProvider(ports), low_watermark=PROXY_SERVER_NUM // 2,
+                       valid_ip_url=valid_ip_url)
+    await pool.load_proxies()
+    current = await bench(pool)
+    await pool.close()
+
+    for server in servers:
+        await server.stop()
+    crawl_cost = GET_PROXY_NUM * CRAWL_DELAY
+    print(f"get {GET_PROXY_NUM} proxies, validate delay {VALIDATE_DELAY}s, crawl delay {CRAWL_DELAY}s per proxy")
+    print(f"{'pool':<24}{'total (s)':>12}{'wait per proxy (ms)':>22}")
+    for name, cost in (("legacy inline validate", legacy), ("background refill", current)):
+        print(f"{name:<24}{cost:>12.3f}{(cost - crawl_cost) / GET_PROXY_NUM * 1000:>22.2f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 评论数据用 dict、pydantic 模型、__slots__ 记录保存时的构造耗时、内存占用和编码成 jsonl 行的耗时对比
+#            小红书按存储层的实际路径，从接口返回的评论构造，dict 是原来 update_xhs_note_comment 里的写法
+#            运行方式: python -m test.benchmark_records
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from model.m_baidu_tieba import TiebaComment, TiebaCommentRecord
+from model.m_xiaohongshu import XhsNoteComment, XhsNoteCommentRecord
+from model.m_zhihu import ZhihuComment, ZhihuCommentRecord
+from tools import json_codec
+
+ROW_NUM = 100_000
+
+
+def make_tieba_rows() -> List[Dict]:
+    return [dict(comment_id=str(150726504693 + i), content=f"评论内容{i}", user_link=f"/home/main?id=tb.1.{i}",
+                 user_nickname=f"用户{i}", user_avatar=f"https://gss0.bdstatic.com/{i}.jpg",
+                 publish_time="2024-07-27 20:00", ip_location="广东", sub_comment_count=i % 7,
+                 note_id="9117888152", note_url="https://tieba.baidu.com/p/9117888152", tieba_id="27546680",
+                 tieba_name="盗墓笔记", tieba_link="https://tieba.baidu.com/f?kw=盗墓笔记")
+            for i in range(ROW_NUM)]
+
+
+def make_zhihu_rows() -> List[Dict]:
+    return [dict(comment_id=str(10000000000 + i), content=f"评论内容{i}", publish_time=1700000000 + i,
+                 ip_location="北京", sub_comment_count=i % 5, like_count=i % 100, content_id="123456789",
+                 content_type="answer", user_id=f"{i:032x}", user_link=f"https://www.zhihu.com/people/u{i}",
+                 user_nickname=f"用户{i}", user_avatar=f"https://pic1.zhimg.com/{i}.jpg")
+            for i in range(ROW_NUM)]
+
+
+def make_xhs_api_comments() -> List[Dict]:
+    return [{"id": f"{0x66fad51c000000001b0224b8 + i:x}", "note_id": "66fad51c000000001b0224b8",
+             "content": f"评论内容{i}", "create_time": 1727700000000 + i, "ip_location": "上海", "like_count": str(i % 100),
+             "liked": False, "sub_comment_count": str(i % 3), "status": 0, "show_tags": [], "at_users": [],
+             "user_info": {"user_id": f"{i:024x}", "nickname": f"用户{i}", "image": f"https://sns-avatar.xhscdn.com/{i}.jpg",
+                           "xsec_token": "ABtoken"},
+             "pictures": [], "target_comment": {"id": "66fad5c7000000001a02a9c1"} if i % 4 else {}}
+            for i in range(ROW_NUM)]
+
+
+def legacy_xhs_comment_dict(comment_item: Dict) -> Dict:
+    """
+    原来 update_xhs_note_comment 逐行构造的 dict
+    """
+    user_info = comment_item.get("user_info", {})
+    comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
+    target_comment = comment_item.get("target_comment", {})
+    return {
+        "comment_id": comment_item.get("id"),
+        "create_time": comment_item.get("create_time"),
+        "ip_location": comment_item.get("ip_location"),
+        "note_id": "66fad51c000000001b0224b8",
+        "content": comment_item.get("content"),
+        "user_id": user_info.get("user_id"),
+        "nickname": user_info.get("nickname"),
+        "avatar": user_info.get("image"),
+        "sub_comment_count": comment_item.get("sub_comment_count", 0),
+        "pictures": ",".join(comment_pictures),
+        "parent_comment_id": target_comment.get("id", 0),
+        "last_modify_ts": 1727700000000,
+        "like_count": comment_item.get("like_count", 0),
+    }
+
+
+def xhs_comment_builder(factory: Callable[..., object]) -> Callable[[Dict], object]:
+    """
+    和现在的 update_xhs_note_comment 一样用关键字参数构造
+    """
+    def build(comment_item: Dict) -> object:
+        user_info = comment_item.get("user_info", {})
+        comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
+        target_comment = comment_item.get("target_comment", {})
+        return factory(
+            comment_id=comment_item.get("id"),
+            create_time=comment_item.get("create_time"),
+            ip_location=comment_item.get("ip_location"),
+            note_id="66fad51c000000001b0224b8",
+            content=comment_item.get("content"),
+            user_id=user_info.get("user_id"),
+            nickname=user_info.get("nickname"),
+            avatar=user_info.get("image"),
+            sub_comment_count=comment_item.get("sub_comment_count", 0),
+            pictures=",".join(comment_pictures),
+            parent_comment_id=target_comment.get("id", 0),
+            last_modify_ts=1727700000000,
+            like_count=comment_item.get("like_count", 0),
+        )
+
+    return build
+
+
+def measure(rows: List[Dict], build: Callable[[Dict], object]):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = [build(row) for row in rows]
+    cost = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for item in items:
+        json_codec.dumps(item)
+    encode_cost = time.perf_counter() - start
+    return cost, memory, encode_cost
+
+
+def main():
+    print(f"{ROW_NUM} comments, memory is what the built rows hold on to, field values are shared, "
+          f"json backend: {json_codec.get_json_backend()}")
+    print(f"{'platform':<10}{'type':<18}{'build (ms)':>12}{'memory (MB)':>14}{'jsonl encode (ms)':>20}")
+    for platform, rows, model, record in (("tieba", make_tieba_rows(), TiebaComment, TiebaCommentRecord),
+                                          ("zhihu", make_zhihu_rows(), ZhihuComment, ZhihuCommentRecord)):
+        assert record(**rows[0]).model_dump() == model(**rows[0]).model_dump()
+        for name, build in (("dict", dict),
+                            ("pydantic", lambda row: model(**row)),
+                            ("slots record", lambda row: record(**row))):
+            cost, memory, encode_cost = measure(rows, build)
+            print(f"{platform:<10}{name:<18}{cost * 1000:>12.1f}{memory / 1024 / 1024:>14.1f}{encode_cost * 1000:>20.1f}")
+
+    api_comments = make_xhs_api_comments()
+    assert xhs_comment_builder(XhsNoteCommentRecord)(api_comments[1]).model_dump() == \
+        legacy_xhs_comment_dict(api_comments[1])
+    for name, build in (("dict", legacy_xhs_comment_dict),
+                        ("pydantic", xhs_comment_builder(XhsNoteComment)),
+                        ("slots record", xhs_comment_builder(XhsNoteCommentRecord))):
+        cost, memory, encode_cost = measure(api_comments, build)
+        print(f"{'xhs':<10}{name:<18}{cost * 1000:>12.1f}{memory / 1024 / 1024:>14.1f}{encode_cost * 1000:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
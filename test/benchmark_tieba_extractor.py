@@ -0,0 +1,303 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 贴吧页面提取，旧版 parsel 逐个求值 XPath 与预编译 lxml XPath 的耗时对比，并校验两者输出一致
+#            运行方式: python -m test.benchmark_tieba_extractor
+import html
+import json
+import os
+import re
+import timeit
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote
+
+from parsel import Selector
+
+from constant import baidu_tieba as const
+from media_platform.tieba.help import TieBaExtractor
+from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools import utils
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "data", "tieba", "tieba_20250505_测试数据", "json")
+REPEAT = 5
+
+# 测试数据里没有创作者主页，这里按页面结构构造一个
+CREATOR_PAGE = """<html><body>
+<div class="userinfo_left_head"><a><img src="https://gss0.bdstatic.com/6LZ1dD3d1sgCo2Kml5_Y_D3/sys/portrait/item/tb.1.abc"></a></div>
+<span class="userinfo_username ">程序员阿江</span>
+<div class="userinfo_userdata"><span class="user_name">用户名:relakkes</span><span class="userinfo_sex userinfo_sex_male"></span>
+<span>吧龄:1.9年</span>
+<span>IP属地:广东</span></div>
+<p class="space"><a href="/home/main?un=relakkes&amp;id=tb.1.abc&amp;fr=home">主页</a></p>
+<span class="concern_num">(<a href="/home/concern?id=tb.1.abc" target="_blank">12</a>)</span>
+<span class="concern_num">(<a href="/home/fans?id=tb.1.abc" target="_blank">345</a>)</span>
+<ul class="new_list clearfix">
+<li><div class="thread_name"><a href="/p/9117888152?fid=1">帖子一</a><a href="/f?kw=x">吧</a></div></li>
+<li><div class="thread_name"><a href="/p/9117888153">帖子二</a></div></li>
+</ul>
+</body></html>"""
+
+
+class LegacyTieBaExtractor(TieBaExtractor):
+    """
+    旧版实现：每个方法用 parsel.Selector 解析页面，逐个求值字符串形式的 XPath
+    """
+
+    @staticmethod
+    def extract_search_note_list(page_content: str) -> List[TiebaNote]:
+        xpath_selector = "//div[@class='s_post']"
+        post_list = Selector(text=page_content).xpath(xpath_selector)
+        result: List[TiebaNote] = []
+        for post in post_list:
+            tieba_note = TiebaNote(note_id=post.xpath(".//span[@class='p_title']/a/@data-tid").get(default='').strip(),
+                                   title=post.xpath(".//span[@class='p_title']/a/text()").get(default='').strip(),
+                                   desc=post.xpath(".//div[@class='p_content']/text()").get(default='').strip(),
+                                   note_url=const.TIEBA_URL + post.xpath(".//span[@class='p_title']/a/@href").get(
+                                       default=''),
+                                   user_nickname=post.xpath(".//a[starts-with(@href, '/home/main')]/font/text()").get(
+                                       default='').strip(), user_link=const.TIEBA_URL + post.xpath(
+                    ".//a[starts-with(@href, '/home/main')]/@href").get(default=''),
+                                   tieba_name=post.xpath(".//a[@class='p_forum']/font/text()").get(default='').strip(),
+                                   tieba_link=const.TIEBA_URL + post.xpath(".//a[@class='p_forum']/@href").get(
+                                       default=''),
+                                   publish_time=post.xpath(".//font[@class='p_green p_date']/text()").get(
+                                       default='').strip(), )
+            result.append(tieba_note)
+        return result
+
+    def extract_tieba_note_list(self, page_content: str) -> List[TiebaNote]:
+        page_content = page_content.replace('<!--', "")
+        content_selector = Selector(text=page_content)
+        xpath_selector = "//ul[@id='thread_list']/li"
+        post_list = content_selector.xpath(xpath_selector)
+        result: List[TiebaNote] = []
+        for post_selector in post_list:
+            post_field_value: Dict = self.extract_data_field_value(post_selector)
+            if not post_field_value:
+                continue
+            note_id = str(post_field_value.get("id"))
+            tieba_note = TiebaNote(note_id=note_id,
+                                   title=post_selector.xpath(".//a[@class='j_th_tit ']/text()").get(default='').strip(),
+                                   desc=post_selector.xpath(
+                                       ".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()").get(
+                                       default='').strip(), note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                   user_link=const.TIEBA_URL + post_selector.xpath(
+                                       ".//a[@class='frs-author-name j_user_card ']/@href").get(default='').strip(),
+                                   user_nickname=post_field_value.get("authoer_nickname") or post_field_value.get(
+                                       "author_name"),
+                                   tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
+                                       default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
+                    "//a[@class='card_title_fname']/@href").get(default=''),
+                                   total_replay_num=post_field_value.get("reply_num", 0))
+            result.append(tieba_note)
+        return result
+
+    def extract_note_detail(self, page_content: str) -> TiebaNote:
+        content_selector = Selector(text=page_content)
+        first_floor_selector = content_selector.xpath("//div[@class='p_postlist'][1]")
+        only_view_author_link = content_selector.xpath("//*[@id='lzonly_cntn']/@href").get(default='').strip()
+        note_id = only_view_author_link.split("?")[0].split("/")[-1]
+        # 帖子回复数、回复页数
+        thread_num_infos = content_selector.xpath(
+            "//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+        # IP地理位置、发表时间
+        other_info_content = content_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+        ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
+        note = TiebaNote(note_id=note_id, title=content_selector.xpath("//title/text()").get(default='').strip(),
+                         desc=content_selector.xpath("//meta[@name='description']/@content").get(default='').strip(),
+                         note_url=const.TIEBA_URL + f"/p/{note_id}",
+                         user_link=const.TIEBA_URL + first_floor_selector.xpath(
+                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
+                         user_nickname=first_floor_selector.xpath(
+                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
+                         user_avatar=first_floor_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(
+                             default='').strip(),
+                         tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
+                             default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
+                "//a[@class='card_title_fname']/@href").get(default=''), ip_location=ip_location,
+                         publish_time=publish_time,
+                         total_replay_num=thread_num_infos[0].xpath("./text()").get(default='').strip(),
+                         total_replay_page=thread_num_infos[1].xpath("./text()").get(default='').strip(), )
+        note.title = note.title.replace(f"【{note.tieba_name}】_百度贴吧", "")
+        return note
+
+    def extract_tieba_note_parment_comments(self, page_content: str, note_id: str) -> List[TiebaComment]:
+        xpath_selector = "//div[@class='l_post l_post_bright j_l_post clearfix  ']"
+        comment_list = Selector(text=page_content).xpath(xpath_selector)
+        result: List[TiebaComment] = []
+        for comment_selector in comment_list:
+            comment_field_value: Dict = self.extract_data_field_value(comment_selector)
+            if not comment_field_value:
+                continue
+            tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
+            other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+            ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
+            tieba_comment = TiebaComment(comment_id=str(comment_field_value.get("content").get("post_id")),
+                                         sub_comment_count=comment_field_value.get("content").get("comment_num"),
+                                         content=utils.extract_text_from_html(
+                                             comment_field_value.get("content").get("content")),
+                                         note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                         user_link=const.TIEBA_URL + comment_selector.xpath(
+                                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
+                                         user_nickname=comment_selector.xpath(
+                                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
+                                         user_avatar=comment_selector.xpath(
+                                             ".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
+                                         tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
+                                         tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
+                                         ip_location=ip_location, publish_time=publish_time, note_id=note_id, )
+            result.append(tieba_comment)
+        return result
+
+    def extract_tieba_note_sub_comments(self, page_content: str, parent_comment: TiebaComment) -> List[TiebaComment]:
+        selector = Selector(page_content)
+        comments = []
+        comment_ele_list = selector.xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
+        comment_ele_list.extend(selector.xpath("//li[@class='lzl_single_post j_lzl_s_p ']"))
+        for comment_ele in comment_ele_list:
+            comment_value = self.extract_data_field_value(comment_ele)
+            if not comment_value:
+                continue
+            comment_user_a_selector = comment_ele.xpath("./a[@class='j_user_card lzl_p_p']")[0]
+            content = utils.extract_text_from_html(
+                comment_ele.xpath(".//span[@class='lzl_content_main']").get(default=""))
+            comment = TiebaComment(
+                comment_id=str(comment_value.get("spid")), content=content,
+                user_link=comment_user_a_selector.xpath("./@href").get(default=""),
+                user_nickname=comment_value.get("showname"),
+                user_avatar=comment_user_a_selector.xpath("./img/@src").get(default=""),
+                publish_time=comment_ele.xpath(".//span[@class='lzl_time']/text()").get(default="").strip(),
+                parent_comment_id=parent_comment.comment_id,
+                note_id=parent_comment.note_id, note_url=parent_comment.note_url,
+                tieba_id=parent_comment.tieba_id, tieba_name=parent_comment.tieba_name,
+                tieba_link=parent_comment.tieba_link)
+            comments.append(comment)
+
+        return comments
+
+    def extract_creator_info(self, html_content: str) -> TiebaCreator:
+        selector = Selector(text=html_content)
+        user_link_selector = selector.xpath("//p[@class='space']/a")
+        user_link: str = user_link_selector.xpath("./@href").get(default='')
+        user_link_params: Dict = parse_qs(unquote(user_link.split("?")[-1]))
+        user_name = user_link_params.get("un")[0] if user_link_params.get("un") else ""
+        user_id = user_link_params.get("id")[0] if user_link_params.get("id") else ""
+        userinfo_userdata_selector = selector.xpath("//div[@class='userinfo_userdata']")
+        follow_fans_selector = selector.xpath("//span[@class='concern_num']")
+        follows, fans = 0, 0
+        if len(follow_fans_selector) == 2:
+            follows, fans = self.extract_follow_and_fans(follow_fans_selector)
+        user_content = userinfo_userdata_selector.get(default='')
+        return TiebaCreator(user_id=user_id, user_name=user_name,
+                            nickname=selector.xpath(".//span[@class='userinfo_username ']/text()").get(
+                                default='').strip(),
+                            avatar=selector.xpath(".//div[@class='userinfo_left_head']//img/@src").get(
+                                default='').strip(),
+                            gender=self.extract_gender(user_content),
+                            ip_location=self.extract_ip(user_content),
+                            follows=follows,
+                            fans=fans,
+                            registration_duration=self.extract_registration_duration(user_content)
+                            )
+
+    @staticmethod
+    def extract_tieba_thread_id_list_from_creator_page(
+        html_content: str
+    ) -> List[str]:
+        selector = Selector(text=html_content)
+        thread_id_list = []
+        xpath_selector = (
+            "//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href"
+        )
+        thread_url_list = selector.xpath(xpath_selector).getall()
+        for thread_url in thread_url_list:
+            thread_id = thread_url.split("?")[0].split("/")[-1]
+            thread_id_list.append(thread_id)
+        return thread_id_list
+
+
+    @staticmethod
+    def extract_follow_and_fans(selectors: List[Selector]) -> Tuple[str, str]:
+        pattern = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
+        follow_match = pattern.findall(selectors[0].get())
+        fans_match = pattern.findall(selectors[1].get())
+        follows = follow_match[0] if follow_match else 0
+        fans = fans_match[0] if fans_match else 0
+        return follows, fans
+
+    @staticmethod
+    def extract_data_field_value(selector: Selector) -> Dict:
+        data_field_value = selector.xpath("./@data-field").get(default='').strip()
+        if not data_field_value or data_field_value == "{}":
+            return {}
+        try:
+            unescaped_json_str = html.unescape(data_field_value)
+            data_field_dict_value = json.loads(unescaped_json_str)
+        except Exception as ex:
+            print(f"extract_data_field_value，错误信息：{ex}, 尝试使用其他方式解析")
+            data_field_dict_value = {}
+        return data_field_dict_value
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def make_cases(extractor: TieBaExtractor):
+    parent_comment = TiebaComment(comment_id="150726504693", content="content", user_link="user_link",
+                                  user_nickname="user_nickname", user_avatar="user_avatar",
+                                  publish_time="publish_time", parent_comment_id="", note_id="9117888152",
+                                  note_url="https://tieba.baidu.com/p/9117888152", tieba_id="tieba_id",
+                                  tieba_name="tieba_name", tieba_link="tieba_link")
+    pages = {name: load_fixture(name) for name in os.listdir(FIXTURE_DIR) if name.endswith(".html")}
+    return [
+        ("search_keyword_notes", lambda: extractor.extract_search_note_list(pages["search_keyword_notes.html"])),
+        ("tieba_note_list", lambda: extractor.extract_tieba_note_list(pages["tieba_note_list.html"])),
+        ("note_detail", lambda: extractor.extract_note_detail(pages["note_detail.html"])),
+        ("note_comments",
+         lambda: extractor.extract_tieba_note_parment_comments(pages["note_comments.html"], "9117888152")),
+        ("note_sub_comments",
+         lambda: extractor.extract_tieba_note_sub_comments(pages["note_sub_comments.html"], parent_comment)),
+        ("creator_info", lambda: extractor.extract_creator_info(CREATOR_PAGE)),
+        ("creator_thread_ids", lambda: extractor.extract_tieba_thread_id_list_from_creator_page(CREATOR_PAGE)),
+    ]
+
+
+def dump(result):
+    if isinstance(result, list):
+        return [dump(item) for item in result]
+    return result.model_dump() if hasattr(result, "model_dump") else result
+
+
+def main():
+    legacy_cases = make_cases(LegacyTieBaExtractor())
+    current_cases = make_cases(TieBaExtractor())
+    print(f"{'page':<22}{'items':>8}{'legacy (ms)':>14}{'compiled (ms)':>16}{'speedup':>10}")
+    legacy_total, current_total = 0.0, 0.0
+    for (name, legacy_case), (_, current_case) in zip(legacy_cases, current_cases):
+        expected = dump(legacy_case())
+        assert dump(current_case()) == expected, f"{name} output differs"
+        legacy = timeit.timeit(legacy_case, number=REPEAT) / REPEAT
+        current = timeit.timeit(current_case, number=REPEAT) / REPEAT
+        legacy_total += legacy
+        current_total += current
+        items = len(expected) if isinstance(expected, list) else 1
+        print(f"{name:<22}{items:>8}{legacy * 1000:>14.2f}{current * 1000:>16.2f}{legacy / current:>9.1f}x")
+    print(f"{'total':<22}{'':>8}{legacy_total * 1000:>14.2f}{current_total * 1000:>16.2f}"
+          f"{legacy_total / current_total:>9.1f}x")
+    print("outputs identical")
+
+
+if __name__ == '__main__':
+    main()
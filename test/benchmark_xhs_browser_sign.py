@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 每个请求单独 evaluate 签名与合并批处理签名的吞吐对比，页面用模拟的串行 playwright 通道代替
+#            运行方式: python -m test.benchmark_xhs_browser_sign
+import asyncio
+import time
+
+from tools.signing_context import BrowserBatchSigner
+
+CONCURRENCY = 20
+SIGN_NUM = 400
+# 模拟一次 evaluate 和浏览器往返的耗时
+ROUND_TRIP = 0.005
+
+
+class SerialChannelPage:
+    """
+    模拟 context_page：所有 evaluate 经过同一个通道串行执行
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.evaluate_count = 0
+
+    async def evaluate(self, expression, arg=None):
+        async with self._lock:
+            self.evaluate_count += 1
+            await asyncio.sleep(ROUND_TRIP)
+            if expression.startswith("(items)"):
+                return [[True, {"X-s": "XYW_" + url, "X-t": 0}] for url, _ in arg]
+            return {"X-s": "XYW_" + arg[0], "X-t": 0}
+
+
+async def bench(sign) -> float:
+    queue = asyncio.Queue()
+    for i in range(SIGN_NUM):
+        queue.put_nowait(f"/api/sns/web/v1/feed?i={i}")
+
+    async def worker():
+        while not queue.empty():
+            await sign(queue.get_nowait(), None)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+    return time.perf_counter() - start
+
+
+async def main():
+    legacy_page = SerialChannelPage()
+    legacy = await bench(lambda url, data: legacy_page.evaluate("([url, data]) => window._webmsxyw(url,data)",
+                                                                [url, data]))
+    batch_page = SerialChannelPage()
+    signer = BrowserBatchSigner(batch_page, "_webmsxyw")
+    batch = await bench(signer.sign)
+
+    print(f"{SIGN_NUM} signs, concurrency {CONCURRENCY}, round trip {ROUND_TRIP * 1000:.0f}ms, "
+          f"batch window {signer.window * 1000:.0f}ms")
+    print(f"{'signer':<18}{'total (s)':>12}{'signs/s':>12}{'evaluates':>12}")
+    for name, cost, page in (("evaluate per call", legacy, legacy_page), ("batch evaluate", batch, batch_page)):
+        print(f"{name:<18}{cost:>12.3f}{SIGN_NUM / cost:>12.0f}{page.evaluate_count:>12}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 笔记详情页HTML解析，旧版递归 dumps/loads 转换键名与单次解码的耗时对比
+#            运行方式: python -m test.benchmark_xhs_note_html
+import json
+import re
+import timeit
+
+from media_platform.xhs.help import parse_note_detail_from_html
+
+NOTE_NUM = 20
+REPEAT = 20
+
+
+def legacy_parse(html, note_id):
+    """
+    旧版 XiaoHongShuClient.get_note_by_id_from_html 的解析过程
+    """
+
+    def camel_to_underscore(key):
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+    def transform_json_keys(json_data):
+        data_dict = json.loads(json_data)
+        dict_new = {}
+        for key, value in data_dict.items():
+            new_key = camel_to_underscore(key)
+            if not value:
+                dict_new[new_key] = value
+            elif isinstance(value, dict):
+                dict_new[new_key] = transform_json_keys(json.dumps(value))
+            elif isinstance(value, list):
+                dict_new[new_key] = [
+                    (
+                        transform_json_keys(json.dumps(item))
+                        if (item and isinstance(item, dict))
+                        else item
+                    )
+                    for item in value
+                ]
+            else:
+                dict_new[new_key] = value
+        return dict_new
+
+    state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+    if state != "{}":
+        note_dict = transform_json_keys(state)
+        return note_dict["note"]["note_detail_map"][note_id]["note"]
+    return {}
+
+
+def make_user(i):
+    return {"userId": f"5f{i:022x}", "nickname": f"用户{i}", "avatar": f"https://sns-avatar-qc.xhscdn.com/avatar/{i}.jpg",
+            "xsecToken": "ABxyz" * 6}
+
+
+def make_note(note_id, i):
+    return {
+        "noteId": note_id, "type": "normal", "title": f"笔记标题{i}", "desc": "正文内容，" * 40,
+        "user": make_user(i), "time": 1700000000000 + i, "lastUpdateTime": 1700000000000 + i, "ipLocation": "上海",
+        "interactInfo": {"liked": False, "likedCount": "1.2万", "collected": False, "collectedCount": "3000",
+                         "commentCount": "512", "shareCount": "88", "followed": False, "relation": "none"},
+        "imageList": [{"width": 1080, "height": 1440, "urlDefault": f"https://sns-webpic-qc.xhscdn.com/{i}/{n}.jpg",
+                       "urlPre": f"https://sns-webpic-qc.xhscdn.com/{i}/{n}_pre.jpg", "livePhoto": False,
+                       "fileId": "", "traceId": "",
+                       "infoList": [{"imageScene": "WB_PRV", "url": f"https://sns-webpic-qc.xhscdn.com/{i}/{n}_prv"},
+                                    {"imageScene": "WB_DFT", "url": f"https://sns-webpic-qc.xhscdn.com/{i}/{n}_dft"}],
+                       "stream": {}}
+                      for n in range(9)],
+        "tagList": [{"id": f"tag{n}", "name": f"话题{n}", "type": "topic"} for n in range(5)],
+        "atUserList": [], "shareInfo": {"unShare": False}, "video": "undefined",
+    }
+
+
+def make_page(note_id):
+    feeds = [{"id": f"{n:024x}", "modelType": "note", "noteCard": make_note(f"{n:024x}", n), "trackId": f"t{n}"}
+             for n in range(NOTE_NUM)]
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30, "prohibitNewNotes": False}, "serverTime": 1700000000000},
+        "user": {"loggedIn": False, "userInfo": {"userId": "", "nickname": ""}},
+        "feed": {"feeds": feeds, "currentChannel": "homefeed_recommend", "isFetching": False},
+        "note": {
+            "firstNoteId": note_id, "currentNoteId": note_id,
+            "noteDetailMap": {note_id: {
+                "comments": {"list": [], "cursor": "", "hasMore": True, "loading": False},
+                "currentTime": 1700000000000,
+                "note": make_note(note_id, 0),
+            }},
+        },
+    }
+    state_json = json.dumps(state, ensure_ascii=False, separators=(",", ":")).replace('"undefined"', "undefined")
+    return (f'<html><head><script>window.__SSR__=true</script></head><body><div id="app"></div>'
+            f'<script>window.__INITIAL_STATE__={state_json}</script><script src="/vendor.js"></script></body></html>')
+
+
+def main():
+    note_id = "66fad51c000000001b0224b8"
+    html = make_page(note_id)
+    assert legacy_parse(html, note_id) == parse_note_detail_from_html(html, note_id)
+    legacy = timeit.timeit(lambda: legacy_parse(html, note_id), number=REPEAT) / REPEAT
+    current = timeit.timeit(lambda: parse_note_detail_from_html(html, note_id), number=REPEAT) / REPEAT
+    print(f"page size {len(html) / 1024:.0f}KB, {NOTE_NUM} feed notes, identical output")
+    print(f"{'parser':<28}{'per page (ms)':>16}")
+    print(f"{'legacy dumps/loads per dict':<28}{legacy * 1000:>16.2f}")
+    print(f"{'single decode object_hook':<28}{current * 1000:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书 x-s-common 请求头构造，纯 Python 移植实现与标准库实现每秒可生成的请求头数量对比
+#            运行方式: python -m test.benchmark_xhs_sign
+import json
+import time
+
+from media_platform.xhs.help import b64Encode, encodeUtf8, get_b3_trace_id, mrc, sign
+
+SIGN_NUM = 20000
+
+A1 = "18c4e5b2a5dyn8fh1bx1lcxm9nwl3n8wu0xle7yvd50000380722"
+B1 = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSnMDKutRI3KjYorCHanqIkgmHUx"
+X_S = "XYW_eyJzaWduU3ZuIjoiNTEiLCJzaWduVHlwZSI6IngxIiwiYXBwSWQiOiJ4aHMtcGMtd2ViIiwic2lnblZlcnNpb24iOiIxIiwi"
+X_T = "1730000000000"
+
+
+def legacy_sign(a1="", b1="", x_s="", x_t=""):
+    """
+    旧版实现：mrc、encodeUtf8、b64Encode、get_b3_trace_id 都是逐字符的纯 Python 实现
+    """
+    common = {
+        "s0": 3,
+        "s1": "",
+        "x0": "1",
+        "x1": "3.7.8-2",
+        "x2": "Mac OS",
+        "x3": "xhs-pc-web",
+        "x4": "4.27.2",
+        "x5": a1,
+        "x6": x_t,
+        "x7": x_s,
+        "x8": b1,
+        "x9": mrc(x_t + x_s + b1),
+        "x10": 154,
+    }
+    encode_str = encodeUtf8(json.dumps(common, separators=(',', ':')))
+    return {
+        "x-s": x_s,
+        "x-t": x_t,
+        "x-s-common": b64Encode(encode_str),
+        "x-b3-traceid": get_b3_trace_id(),
+    }
+
+
+def bench(sign_func) -> float:
+    start = time.perf_counter()
+    for _ in range(SIGN_NUM):
+        sign_func(A1, B1, X_S, X_T)
+    return SIGN_NUM / (time.perf_counter() - start)
+
+
+def main():
+    assert legacy_sign(A1, B1, X_S, X_T)["x-s-common"] == sign(A1, B1, X_S, X_T)["x-s-common"]
+    legacy = bench(legacy_sign)
+    current = bench(sign)
+    print(f"{'implementation':<16}{'headers/s':>12}")
+    print(f"{'legacy':<16}{legacy:>12.0f}")
+    print(f"{'fast path':<16}{current:>12.0f}")
+    print(f"speedup: {current / legacy:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 单测和性能测试使用的本地 HTTP 服务，代替真实的平台接口
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# handler 入参为 (method, path)，返回 (status_code, body)
+Handler = Callable[[str, str], Awaitable[Tuple[int, bytes]]]
+
+
+async def default_handler(method: str, path: str) -> Tuple[int, bytes]:
+    return 200, json.dumps({"success": True, "code": 0, "ok": 1, "data": {"path": path}}).encode()
+
+
+class LocalHttpServer:
+    """
+    支持 HTTP/1.1 keep-alive 的极简服务端，统计建立过的 TCP 连接数和请求数
+    """
+
+    def __init__(self, handler: Optional[Handler] = None, delay: float = 0.0) -> None:
+        """
+        :param handler: 请求处理函数
+        :param delay: 每个请求的模拟处理耗时，单位秒
+        """
+        self.handler: Handler = handler or default_handler
+        self.delay = delay
+        self.connection_count = 0
+        self.request_count = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> "LocalHttpServer":
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "LocalHttpServer":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, value = line.decode().split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+                content_length = int(headers.get("content-length", 0))
+                if content_length:
+                    await reader.readexactly(content_length)
+
+                self.request_count += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                status_code, body = await self.handler(method, path)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status_code} {'OK' if status_code == 200 else 'ERROR'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
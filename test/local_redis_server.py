@@ -0,0 +1,162 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 单测使用的本地 Redis 替身，实现 RESP2 协议和缓存用到的少量命令，代替真实的 Redis 服务
+import asyncio
+import fnmatch
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class LocalRedisServer:
+    """
+    支持 PING/AUTH/SELECT/GET/SET/MGET/DEL/EXISTS/TTL/PTTL/SCAN/KEYS/FLUSHDB 的极简 Redis 服务端
+    统计建立过的 TCP 连接数、收到的命令数和每个命令的调用次数
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.connection_count = 0
+        self.command_count = 0
+        self.command_stats: Dict[str, int] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+        self.port = 0
+
+    async def start(self) -> "LocalRedisServer":
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # 关闭还没断开的连接，避免事件循环关闭后连接处理协程才结束
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def __aenter__(self) -> "LocalRedisServer":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _encode(self, value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, bool) or value == "OK":
+            return b"+OK\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, Exception):
+            return b"-ERR %s\r\n" % str(value).encode()
+        if isinstance(value, (list, tuple)):
+            return b"*%d\r\n" % len(value) + b"".join(self._encode(item) for item in value)
+        if isinstance(value, str):
+            value = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _get_alive(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expire_at = item
+        if expire_at is not None and expire_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def _alive_keys(self) -> List[bytes]:
+        return [key for key in list(self.data) if self._get_alive(key) is not None]
+
+    def _execute(self, args: List[bytes]):
+        name = args[0].decode().upper()
+        self.command_count += 1
+        self.command_stats[name] = self.command_stats.get(name, 0) + 1
+        if name in ("PING",):
+            return b"PONG"
+        if name in ("AUTH", "SELECT", "CLIENT"):
+            return "OK"
+        if name == "GET":
+            return self._get_alive(args[1])
+        if name == "MGET":
+            return [self._get_alive(key) for key in args[1:]]
+        if name == "SET":
+            expire_at = None
+            options = [arg.upper() for arg in args[3:]]
+            if b"EX" in options:
+                expire_at = time.time() + int(args[3 + options.index(b"EX") + 1])
+            elif b"PX" in options:
+                expire_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expire_at)
+            return "OK"
+        if name == "DEL":
+            return sum(1 for key in args[1:] if self._get_alive(key) is not None and self.data.pop(key, None))
+        if name == "EXISTS":
+            return sum(1 for key in args[1:] if self._get_alive(key) is not None)
+        if name in ("TTL", "PTTL"):
+            if self._get_alive(args[1]) is None:
+                return -2
+            expire_at = self.data[args[1]][1]
+            if expire_at is None:
+                return -1
+            return int((expire_at - time.time()) * (1000 if name == "PTTL" else 1))
+        if name == "KEYS":
+            pattern = args[1].decode()
+            return [key for key in self._alive_keys() if fnmatch.fnmatchcase(key.decode(), pattern)]
+        if name == "SCAN":
+            cursor = int(args[1])
+            options = [arg.upper() for arg in args[2:]]
+            pattern = args[2 + options.index(b"MATCH") + 1].decode() if b"MATCH" in options else "*"
+            count = int(args[2 + options.index(b"COUNT") + 1]) if b"COUNT" in options else 10
+            all_keys = sorted(self._alive_keys())
+            batch = all_keys[cursor:cursor + count]
+            next_cursor = cursor + count if cursor + count < len(all_keys) else 0
+            return [str(next_cursor).encode(), [key for key in batch if fnmatch.fnmatchcase(key.decode(), pattern)]]
+        if name == "FLUSHDB":
+            self.data.clear()
+            return "OK"
+        return Exception(f"unknown command '{name}'")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                writer.write(self._encode(self._execute(args)))
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
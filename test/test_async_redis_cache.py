@@ -0,0 +1,78 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from cache.async_redis_cache import AsyncRedisCache, JsonCacheCodec
+from cache.cache_factory import CacheFactory
+from test.local_redis_server import LocalRedisServer
+
+
+class TestAsyncRedisCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = await LocalRedisServer().start()
+        self.cache = AsyncRedisCache(host="127.0.0.1", port=self.server.port, password="")
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+        await self.server.stop()
+
+    async def test_set_get_and_expire(self):
+        await self.cache.set("name", "程序员阿江-Relakkes", 1)
+        self.assertEqual(await self.cache.get("name"), "程序员阿江-Relakkes")
+        self.assertIsNone(await self.cache.get("not_exist"))
+        await asyncio.sleep(1.1)
+        self.assertIsNone(await self.cache.get("name"))
+
+    async def test_mset_uses_pipeline_and_mget_one_command(self):
+        mapping = {f"ppool_{i}": {"ip": f"1.1.1.{i}", "port": i} for i in range(50)}
+        await self.cache.mset(mapping, 60)
+        self.assertEqual(self.server.command_stats["SET"], 50)
+        values = await self.cache.mget(list(mapping) + ["not_exist"])
+        self.assertEqual(values, list(mapping.values()) + [None])
+        self.assertEqual(self.server.command_stats["MGET"], 1)
+        self.assertNotIn("GET", self.server.command_stats)
+        # 管道和并发读写都复用连接池里的连接
+        await asyncio.gather(*[self.cache.get(key) for key in mapping])
+        self.assertLessEqual(self.server.connection_count, 20)
+
+    async def test_keys_use_scan(self):
+        await self.cache.mset({f"ppool_{i}": i for i in range(1200)}, 60)
+        await self.cache.set("kuaidaili_1", 1, 60)
+        keys = await self.cache.keys("ppool_*")
+        self.assertEqual(len(keys), 1200)
+        self.assertTrue(all(key.startswith("ppool_") for key in keys))
+        self.assertGreater(self.server.command_stats["SCAN"], 1)
+        self.assertNotIn("KEYS", self.server.command_stats)
+        self.assertEqual(await self.cache.delete(*keys[:10]), 10)
+        self.assertEqual(len(await self.cache.keys("ppool_*")), 1190)
+
+    async def test_factory(self):
+        cache = CacheFactory.create_cache("redis_async", host="127.0.0.1", port=self.server.port, password="")
+        self.assertIsInstance(cache, AsyncRedisCache)
+        await cache.set("k", [1, "a"], 10)
+        self.assertEqual(await self.cache.get("k"), [1, "a"])
+        await cache.close()
+
+    def test_codec_round_trip(self):
+        codec = JsonCacheCodec()
+        value = {"ip": "1.1.1.1", "tags": ["中文", 1, 1.5, None, True]}
+        data = codec.dumps(value)
+        self.assertIsInstance(data, bytes)
+        self.assertNotIn(b" ", data)
+        self.assertEqual(codec.loads(data), value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import mock
+
+import config
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.kuaishou.client import KuaiShouClient
+from media_platform.weibo.client import WeiboClient
+from media_platform.xhs.client import XiaoHongShuClient
+
+
+def make_comments(prefix, num, **fields):
+    return [dict(id=f"{prefix}{i}", **fields) for i in range(num)]
+
+
+class FakeXhsClient(XiaoHongShuClient):
+    """
+    三页一级评论，每页第一条评论有一页自带的二级评论和两页需要额外请求的二级评论
+    """
+
+    def __init__(self):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.requests = []
+
+    async def get_note_comments(self, note_id, xsec_token, cursor=""):
+        self.requests.append(("comments", cursor))
+        page = int(cursor or 0)
+        comments = make_comments(f"c{page}-", 3, note_id=note_id)
+        comments[0].update(sub_comments=make_comments(f"s{page}-", 1, note_id=note_id), sub_comment_has_more=True,
+                           sub_comment_cursor="0")
+        return {"comments": comments, "has_more": page < 2, "cursor": str(page + 1)}
+
+    async def get_note_sub_comments(self, note_id, root_comment_id, xsec_token, num=10, cursor=""):
+        self.requests.append(("sub_comments", root_comment_id, cursor))
+        page = int(cursor)
+        return {"comments": make_comments(f"{root_comment_id}-r{page}-", 2, note_id=note_id), "has_more": page < 1,
+                "cursor": str(page + 1)}
+
+
+class TestCommentIterators(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(config, "ENABLE_GET_SUB_COMMENTS", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_xhs_iter_is_lazy_and_matches_get_all(self):
+        client = FakeXhsClient()
+        iterator = client.iter_note_all_comments("n1", "token", crawl_interval=0, max_count=100)
+        first_page = await iterator.__anext__()
+        self.assertEqual([comment["id"] for comment in first_page], ["c0-0", "c0-1", "c0-2"])
+        # 只请求了第一页，二级评论在消费方处理完这一页后才请求
+        self.assertEqual(client.requests, [("comments", "")])
+        pages = [first_page] + [page async for page in iterator]
+        self.assertEqual([len(page) for page in pages], [3, 1, 2, 2] * 3)
+
+        calls = []
+
+        async def callback(note_id, comments):
+            calls.append((note_id, comments))
+
+        result = await FakeXhsClient().get_note_all_comments("n1", "token", crawl_interval=0, callback=callback,
+                                                            max_count=100)
+        self.assertEqual(calls, [("n1", page) for page in pages])
+        self.assertEqual(result, [comment for page in pages for comment in page])
+
+    async def test_xhs_max_count(self):
+        client = FakeXhsClient()
+        pages = [page async for page in client.iter_note_all_comments("n1", "token", crawl_interval=0, max_count=2)]
+        self.assertEqual([[comment["id"] for comment in page] for page in pages],
+                         [["c0-0", "c0-1"], ["s0-0"], ["c0-0-r0-0", "c0-0-r0-1"], ["c0-0-r1-0", "c0-0-r1-1"]])
+
+    async def test_xhs_sub_comments_disabled(self):
+        with mock.patch.object(config, "ENABLE_GET_SUB_COMMENTS", False):
+            client = FakeXhsClient()
+            pages = [page async for page in client.iter_note_all_comments("n1", "token", crawl_interval=0,
+                                                                          max_count=100)]
+        self.assertEqual([len(page) for page in pages], [3, 3, 3])
+
+    async def test_kuaishou(self):
+        client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+
+        async def get_video_comments(photo_id, pcursor=""):
+            page = int(pcursor or 0)
+            comments = [{"commentId": f"c{page}-{i}", "subComments": [], "subCommentsPcursor": "no_more"}
+                        for i in range(2)]
+            comments[0].update(subComments=[{"commentId": f"s{page}"}], subCommentsPcursor="1")
+            return {"visionCommentList": {"rootComments": comments, "pcursor": "no_more" if page else "1"}}
+
+        async def get_video_sub_comments(photo_id, root_comment_id, pcursor=""):
+            return {"visionSubCommentList": {"subComments": [{"commentId": f"{root_comment_id}-r"}],
+                                             "pcursor": "no_more"}}
+
+        client.get_video_comments = get_video_comments
+        client.get_video_sub_comments = get_video_sub_comments
+        pages = [page async for page in client.iter_video_all_comments("p1", crawl_interval=0, max_count=100)]
+        self.assertEqual([[comment["commentId"] for comment in page] for page in pages],
+                         [["c0-0", "c0-1"], ["s0"], ["c0-0-r"], ["c1-0", "c1-1"], ["s1"], ["c1-0-r"]])
+
+    async def test_bilibili_max_count_with_sub_comments(self):
+        client = BilibiliClient(headers={}, playwright_page=None, cookie_dict={})
+        requested_roots = []
+
+        async def get_video_comments(video_id, order_mode, next_page):
+            replies = [{"rpid": next_page * 10 + i, "rcount": 1} for i in range(3)]
+            return {"cursor": {"is_end": False, "next": next_page + 1}, "replies": replies}
+
+        async def get_video_level_two_comments(video_id, level_one_comment_id, pn, ps, order_mode):
+            requested_roots.append(level_one_comment_id)
+            return {"replies": [{"rpid": level_one_comment_id * 100}], "page": {"count": 1}}
+
+        client.get_video_comments = get_video_comments
+        client.get_video_level_two_comments = get_video_level_two_comments
+        pages = [page async for page in client.iter_video_all_comments("v1", crawl_interval=0,
+                                                                       is_fetch_sub_comments=True, max_count=4)]
+        # 一级评论数量达到 max_count 后停止，只获取保留下来的一级评论的二级评论
+        self.assertEqual([[comment["rpid"] for comment in page] for page in pages],
+                         [[0, 1, 2], [0], [100], [200], [10], [1000]])
+        self.assertEqual(requested_roots, [0, 1, 2, 10])
+
+    async def test_weibo_inline_sub_comments(self):
+        client = WeiboClient(headers={}, playwright_page=None, cookie_dict={})
+
+        async def get_note_comments(note_id, max_id, max_id_type=0):
+            return {"max_id": 0, "max_id_type": 0,
+                    "data": [{"id": "c0", "comments": [{"id": "s0"}]}, {"id": "c1", "comments": False}]}
+
+        client.get_note_comments = get_note_comments
+        pages = [page async for page in client.iter_note_all_comments("w1", crawl_interval=0, max_count=100)]
+        self.assertEqual([[comment["id"] for comment in page] for page in pages], [["c0", "c1"], ["s0"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.xhs.exception import DataFetchError, IPBlockError
+from tools.concurrency import AdaptiveConcurrencyLimiter
+
+
+class TestAdaptiveConcurrencyLimiter(IsolatedAsyncioTestCase):
+
+    async def run_tasks(self, limiter, count, error_at=()):
+        max_in_flight = 0
+        in_flight = 0
+
+        async def task(index):
+            nonlocal max_in_flight, in_flight
+            async with limiter:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.005)
+                in_flight -= 1
+                if index in error_at:
+                    raise IPBlockError("blocked")
+
+        await asyncio.gather(*[task(i) for i in range(count)], return_exceptions=True)
+        return max_in_flight
+
+    async def test_limits_like_semaphore(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial_limit=2, max_limit=2)
+        self.assertEqual(await self.run_tasks(limiter, 20), 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_additive_increase_when_healthy(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=4, latency_factor=100)
+        max_in_flight = await self.run_tasks(limiter, 60)
+        self.assertEqual(limiter.limit, 4)
+        self.assertGreater(max_in_flight, 1)
+
+    async def test_multiplicative_decrease_on_block(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial_limit=8, max_limit=8, backoff_cooldown=60)
+        await self.run_tasks(limiter, 8, error_at=range(8))
+        # 同一波失败只退避一次
+        self.assertEqual(limiter.limit, 4)
+
+        limiter = AdaptiveConcurrencyLimiter("test", initial_limit=4, max_limit=4, backoff_cooldown=0)
+        async with limiter:
+            try:
+                raise DataFetchError("captcha")
+            except DataFetchError:
+                limiter.record_error()
+        self.assertEqual(limiter.limit, 2)
+        async with limiter:
+            pass
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_other_exceptions_are_neutral(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=4, latency_factor=100)
+        with self.assertRaises(KeyError):
+            async with limiter:
+                raise KeyError("note_id")
+        self.assertEqual(limiter.limit, 1)
+        self.assertEqual(limiter.in_flight, 0)
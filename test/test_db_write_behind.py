@@ -0,0 +1,145 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+
+from aiomysql.cursors import RE_INSERT_VALUES
+
+from async_db import AsyncMysqlDB, AsyncMysqlWriteBehind
+
+
+class MemoryDB:
+    """
+    记录批量写入调用的内存数据库，代替 AsyncMysqlDB
+    """
+
+    def __init__(self, write_delay: float = 0.0):
+        self.tables: Dict[str, Dict[str, Dict]] = {}
+        self.batches: List[int] = []
+        self.write_delay = write_delay
+
+    async def upsert_many(self, table_name, items, key_cols, insert_only_fields=()):
+        if self.write_delay:
+            await asyncio.sleep(self.write_delay)
+        self.batches.append(len(items))
+        rows = self.tables.setdefault(table_name, {})
+        for item in items:
+            key = str(item[key_cols[0]])
+            if key in rows:
+                rows[key].update({k: v for k, v in item.items() if k not in insert_only_fields})
+            else:
+                rows[key] = dict(item)
+        return len(items)
+
+
+class RecordCursor:
+    def __init__(self, executed: List):
+        self.executed = executed
+
+    async def executemany(self, sql, args_list):
+        self.executed.append((sql, args_list))
+        return len(args_list)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class RecordPool:
+    """
+    记录执行 sql 的连接池，代替 aiomysql.Pool
+    """
+
+    def __init__(self):
+        self.executed = []
+
+    def acquire(self):
+        return self
+
+    def cursor(self, *args):
+        return RecordCursor(self.executed)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class TestUpsertMany(IsolatedAsyncioTestCase):
+
+    async def test_upsert_sql(self):
+        pool = RecordPool()
+        rows = await AsyncMysqlDB(pool).upsert_many(
+            "xhs_note_comment",
+            [{"comment_id": "1", "content": "a", "add_ts": 1}, {"comment_id": "2", "content": "b", "add_ts": 2},
+             {"comment_id": "3", "add_ts": 3}],
+            ["comment_id"], insert_only_fields=("add_ts",),
+        )
+        self.assertEqual(rows, 3)
+        self.assertEqual(len(pool.executed), 2)
+        sql, args_list = pool.executed[0]
+        self.assertEqual(
+            sql,
+            "INSERT INTO xhs_note_comment (`comment_id`,`content`,`add_ts`) VALUES (%s,%s,%s) "
+            "ON DUPLICATE KEY UPDATE `content`=VALUES(`content`)"
+        )
+        self.assertEqual(args_list, [["1", "a", 1], ["2", "b", 2]])
+        # 能被 aiomysql 合并成一条多行插入
+        self.assertIsNotNone(RE_INSERT_VALUES.match(sql))
+        self.assertEqual(pool.executed[1][0].split("UPDATE ")[-1], "`comment_id`=VALUES(`comment_id`)")
+
+
+class TestAsyncMysqlWriteBehind(IsolatedAsyncioTestCase):
+
+    async def test_batch_by_size(self):
+        db = MemoryDB()
+        writer = AsyncMysqlWriteBehind(db, batch_size=10, flush_interval_ms=60 * 1000, queue_size=100)
+        for i in range(30):
+            await writer.put("comment", "comment_id", {"comment_id": i, "content": str(i)})
+        await asyncio.wait_for(writer.drain(), timeout=1)
+        self.assertEqual(len(db.tables["comment"]), 30)
+        self.assertEqual(db.batches, [10, 10, 10])
+
+    async def test_flush_by_interval(self):
+        db = MemoryDB()
+        writer = AsyncMysqlWriteBehind(db, batch_size=100, flush_interval_ms=50, queue_size=100)
+        await writer.put("comment", "comment_id", {"comment_id": 1, "content": "a"})
+        await asyncio.sleep(0.2)
+        self.assertIn("1", db.tables["comment"])
+        await writer.drain()
+
+    async def test_update_keeps_insert_only_fields(self):
+        db = MemoryDB()
+        writer = AsyncMysqlWriteBehind(db, batch_size=10, flush_interval_ms=10, queue_size=100)
+        await writer.put("comment", "comment_id", {"comment_id": 1, "content": "a", "add_ts": 1})
+        await writer.drain()
+        await writer.put("comment", "comment_id", {"comment_id": 1, "content": "b", "add_ts": 2})
+        await writer.put("comment", "comment_id", {"comment_id": 1, "content": "c", "add_ts": 3})
+        await writer.drain()
+        self.assertEqual(db.tables["comment"]["1"], {"comment_id": 1, "content": "c", "add_ts": 1})
+
+    async def test_back_pressure(self):
+        db = MemoryDB(write_delay=0.2)
+        writer = AsyncMysqlWriteBehind(db, batch_size=5, flush_interval_ms=10, queue_size=5)
+        for i in range(10):
+            await writer.put("comment", "comment_id", {"comment_id": i})
+        put_task = asyncio.create_task(writer.put("comment", "comment_id", {"comment_id": 10}))
+        await asyncio.sleep(0.05)
+        self.assertFalse(put_task.done())
+        await put_task
+        await writer.drain()
+        self.assertEqual(len(db.tables["comment"]), 11)
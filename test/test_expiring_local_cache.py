@@ -42,6 +42,36 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_clear_only_expired_keys(self):
+        self.cache.set('short', 'value', -1)
+        self.cache.set('long', 'value', 60)
+        self.cache.set('short', 'value', -1)
+        self.cache._clear()
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.get('long'), 'value')
+        self.assertEqual(self.cache.get_stats()["expirations"], 1)
+
+    def test_lru_bound(self):
+        cache = ExpiringLocalCache(cron_interval=10, max_entries=2)
+        cache.set('a', 1, 10)
+        cache.set('b', 2, 10)
+        cache.get('a')
+        cache.set('c', 3, 10)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        stats = cache.get_stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 1, 1))
+
+    def test_keys_glob(self):
+        self.cache.set('ppool_1.1.1.1', 'v', 10)
+        self.cache.set('ppool_2.2.2.2', 'v', 10)
+        self.cache.set('kuaidaili_1.1.1.1', 'v', 10)
+        self.cache.set('ppool_expired', 'v', -1)
+        self.assertCountEqual(self.cache.keys('ppool_*'), ['ppool_1.1.1.1', 'ppool_2.2.2.2'])
+        self.assertEqual(self.cache.keys('*_1.1.1.?'), ['ppool_1.1.1.1', 'kuaidaili_1.1.1.1'])
+        self.assertEqual(self.cache.keys('ppool'), [])
+
     def tearDown(self):
         del self.cache
 
@@ -0,0 +1,46 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+from unittest import IsolatedAsyncioTestCase
+
+from test.local_http_server import LocalHttpServer
+from tools.http_client import AsyncHttpClientPool
+
+
+class TestAsyncHttpClientPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = await LocalHttpServer().start()
+        self.pool = AsyncHttpClientPool()
+
+    async def test_reuse_connection(self):
+        for _ in range(10):
+            response = await self.pool.get_client().get(f"{self.server.base_url}/ping")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.request_count, 10)
+        self.assertEqual(self.server.connection_count, 1)
+
+    async def test_client_per_proxy(self):
+        proxies = {"http://": "http://127.0.0.1:1"}
+        self.assertIs(self.pool.get_client(), self.pool.get_client())
+        self.assertIs(self.pool.get_client(proxies), self.pool.get_client(dict(proxies)))
+        self.assertIsNot(self.pool.get_client(), self.pool.get_client(proxies))
+
+    async def test_aclose(self):
+        client = self.pool.get_client()
+        await self.pool.aclose()
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(client, self.pool.get_client())
+
+    async def asyncTearDown(self):
+        await self.pool.aclose()
+        await self.server.stop()
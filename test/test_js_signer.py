@@ -0,0 +1,91 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+import execjs
+
+from tools.js_signer import JsSignError, JsSignWorkerPool
+
+ZHIHU_SIGN_JS = "libs/zhihu.js"
+ZHIHU_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+ZHIHU_COOKIES = "d_c0=AHDTnZ0XEhmPTqyTm2mXNPpRZ1XVqXfYSAY=|1723014488; _xsrf=abc"
+
+
+class FakeWorker:
+    """
+    签名进程替身，fail 为 True 时写入管道失败
+    """
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.is_alive = True
+        self.pending_count = 0
+
+    def submit(self, requests):
+        if self.fail:
+            raise BrokenPipeError("stdin closed")
+        for request_id, _, args, future in requests:
+            future.set_result(args)
+
+
+class TestJsSignWorkerPoolDispatch(IsolatedAsyncioTestCase):
+
+    async def test_submit_error_fails_only_its_chunk(self):
+        pool = JsSignWorkerPool(ZHIHU_SIGN_JS, size=2)
+        pool._workers = [FakeWorker(fail=True), FakeWorker()]
+        with mock.patch.object(JsSignWorkerPool, "is_node_available", return_value=True), \
+                mock.patch.object(pool, "_ensure_workers"):
+            results = await asyncio.wait_for(
+                asyncio.gather(*[pool.call("get_sign", i) for i in range(6)], return_exceptions=True), timeout=1
+            )
+        self.assertTrue(all(isinstance(result, JsSignError) for result in results[:3]))
+        self.assertEqual(results[3:], [[3], [4], [5]])
+
+
+@unittest.skipUnless(JsSignWorkerPool.is_node_available(), "node is not installed")
+class TestJsSignWorkerPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pool = JsSignWorkerPool(ZHIHU_SIGN_JS, size=2)
+
+    async def test_same_result_as_execjs(self):
+        with open(ZHIHU_SIGN_JS, encoding="utf-8-sig") as f:
+            expected = execjs.compile(f.read()).call("get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+        result = await self.pool.call("get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+        self.assertEqual(result["x-zst-81"], expected["x-zst-81"])
+        self.assertEqual(len(result["x-zse-96"]), len(expected["x-zse-96"]))
+
+    async def test_concurrent_calls_are_batched(self):
+        urls = [f"{ZHIHU_URL}&page={i}" for i in range(50)]
+        results = await asyncio.gather(*[self.pool.call("get_sign", url, ZHIHU_COOKIES) for url in urls])
+        self.assertEqual(len(results), 50)
+        self.assertTrue(all(r["x-zse-96"].startswith("2.0_") for r in results))
+
+    async def test_error_and_restart(self):
+        with self.assertRaises(JsSignError):
+            await self.pool.call("function_not_exists")
+        await self.pool.close()
+        result = await self.pool.call("get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+        self.assertIn("x-zse-96", result)
+
+    async def test_unserializable_args(self):
+        results = await asyncio.wait_for(asyncio.gather(
+            self.pool.call("get_sign", object(), ZHIHU_COOKIES), return_exceptions=True), timeout=5)
+        self.assertIsInstance(results[0], JsSignError)
+        result = await self.pool.call("get_sign", ZHIHU_URL, ZHIHU_COOKIES)
+        self.assertIn("x-zse-96", result)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
@@ -0,0 +1,128 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+import httpx
+
+from base.base_crawler import AbstractApiClient
+from model.m_baidu_tieba import TiebaCommentRecord
+from tools import json_codec
+
+# 各平台接口响应、存储数据的典型结构
+PLATFORM_PAYLOADS = {
+    "xhs": {"code": 0, "success": True, "data": {"items": [{"id": "66fad51c000000001b0224b8", "model_type": "note",
+            "note_card": {"display_title": "周末去哪儿😊", "interact_info": {"liked_count": "1.2万", "liked": False},
+                          "image_list": [{"width": 1080, "height": 1440, "info_list": []}], "user": None}}],
+            "has_more": True}},
+    "douyin": {"status_code": 0, "aweme_list": [{"aweme_id": "7291234567890123456", "desc": "#旅行 记录生活",
+               "statistics": {"digg_count": 12345, "share_count": 0}, "create_time": 1700000000,
+               "author": {"uid": "1234567890", "nickname": "抖音用户", "sec_uid": "MS4wLjABAAAA"},
+               "video": {"duration": 15.5, "play_addr": {"url_list": ["https://v26.douyinvod.com/a.mp4"]}}}],
+               "cursor": 10, "has_more": 1},
+    "bilibili": {"code": 0, "message": "0", "ttl": 1, "data": {"View": {"aid": 113000000000001, "bvid": "BV1xx411c7mD",
+                 "title": "【4K】测试视频", "stat": {"view": 1000000, "danmaku": 2048, "coin": 3.0}}}},
+    "kuaishou": {"data": {"visionProfilePhotoList": {"result": 1, "pcursor": "no_more", "feeds": [
+                 {"photo": {"id": "3xabc", "caption": "快手\n换行\t制表", "likeCount": "1.1w", "timestamp": 1700000000000}}]}}},
+    "weibo": {"ok": 1, "data": {"cards": [{"card_type": 9, "mblog": {"id": "5012345678901234", "text": "<a href=\"/n/用户\">@用户</a> 转发微博 \\ \"引号\"",
+              "reposts_count": 3, "pic_ids": [], "region_name": "发布于 北京"}}]}},
+    "tieba": {"note_id": "9117888152", "title": "贴吧帖子", "total_replay_num": 0, "total_replay_page": "",
+              "ip_location": "", "publish_time": "2024-07-27 20:00", "sub_comment_count": 0},
+    "zhihu": {"paging": {"is_end": False, "next": "https://www.zhihu.com/api/v4/search_v3?offset=20"}, "data": [
+              {"type": "search_result", "object": {"id": "1234", "voteup_count": 99, "content": "<p>答案 &amp; 内容</p>",
+               "excerpt": " 分隔符", "created_time": 1700000000}}]},
+}
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def tearDown(self):
+        json_codec.set_json_backend()
+
+    def available_backends(self):
+        return [name for name, available in json_codec.available_backends().items() if available]
+
+    def test_round_trip_platform_payloads(self):
+        for backend in self.available_backends():
+            codec = json_codec.create_json_codec(backend)
+            for platform, payload in PLATFORM_PAYLOADS.items():
+                with self.subTest(backend=backend, platform=platform):
+                    self.assertEqual(codec.loads(codec.dumps(payload)), payload)
+                    self.assertEqual(codec.loads(codec.dumps(payload, indent=4)), payload)
+                    data = codec.dumps_bytes(payload)
+                    self.assertIsInstance(data, bytes)
+                    self.assertEqual(codec.loads(data), payload)
+                    # 和标准库互通
+                    self.assertEqual(json.loads(data), payload)
+                    self.assertEqual(codec.loads(json.dumps(payload)), payload)
+
+    def test_non_ascii_not_escaped(self):
+        for backend in self.available_backends():
+            with self.subTest(backend=backend):
+                codec = json_codec.create_json_codec(backend)
+                self.assertIn("周末去哪儿😊", codec.dumps(PLATFORM_PAYLOADS["xhs"]))
+                self.assertNotIn("\n", codec.dumps(PLATFORM_PAYLOADS["kuaishou"]))
+                self.assertEqual(codec.loads(codec.dumps({1: "a"})), {"1": "a"})
+
+    def test_encode_records(self):
+        record = TiebaCommentRecord(comment_id="1", content="楼主好人", note_id="100", note_url="https://tieba.baidu.com/p/100",
+                                    tieba_id="9", tieba_name="编程吧", tieba_link="https://tieba.baidu.com/f?kw=编程")
+        for backend in self.available_backends():
+            with self.subTest(backend=backend):
+                codec = json_codec.create_json_codec(backend)
+                self.assertEqual(codec.loads(codec.dumps([record], indent=4)), [record.model_dump()])
+                self.assertEqual(codec.loads(codec.dumps_bytes(record)), record.model_dump())
+                with self.assertRaises(TypeError):
+                    codec.dumps(object())
+
+    def test_stdlib_output_unchanged(self):
+        codec = json_codec.create_json_codec("json")
+        for payload in PLATFORM_PAYLOADS.values():
+            self.assertEqual(codec.dumps(payload), json.dumps(payload, ensure_ascii=False))
+            self.assertEqual(codec.dumps(payload, indent=4), json.dumps(payload, ensure_ascii=False, indent=4))
+
+    def test_decode_error(self):
+        for backend in self.available_backends():
+            with self.subTest(backend=backend):
+                with self.assertRaises(json.JSONDecodeError):
+                    json_codec.create_json_codec(backend).loads(b"<html>")
+
+    def test_backend_selection(self):
+        self.assertEqual(json_codec.set_json_backend("json"), "json")
+        self.assertEqual(json_codec.get_json_backend(), "json")
+        self.assertIn(json_codec.set_json_backend("auto"), self.available_backends())
+        with self.assertRaises(ValueError):
+            json_codec.create_json_codec("ujson")
+        for name, available in json_codec.available_backends().items():
+            if not available:
+                with self.assertRaises(ValueError):
+                    json_codec.create_json_codec(name)
+
+    def test_parse_json_response(self):
+        payload = PLATFORM_PAYLOADS["weibo"]
+        response = httpx.Response(200, content=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                                  headers={"Content-Type": "application/json; charset=utf-8"})
+        self.assertEqual(AbstractApiClient.parse_json(response), payload)
+        response = httpx.Response(200, content=json.dumps(payload, ensure_ascii=False).encode("gbk"),
+                                  headers={"Content-Type": "application/json; charset=gbk"})
+        self.assertEqual(AbstractApiClient.parse_json(response), payload)
+        response = httpx.Response(200, content=json.dumps(payload).encode("utf-8"))
+        self.assertEqual(AbstractApiClient.parse_json(response), payload)
+        # Python 不认识的 charset 和 response.json() 一样按 utf-8 解析
+        response = httpx.Response(200, content=b'{"a":1}',
+                                  headers={"Content-Type": "application/json; charset=utf8mb4"})
+        self.assertEqual(AbstractApiClient.parse_json(response), {"a": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
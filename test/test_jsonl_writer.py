@@ -0,0 +1,72 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from tools.jsonl_writer import AsyncJsonlWriter, convert_jsonl_to_json
+
+
+class TestAsyncJsonlWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "sub", "search_comments.jsonl")
+        self.writer = AsyncJsonlWriter(flush_batch_size=3, flush_interval=3600, fsync=False)
+
+    def read_lines(self):
+        if not os.path.exists(self.file_path):
+            return []
+        with open(self.file_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    async def test_buffered_flush(self):
+        await self.writer.write(self.file_path, {"comment_id": "1"})
+        await self.writer.write(self.file_path, {"comment_id": "2"})
+        self.assertEqual(self.read_lines(), [])
+        await self.writer.write(self.file_path, {"comment_id": "3"})
+        self.assertEqual([item["comment_id"] for item in self.read_lines()], ["1", "2", "3"])
+        await self.writer.write(self.file_path, {"comment_id": "4"})
+        await self.writer.close(convert_to_json=False)
+        self.assertEqual(len(self.read_lines()), 4)
+
+    async def test_interval_flush_without_more_writes(self):
+        writer = AsyncJsonlWriter(flush_batch_size=100, flush_interval=0.05, fsync=False)
+        await writer.write(self.file_path, {"comment_id": "1"})
+        self.assertEqual(self.read_lines(), [])
+        # 之后没有新的写入，缓冲也会在刷新间隔后由后台任务写入文件
+        await asyncio.sleep(0.1)
+        self.assertEqual([item["comment_id"] for item in self.read_lines()], ["1"])
+        await writer.write(self.file_path, {"comment_id": "2"})
+        await writer.close(convert_to_json=False)
+        self.assertEqual(len(self.read_lines()), 2)
+
+    async def test_convert_to_legacy_json(self):
+        items = [{"note_id": str(i), "content": f"内容\n{i}", "tags": ["a", {"b": i}], "empty": {}} for i in range(5)]
+        for item in items:
+            await self.writer.write(self.file_path, item)
+        await self.writer.close(convert_to_json=True)
+        with open(self.file_path[:-1], encoding="utf-8") as f:
+            self.assertEqual(f.read(), json.dumps(items, ensure_ascii=False, indent=4))
+
+    async def test_convert_empty_file(self):
+        empty_path = os.path.join(self.tmp_dir.name, "empty.jsonl")
+        open(empty_path, "w").close()
+        with open(convert_jsonl_to_json(empty_path), encoding="utf-8") as f:
+            self.assertEqual(f.read(), json.dumps([], indent=4))
+
+    async def asyncTearDown(self):
+        await self.writer.close(convert_to_json=False)
+        self.tmp_dir.cleanup()
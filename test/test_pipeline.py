@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.pipeline import CrawlerPipeline
+from var import source_keyword_var
+
+
+class TestCrawlerPipeline(IsolatedAsyncioTestCase):
+
+    async def test_stages_overlap(self):
+        events = []
+
+        async def search(keyword, emit):
+            for page in range(3):
+                events.append(("search", keyword, page))
+                await emit((keyword, page))
+
+        async def comments(item, _):
+            events.append(("comments",) + item)
+            await asyncio.sleep(0.01)
+
+        pipeline = (
+            CrawlerPipeline("test")
+            .add_stage("search", search)
+            .add_stage("comments", comments, workers=2, queue_size=1)
+        )
+        await pipeline.run(["a", "b"])
+
+        self.assertEqual(len([e for e in events if e[0] == "comments"]), 6)
+        # 第一页的评论开始处理时，搜索仍在继续翻页，而不是等所有搜索结束
+        first_comment = events.index(("comments", "a", 0))
+        last_search = events.index(("search", "b", 2))
+        self.assertLess(first_comment, last_search)
+
+    async def test_queue_is_bounded(self):
+        max_qsize = 0
+        pipeline = CrawlerPipeline("test")
+
+        async def search(_, emit):
+            for i in range(50):
+                await emit(i)
+
+        async def slow(_, __):
+            nonlocal max_qsize
+            max_qsize = max(max_qsize, pipeline.stages[1].queue.qsize())
+            await asyncio.sleep(0)
+
+        pipeline.add_stage("search", search).add_stage("slow", slow, workers=1, queue_size=3)
+        await pipeline.run(["keyword"])
+        self.assertLessEqual(max_qsize, 3)
+        self.assertEqual(pipeline.stages[1].processed_count, 50)
+
+    async def test_context_and_errors(self):
+        stored = []
+
+        async def search(keyword, emit):
+            source_keyword_var.set(keyword)
+            await emit(keyword + "-1")
+            await emit("bad")
+
+        async def store(item, _):
+            if item == "bad":
+                raise ValueError(item)
+            stored.append((item, source_keyword_var.get()))
+
+        pipeline = (
+            CrawlerPipeline("test")
+            .add_stage("search", search)
+            .add_stage("store", store, workers=3)
+        )
+        await pipeline.run(["x", "y"])
+        self.assertCountEqual(stored, [("x-1", "x"), ("y-1", "y")])
+        self.assertEqual(pipeline.stages[1].error_count, 2)
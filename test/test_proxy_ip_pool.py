@@ -13,10 +13,21 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
-from unittest import IsolatedAsyncioTestCase
+import asyncio
+import gc
+import socket
+import statistics
+import time
+from typing import List
+from unittest import IsolatedAsyncioTestCase, mock
 
-from proxy.proxy_ip_pool import create_ip_pool
+import config
+from base.base_crawler import AbstractApiClient
+from proxy.base_proxy import ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool, create_ip_pool
 from proxy.types import IpInfoModel
+from test.local_http_server import LocalHttpServer
+from tools.rate_limiter import rate_limiter
 
 
 class TestIpPool(IsolatedAsyncioTestCase):
@@ -28,3 +39,238 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+def get_closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class DummyClient(AbstractApiClient):
+    platform = "proxy_test"
+
+    async def request(self, method, url, **kwargs):
+        response, _ = await self.send_request(method, url, **kwargs)
+        return response.json()
+
+    async def update_cookies(self, browser_context):
+        pass
+
+
+class LocalProxyProvider(ProxyProvider):
+    """
+    本地代理商替身，按顺序返回预先准备好的代理
+    """
+
+    def __init__(self, proxies: List[IpInfoModel]):
+        self.proxies = proxies
+        self.call_count = 0
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        self.call_count += 1
+        result, self.proxies = self.proxies[:num], self.proxies[num:]
+        return result
+
+
+def make_proxy(port: int, expired_time_ts: int = None) -> IpInfoModel:
+    return IpInfoModel(ip="127.0.0.1", port=port, user="user", password="pwd", protocol="http://",
+                       expired_time_ts=expired_time_ts)
+
+
+class TestLocalIpPool(IsolatedAsyncioTestCase):
+    """
+    本地 HTTP 服务同时充当代理服务器和验证地址
+    """
+
+    async def asyncSetUp(self):
+        self.servers = [await LocalHttpServer(delay=0.05).start() for _ in range(8)]
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            await server.stop()
+
+    def create_pool(self, proxies: List[IpInfoModel], ip_pool_count: int, low_watermark: int):
+        self.provider = LocalProxyProvider(proxies)
+        return ProxyIpPool(ip_pool_count, True, self.provider, low_watermark=low_watermark,
+                           valid_ip_url=f"{self.servers[0].base_url}/ip")
+
+    def validate_count(self) -> int:
+        return sum(server.request_count for server in self.servers)
+
+    async def test_invalid_proxy_filtered_and_get_without_validation(self):
+        dead_proxy = make_proxy(get_closed_port())
+        pool = self.create_pool([dead_proxy] + [make_proxy(server.port) for server in self.servers[:3]], 4, 1)
+        await pool.load_proxies()
+        self.assertEqual(len(pool.proxy_list), 3)
+        self.assertEqual(self.validate_count(), 3)
+        start = time.perf_counter()
+        proxy = await pool.get_proxy()
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertIn(proxy.port, [server.port for server in self.servers[:3]])
+        self.assertEqual(self.validate_count(), 3)
+        # 取出的代理留在池子中继续使用
+        self.assertEqual(len(pool.proxy_list), 3)
+        await pool.close()
+
+    async def test_background_refill_below_low_watermark(self):
+        pool = self.create_pool([make_proxy(server.port) for server in self.servers], 4, 2)
+        await pool.load_proxies()
+        self.assertEqual((len(pool.proxy_list), self.provider.call_count), (4, 1))
+        pool.mark_blocked(await pool.get_proxy())
+        self.assertEqual(self.provider.call_count, 1)
+        pool.mark_blocked(await pool.get_proxy())
+        pool.mark_blocked(await pool.get_proxy())
+        # 低于水位后立即返回，补充在后台进行
+        self.assertEqual(len(pool.proxy_list), 1)
+        await pool._refill_task
+        self.assertEqual((len(pool.proxy_list), self.provider.call_count), (4, 2))
+        await pool.close()
+
+    async def test_refill_checked_after_get_proxy(self):
+        pool = self.create_pool([make_proxy(server.port) for server in self.servers[:2]], 4, 3)
+        await pool.load_proxies()
+        self.assertEqual((len(pool.proxy_list), self.provider.call_count), (2, 1))
+        self.provider.proxies = [make_proxy(server.port) for server in self.servers[2:4]]
+        # 没有代理被移出，取代理时发现低于水位也会在后台补充
+        await pool.get_proxy()
+        self.assertEqual(len(pool.proxy_list), 2)
+        await pool._refill_task
+        self.assertEqual((len(pool.proxy_list), self.provider.call_count), (4, 2))
+        await pool.close()
+
+    async def test_background_refill_error_is_logged(self):
+        pool = self.create_pool([make_proxy(server.port) for server in self.servers[:2]], 2, 2)
+        await pool.load_proxies()
+        loop_errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop_errors.append(context))
+        with mock.patch.object(pool, "_refill", side_effect=RuntimeError("provider down")), \
+                mock.patch("proxy.proxy_ip_pool.utils.logger") as logger:
+            pool.mark_blocked(pool.proxy_list[0])
+            await asyncio.wait([pool._refill_task])
+            # 任务被回收时如果异常没有被取出，asyncio 会报 Future exception was never retrieved
+            pool._refill_task = None
+            gc.collect()
+        self.assertIn("provider down", logger.error.call_args[0][0])
+        self.assertEqual(loop_errors, [])
+        await pool.close()
+
+    async def test_validate_concurrently(self):
+        pool = self.create_pool([make_proxy(server.port) for server in self.servers], 8, 1)
+        start = time.perf_counter()
+        await pool.load_proxies()
+        self.assertEqual(len(pool.proxy_list), 8)
+        # 8 个代理每个验证耗时 0.05s，并发 5 个验证两轮完成
+        self.assertLess(time.perf_counter() - start, 0.3)
+        await pool.close()
+
+    async def test_skip_expired_proxy(self):
+        expired_proxy = make_proxy(self.servers[0].port, int(time.time()) + 1)
+        pool = self.create_pool([expired_proxy, make_proxy(self.servers[1].port)], 2, 1)
+        await pool.load_proxies()
+        await asyncio.sleep(1.1)
+        self.assertEqual((await pool.get_proxy()).port, self.servers[1].port)
+        await pool.close()
+
+    async def test_weighted_by_health(self):
+        proxies = [make_proxy(server.port) for server in self.servers[:2]]
+        pool = ProxyIpPool(2, False, LocalProxyProvider(proxies))
+        await pool.load_proxies()
+        fast, slow = proxies
+        for _ in range(10):
+            pool.report_success(fast, 0.05)
+            pool.report_success(slow, 0.5)
+            pool.report_failure(slow)
+            pool.report_success(slow, 0.5)
+        self.assertEqual(pool.get_stats(fast).p50_latency, 0.05)
+        self.assertAlmostEqual(pool.get_stats(slow).success_rate, 21 / 32)
+        picked = [(await pool.get_proxy()).port for _ in range(300)]
+        self.assertGreater(picked.count(fast.port), picked.count(slow.port) * 5)
+
+    async def test_scores_updated_on_report(self):
+        proxies = [make_proxy(server.port) for server in self.servers[:3]]
+        pool = ProxyIpPool(3, False, LocalProxyProvider(proxies))
+        await pool.load_proxies()
+        pool.report_success(proxies[0], 0.1)
+        pool.report_success(proxies[0], 0.3)
+        pool.report_success(proxies[1], 0.4)
+        pool.report_failure(proxies[1])
+
+        def expected_scores():
+            default_latency = statistics.median([0.2, 0.4])
+            return {pool.get_proxy_key(proxy): pool._score(proxy, default_latency) for proxy in pool.proxy_list}
+
+        self.assertEqual(pool._scores, expected_scores())
+        # 选择代理时不再计算延迟中位数和健康分
+        with mock.patch("statistics.median", side_effect=AssertionError), \
+                mock.patch.object(pool, "_score", side_effect=AssertionError):
+            for _ in range(20):
+                await pool.get_proxy()
+        pool.mark_blocked(proxies[0])
+        self.assertEqual(pool._default_latency, 0.4)
+        self.assertEqual(set(pool._scores), {pool.get_proxy_key(proxy) for proxy in proxies[1:]})
+
+    async def test_remove_after_consecutive_failures(self):
+        proxies = [make_proxy(server.port) for server in self.servers[:2]]
+        pool = ProxyIpPool(2, False, LocalProxyProvider(proxies), low_watermark=1)
+        await pool.load_proxies()
+        pool.report_failure(proxies[0])
+        pool.report_success(proxies[0], 0.1)
+        pool.report_failure(proxies[0])
+        pool.report_failure(proxies[0])
+        self.assertEqual(len(pool.proxy_list), 2)
+        pool.report_failure(proxies[0])
+        self.assertEqual(list(pool.proxy_list), [proxies[1]])
+
+    async def test_sticky_session_and_rotate(self):
+        proxies = [make_proxy(server.port) for server in self.servers[:4]]
+        provider = LocalProxyProvider(proxies + [make_proxy(self.servers[4].port)])
+        pool = ProxyIpPool(4, False, provider, low_watermark=4)
+        await pool.load_proxies()
+        first = await pool.get_proxy(session_key="account_a")
+        for _ in range(20):
+            self.assertIs(await pool.get_proxy(session_key="account_a"), first)
+        rotated = await pool.rotate_proxy("account_a", first)
+        self.assertNotEqual(rotated.port, first.port)
+        self.assertIs(await pool.get_proxy(session_key="account_a"), rotated)
+        self.assertNotIn(first, pool.proxy_list)
+        # 被封的代理不会在补充时重新放回池子
+        provider.proxies.append(first)
+        await pool._refill_task
+        self.assertEqual(len(pool.proxy_list), 4)
+        self.assertNotIn(first.port, [proxy.port for proxy in pool.proxy_list])
+
+    async def test_client_rotate_once_on_concurrent_block(self):
+        proxies = [make_proxy(server.port) for server in self.servers[:3]]
+        pool = ProxyIpPool(3, False, LocalProxyProvider(proxies))
+        await pool.load_proxies()
+        client = DummyClient()
+        client.bind_proxy_pool(pool, await pool.get_proxy(session_key=client.platform))
+        blocked = client.ip_proxy_info
+        with mock.patch.object(config, "IP_PROXY_SPREAD_REQUESTS", False):
+            await asyncio.gather(*[client.rotate_proxy(blocked) for _ in range(3)])
+        self.assertEqual(len(pool.proxy_list), 2)
+        self.assertIsNot(client.ip_proxy_info, blocked)
+        self.assertIn(str(client.ip_proxy_info.port), list(client.proxies.values())[0])
+
+    async def test_client_spread_requests_across_proxies(self):
+        async def crawl(servers) -> float:
+            pool = ProxyIpPool(len(servers), False, LocalProxyProvider([make_proxy(item.port) for item in servers]))
+            await pool.load_proxies()
+            client = DummyClient()
+            client.bind_proxy_pool(pool, await pool.get_proxy(session_key=client.platform))
+            start = time.perf_counter()
+            await asyncio.gather(*[client.request("GET", f"{servers[0].base_url}/api") for _ in range(20)])
+            cost = time.perf_counter() - start
+            # 每个代理各自一个长连接客户端
+            self.assertEqual(len(client.http_pool._clients), len(servers))
+            await client.close()
+            return cost
+
+        # 每个代理每秒 20 个请求，不允许突发
+        with mock.patch.dict(rate_limiter.rules, {DummyClient.platform: {"default": (20, 1)}}), \
+                mock.patch.object(config, "IP_PROXY_SPREAD_REQUESTS", True):
+            single_cost = await crawl(self.servers[:1])
+            spread_cost = await crawl(self.servers[1:5])
+        self.assertGreater(single_cost, 0.8)
+        self.assertLess(spread_cost, single_cost * 0.7)
+        self.assertTrue(all(server.request_count > 0 for server in self.servers[1:5]))
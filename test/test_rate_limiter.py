@@ -0,0 +1,55 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.rate_limiter import RateLimiter, TokenBucket
+
+RULES = {
+    "xhs": {"default": (20, 2), "/comment/": (50, 1)},
+}
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+
+    async def test_token_bucket_rate(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(6)])
+        # 2 个突发令牌立即放行，剩下 4 个按每秒 20 个补充
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 0.5)
+
+    def test_endpoint_family(self):
+        limiter = RateLimiter(RULES, enabled=True)
+        self.assertEqual(limiter.get_endpoint_family("xhs", "https://x/api/sns/web/v2/comment/page"), "/comment/")
+        self.assertEqual(limiter.get_endpoint_family("xhs", "https://x/api/sns/web/v1/feed"), "default")
+        self.assertIsNone(limiter.get_endpoint_family("dy", "https://x/aweme/v1/web/comment/list/"))
+
+    def test_bucket_per_proxy_and_family(self):
+        limiter = RateLimiter(RULES, enabled=True)
+        url = "https://x/api/sns/web/v1/feed"
+        bucket = limiter.get_bucket("xhs", url)
+        self.assertIs(bucket, limiter.get_bucket("xhs", url + "?a=1"))
+        self.assertIsNot(bucket, limiter.get_bucket("xhs", url, {"https://": "http://127.0.0.1:1"}))
+        self.assertIsNot(bucket, limiter.get_bucket("xhs", "https://x/api/sns/web/v2/comment/page"))
+        self.assertIsNone(limiter.get_bucket("dy", url))
+
+    async def test_disabled(self):
+        limiter = RateLimiter({"xhs": {"default": (1, 1)}}, enabled=False)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire("xhs", "https://x/api")
+        self.assertLess(time.monotonic() - start, 0.1)
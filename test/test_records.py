@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import pickle
+import unittest
+
+from pydantic import BaseModel, Field
+
+from model.m_baidu_tieba import TiebaComment, TiebaCommentRecord
+from model.record import SlotsRecord, record_slots
+
+COMMENT_FIELDS = dict(
+    comment_id="1", content="楼主好人", note_id="100", note_url="https://tieba.baidu.com/p/100",
+    tieba_id="9", tieba_name="编程吧", tieba_link="https://tieba.baidu.com/f?kw=编程",
+)
+
+
+class TestSlotsRecord(unittest.TestCase):
+
+    def test_defaults_and_model_dump(self):
+        record = TiebaCommentRecord(**COMMENT_FIELDS)
+        self.assertEqual(record.sub_comment_count, 0)
+        self.assertEqual(record.model_dump(), TiebaComment(**COMMENT_FIELDS).model_dump())
+        self.assertEqual(list(record.model_dump()), list(TiebaComment.model_fields))
+        self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_missing_or_unexpected_field(self):
+        fields = dict(COMMENT_FIELDS)
+        del fields["content"]
+        with self.assertRaises(TypeError):
+            TiebaCommentRecord(**fields)
+        with self.assertRaises(TypeError):
+            TiebaCommentRecord(like_count=1, **COMMENT_FIELDS)
+
+    def test_validate(self):
+        record = TiebaCommentRecord.validate(sub_comment_count="12", **COMMENT_FIELDS)
+        self.assertEqual(record.sub_comment_count, 12)
+        self.assertEqual(record, TiebaCommentRecord(sub_comment_count=12, **COMMENT_FIELDS))
+        self.assertNotEqual(record, TiebaCommentRecord(**COMMENT_FIELDS))
+
+    def test_mapping_interface(self):
+        record = TiebaCommentRecord(**COMMENT_FIELDS)
+        self.assertEqual(record.keys(), tuple(TiebaComment.model_fields))
+        self.assertEqual(list(record.values()), list(record.model_dump().values()))
+        self.assertEqual(dict(record.items()), record.model_dump())
+        self.assertEqual(dict(record), record.model_dump())
+        self.assertEqual(dict(record, add_ts=1), dict(record.model_dump(), add_ts=1))
+        self.assertEqual(record["content"], "楼主好人")
+        self.assertEqual(record.get("like_count", 0), 0)
+        self.assertIn("content", record)
+        self.assertNotIn("model_dump", record)
+        self.assertEqual(len(record), len(TiebaComment.model_fields))
+        with self.assertRaises(KeyError):
+            record["model_dump"]
+
+    def test_pickle(self):
+        record = TiebaCommentRecord(**COMMENT_FIELDS)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_slots_must_match_model(self):
+        class Item(BaseModel):
+            item_id: str = Field(...)
+            title: str = Field(default="")
+
+        with self.assertRaises(TypeError):
+            class ItemRecord(SlotsRecord, model=Item):
+                __slots__ = ("item_id",)
+
+        class ItemRecord(SlotsRecord, model=Item):
+            __slots__ = record_slots(Item)
+
+        self.assertEqual(ItemRecord(item_id="1").model_dump(), {"item_id": "1", "title": ""})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.signing_context import BrowserBatchSigner, BrowserSignError, SigningContextCache
+
+
+class FakePage:
+    """
+    模拟 playwright 页面，统计 evaluate 调用次数
+    """
+
+    def __init__(self):
+        self.local_storage = {"b1": "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorW"}
+        self.evaluate_calls = []
+
+    async def evaluate(self, expression, arg=None):
+        self.evaluate_calls.append(expression)
+        await asyncio.sleep(0.01)
+        if "_webmsxyw" in expression:
+            return [[True, self._webmsxyw(*args)] for args in arg]
+        return {key: self.local_storage.get(key) for key in arg}
+
+    @staticmethod
+    def _webmsxyw(url, data):
+        return {"X-s": "XYW_eyJzaWduU3ZuIjoiNTYiLCJzaWduVHlwZSI6IngyIiwiYXBwSWQiOiJ4aHMtcGMtd2ViIn0=", "X-t": 1700000000000}
+
+
+class FakeBrowserContext:
+
+    async def cookies(self):
+        return [{"name": "a1", "value": "new_a1"}]
+
+
+class TestSigningContextCache(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_get_loads_once(self):
+        cache = SigningContextCache(ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        self.assertEqual(await asyncio.gather(*[cache.get("b1", loader) for _ in range(10)]), [1] * 10)
+        self.assertEqual(await cache.get("b1", loader), 1)
+        self.assertEqual(calls, 1)
+
+    async def test_expire_and_invalidate(self):
+        cache = SigningContextCache(ttl=0.05)
+        values = iter(range(10))
+
+        async def loader():
+            return next(values)
+
+        self.assertEqual(await cache.get("b1", loader), 0)
+        await asyncio.sleep(0.06)
+        self.assertEqual(await cache.get("b1", loader), 1)
+        cache.invalidate()
+        self.assertEqual(await cache.get("b1", loader), 2)
+
+    async def test_load_before_invalidate_is_not_cached(self):
+        cache = SigningContextCache(ttl=60)
+        values = iter(range(10))
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return next(values)
+
+        task = asyncio.ensure_future(cache.get("b1", loader))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        self.assertEqual(await task, 0)
+        self.assertEqual(await cache.get("b1", loader), 1)
+
+    async def test_loader_error_is_not_cached(self):
+        cache = SigningContextCache(ttl=60)
+
+        async def failed_loader():
+            raise ValueError("page closed")
+
+        async def loader():
+            return "b1_value"
+
+        with self.assertRaises(ValueError):
+            await cache.get("b1", failed_loader)
+        self.assertEqual(await cache.get("b1", loader), "b1_value")
+
+    async def test_xhs_pre_headers_reads_local_storage_once(self):
+        page = FakePage()
+        client = XiaoHongShuClient(headers={}, playwright_page=page, cookie_dict={"a1": "a1_value"})
+        await asyncio.gather(*[client._pre_headers("/api/sns/web/v1/search/notes") for _ in range(5)])
+        # 5 次 _webmsxyw 签名合并成 1 次 + 1 次 localStorage 读取
+        self.assertEqual(len(page.evaluate_calls), 2)
+        await client._pre_headers("/api/sns/web/v1/feed")
+        self.assertEqual(len(page.evaluate_calls), 3)
+
+        await client.update_cookies(FakeBrowserContext())
+        page.local_storage["b1"] = page.local_storage["b1"][::-1]
+        await client._pre_headers("/api/sns/web/v1/feed")
+        self.assertEqual(len(page.evaluate_calls), 5)
+        self.assertEqual(client.cookie_dict["a1"], "new_a1")
+
+    async def test_xhs_pre_headers_not_shared(self):
+        page = FakePage()
+        page._webmsxyw = lambda url, data: {"X-s": f"XYW_{url}", "X-t": 1700000000000}
+        client = XiaoHongShuClient(headers={"Cookie": "a1=a1_value"}, playwright_page=page, cookie_dict={"a1": "a1_value"})
+        headers_a, headers_b = await asyncio.gather(client._pre_headers("/a?n=1"), client._pre_headers("/b?n=2"))
+        self.assertNotEqual(headers_a["X-S"], headers_b["X-S"])
+        self.assertEqual(headers_a["Cookie"], "a1=a1_value")
+        self.assertEqual(client.headers, {"Cookie": "a1=a1_value"})
+
+
+class EchoSignPage:
+    """
+    模拟页面上的签名函数，返回参数本身，url 为 error 时签名函数抛出异常
+    """
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batch_sizes = []
+
+    async def evaluate(self, expression, items):
+        self.batch_sizes.append(len(items))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("Target page, context or browser has been closed")
+        return [[False, "Error: sign failed"] if url == "error" else [True, [url, data]] for url, data in items]
+
+
+class TestBrowserBatchSigner(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_evaluate(self):
+        page = EchoSignPage()
+        signer = BrowserBatchSigner(page, "_webmsxyw", window=0.005, max_batch_size=50)
+        results = await asyncio.gather(*[signer.sign(f"/api/{i}", {"page": i}) for i in range(20)])
+        self.assertEqual(results, [[f"/api/{i}", {"page": i}] for i in range(20)])
+        self.assertEqual(page.batch_sizes, [20])
+
+    async def test_max_batch_size(self):
+        page = EchoSignPage()
+        signer = BrowserBatchSigner(page, "_webmsxyw", window=0.05, max_batch_size=4)
+        results = await asyncio.gather(*[signer.sign(f"/api/{i}", None) for i in range(10)])
+        self.assertEqual([url for url, _ in results], [f"/api/{i}" for i in range(10)])
+        # 达到上限立即发送，剩余的请求等待窗口结束后发送
+        self.assertEqual(page.batch_sizes, [4, 4, 2])
+
+    async def test_errors(self):
+        signer = BrowserBatchSigner(EchoSignPage(), "_webmsxyw", window=0)
+        results = await asyncio.gather(signer.sign("/api/1", None), signer.sign("error", None), return_exceptions=True)
+        self.assertEqual(results[0], ["/api/1", None])
+        self.assertIsInstance(results[1], BrowserSignError)
+
+        signer = BrowserBatchSigner(EchoSignPage(fail=True), "_webmsxyw", window=0)
+        results = await asyncio.gather(signer.sign("/api/1", None), signer.sign("/api/2", None), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import csv
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+import store.bilibili as bilibili_store
+import store.douyin as douyin_store
+import store.kuaishou as kuaishou_store
+import store.weibo as weibo_store
+import store.xhs as xhs_store
+from model.m_bilibili import BilibiliVideoCommentRecord
+from model.m_douyin import DouyinAwemeCommentRecord
+from model.m_kuaishou import KuaishouVideoCommentRecord
+from model.m_weibo import WeiboNoteCommentRecord
+from model.m_xiaohongshu import XhsNoteComment, XhsNoteCommentRecord, XhsNoteRecord
+
+XHS_COMMENT = {
+    "id": "66fad5c7000000001a02a9c2", "content": "求链接", "create_time": 1727700000000, "ip_location": "上海",
+    "like_count": "12", "sub_comment_count": "3", "pictures": [{"url_default": "https://sns-img.xhscdn.com/1.jpg"}],
+    "user_info": {"user_id": "5f0b3a2c0000000001004a1b", "nickname": "小红薯", "image": "https://sns-avatar.xhscdn.com/1.jpg"},
+    "target_comment": {"id": "66fad5c7000000001a02a9c1"},
+}
+
+
+class FakeStore:
+
+    def __init__(self):
+        self.contents = []
+        self.comments = []
+
+    async def store_content(self, content_item):
+        self.contents.append(content_item)
+
+    async def store_comment(self, comment_item):
+        self.comments.append(comment_item)
+
+
+class TestStoreRecords(IsolatedAsyncioTestCase):
+
+    def patch_store(self, factory) -> FakeStore:
+        fake_store = FakeStore()
+        patcher = patch.object(factory, "create_store", return_value=fake_store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return fake_store
+
+    async def test_xhs_note_comment(self):
+        fake_store = self.patch_store(xhs_store.XhsStoreFactory)
+        await xhs_store.update_xhs_note_comment("66fad51c000000001b0224b8", XHS_COMMENT)
+        comment = fake_store.comments[0]
+        self.assertIsInstance(comment, XhsNoteCommentRecord)
+        self.assertEqual(list(comment.keys()), list(XhsNoteComment.model_fields))
+        self.assertEqual(comment.pictures, "https://sns-img.xhscdn.com/1.jpg")
+        self.assertEqual(comment.parent_comment_id, "66fad5c7000000001a02a9c1")
+        self.assertEqual(comment.note_id, "66fad51c000000001b0224b8")
+        self.assertEqual(comment.like_count, "12")
+        # 可信的解析结果同样能通过 pydantic 校验
+        self.assertEqual(XhsNoteCommentRecord.validate(**comment.model_dump()), comment)
+
+    async def test_xhs_note(self):
+        fake_store = self.patch_store(xhs_store.XhsStoreFactory)
+        await xhs_store.update_xhs_note({
+            "note_id": "66fad51c000000001b0224b8", "type": "normal", "title": "", "desc": "周末去哪儿", "time": 1727700000000,
+            "user": {"user_id": "5f0b3a2c0000000001004a1b", "nickname": "小红薯"}, "interact_info": {"liked_count": "1.2万"},
+            "image_list": [{"url_default": "https://sns-img.xhscdn.com/1.jpg"}], "xsec_token": "ABtoken",
+            "tag_list": [{"type": "topic", "name": "旅行"}, {"type": "location", "name": "上海"}],
+        })
+        note = fake_store.contents[0]
+        self.assertIsInstance(note, XhsNoteRecord)
+        self.assertEqual(note.title, "周末去哪儿")
+        self.assertEqual(note.image_list, "https://sns-img.xhscdn.com/1.jpg")
+        self.assertEqual(note.tag_list, "旅行")
+        self.assertEqual(note.liked_count, "1.2万")
+
+    async def test_other_platform_comments(self):
+        cases = (
+            (bilibili_store.BiliStoreFactory, bilibili_store.update_bilibili_video_comment, BilibiliVideoCommentRecord,
+             {"rpid": 2001, "parent": 2000, "ctime": 1700000000, "rcount": 2, "content": {"message": "三连了"},
+              "member": {"mid": "3", "uname": "B站用户", "sex": "保密", "sign": "", "avatar": "https://i0.hdslb.com/1.jpg"}}),
+            (douyin_store.DouyinStoreFactory, douyin_store.update_dy_aweme_comment, DouyinAwemeCommentRecord,
+             {"cid": "7301", "aweme_id": "100", "text": "三连了", "create_time": 1700000000, "digg_count": 5,
+              "user": {"uid": "3", "nickname": "抖音用户", "avatar_thumb": {"url_list": ["https://p3.douyinpic.com/1.jpg"]}}}),
+            (kuaishou_store.KuaishouStoreFactory, kuaishou_store.update_ks_video_comment, KuaishouVideoCommentRecord,
+             {"commentId": "901", "timestamp": 1700000000000, "content": "三连了", "authorId": "3", "authorName": "快手用户"}),
+            (weibo_store.WeibostoreFactory, weibo_store.update_weibo_note_comment, WeiboNoteCommentRecord,
+             {"id": 5001, "created_at": "Sat Oct 12 10:00:00 +0800 2024", "text": "<span>三连了</span>", "like_count": 5,
+              "source": "来自北京", "rootid": "5000", "user": {"id": 3, "screen_name": "微博用户"}}),
+        )
+        for factory, update_comment, record_class, comment_item in cases:
+            with self.subTest(record=record_class.__name__):
+                fake_store = self.patch_store(factory)
+                await update_comment("100", comment_item)
+                comment = fake_store.comments[0]
+                self.assertIsInstance(comment, record_class)
+                self.assertEqual(comment["content"], "三连了")
+                self.assertGreater(comment.get("last_modify_ts", 0), 0)
+
+    async def test_xhs_csv_and_db_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                patch.object(xhs_store.XhsCsvStoreImplement, "csv_store_path", tmp_dir):
+            comment = XhsNoteCommentRecord(comment_id="1", note_id="100", content="求链接", last_modify_ts=1)
+            await xhs_store.XhsCsvStoreImplement().store_comment(comment)
+            await xhs_store.XhsCsvStoreImplement().store_comment(comment)
+            csv_file = os.path.join(tmp_dir, os.listdir(tmp_dir)[0])
+            with open(csv_file, encoding="utf-8-sig", newline="") as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(rows[0], list(comment.keys()))
+        self.assertEqual(rows[1], rows[2])
+        self.assertEqual(rows[1][rows[0].index("content")], "求链接")
+
+        with patch("store.xhs.xhs_store_sql.add_or_update_comment", new_callable=AsyncMock) as add_or_update_comment:
+            await xhs_store.XhsDbStoreImplement().store_comment(comment)
+        db_item = add_or_update_comment.await_args.args[0]
+        self.assertIsInstance(db_item, dict)
+        self.assertEqual(db_item, dict(comment.model_dump(), add_ts=db_item["add_ts"]))
@@ -0,0 +1,58 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.throttle import AsyncThrottle, get_throttle
+
+
+class TestAsyncThrottle(IsolatedAsyncioTestCase):
+
+    async def test_wait_spaces_requests(self):
+        throttle = AsyncThrottle("test")
+        start = time.monotonic()
+        await asyncio.gather(*[throttle.wait(0.05) for _ in range(4)])
+        # 第一个请求立即执行，后面三个依次间隔 0.05 秒
+        self.assertGreaterEqual(time.monotonic() - start, 0.14)
+
+    async def test_pause_does_not_block_other_tasks(self):
+        throttle = get_throttle("test_pause", {"http://": "http://127.0.0.1:1"})
+        other_throttle = get_throttle("test_pause")
+        self.assertIsNot(throttle, other_throttle)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        async def other_platform():
+            for _ in range(5):
+                await other_throttle.wait(0.01)
+            return time.monotonic()
+
+        ticker_task = asyncio.create_task(ticker())
+        start = time.monotonic()
+        throttle.pause(0.3)
+        paused_wait = asyncio.create_task(throttle.wait())
+        other_done_at = await other_platform()
+        await paused_wait
+        paused_done_at = time.monotonic()
+        ticker_task.cancel()
+
+        self.assertGreaterEqual(paused_done_at - start, 0.29)
+        # 暂停期间其他协程照常推进
+        self.assertLess(other_done_at - start, 0.2)
+        self.assertGreaterEqual(ticks, 10)
@@ -0,0 +1,55 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+from media_platform.tieba.help import TieBaExtractor, parse_page
+from model.m_baidu_tieba import TiebaCommentRecord
+from test.benchmark_tieba_extractor import CREATOR_PAGE, FIXTURE_DIR, LegacyTieBaExtractor, dump, make_cases
+
+
+class TestTieBaExtractor(unittest.TestCase):
+
+    def test_same_output_as_parsel_extractor(self):
+        for (name, legacy_case), (_, current_case) in zip(make_cases(LegacyTieBaExtractor()),
+                                                          make_cases(TieBaExtractor())):
+            with self.subTest(page=name):
+                self.assertEqual(dump(current_case()), dump(legacy_case()))
+
+    def test_parsed_page_is_shared(self):
+        extractor = TieBaExtractor()
+        creator_page = parse_page(CREATOR_PAGE)
+        creator = extractor.extract_creator_info(creator_page)
+        self.assertEqual((creator.user_name, creator.user_id, creator.gender, creator.ip_location),
+                         ("relakkes", "tb.1.abc", "男", "广东"))
+        self.assertEqual((creator.follows, creator.fans, creator.registration_duration), (12, 345, "1.9年"))
+        self.assertEqual(extractor.extract_tieba_thread_id_list_from_creator_page(creator_page),
+                         ["9117888152", "9117888153"])
+
+    def test_note_detail(self):
+        with open(os.path.join(FIXTURE_DIR, "note_detail.html"), encoding="utf-8") as f:
+            note = TieBaExtractor().extract_note_detail(f.read())
+        self.assertTrue(note.note_id.isdigit())
+        self.assertTrue(note.tieba_name)
+        self.assertNotIn("_百度贴吧", note.title)
+
+    def test_empty_page(self):
+        extractor = TieBaExtractor()
+        self.assertEqual(extractor.extract_search_note_list(""), [])
+        parent = TiebaCommentRecord(comment_id="1", content="", note_id="2", note_url="", tieba_id="", tieba_name="",
+                                    tieba_link="")
+        self.assertEqual(extractor.extract_tieba_note_sub_comments("<html></html>", parent), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
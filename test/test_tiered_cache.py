@@ -0,0 +1,116 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from cache.cache_factory import CacheFactory
+from cache.local_cache import ExpiringLocalCache
+from cache.redis_cache import RedisCache
+from cache.tiered_cache import TieredCache
+from config import db_config
+from test.local_redis_server import LocalRedisServer
+
+
+class CountingFarCache(ExpiringLocalCache):
+    """
+    模拟远端缓存，统计远端读取次数
+    """
+
+    def __init__(self):
+        super().__init__(cron_interval=10)
+        self.far_reads = 0
+
+    def get_with_ttl(self, key):
+        self.far_reads += 1
+        return super().get_with_ttl(key)
+
+
+class TestTieredCache(unittest.TestCase):
+
+    def setUp(self):
+        self.far = CountingFarCache()
+        self.cache = TieredCache(self.far, near_max_entries=2, near_ttl=5, negative_ttl=0.5)
+
+    def test_read_through(self):
+        self.far.set("ppool_1", "ip", 60)
+        self.assertEqual([self.cache.get("ppool_1") for _ in range(5)], ["ip"] * 5)
+        self.assertEqual(self.far.far_reads, 1)
+        self.assertEqual(self.cache.get_stats()["near_hits"], 4)
+
+    def test_near_ttl_follows_far_ttl(self):
+        self.far.set("sms_code", "123456", 1)
+        self.assertEqual(self.cache.get("sms_code"), "123456")
+        time.sleep(1.1)
+        self.assertIsNone(self.cache.get("sms_code"))
+        self.assertEqual(self.far.far_reads, 2)
+
+    def test_write_through(self):
+        self.cache.set("ppool_1", "ip", 60)
+        self.assertEqual(self.far.get("ppool_1"), "ip")
+        self.assertEqual(self.cache.get("ppool_1"), "ip")
+        self.assertEqual(self.far.far_reads, 0)
+        self.assertEqual(self.cache.keys("ppool_*"), ["ppool_1"])
+
+    def test_negative_cache(self):
+        self.assertIsNone(self.cache.get("sms_code"))
+        self.assertIsNone(self.cache.get("sms_code"))
+        self.assertEqual(self.far.far_reads, 1)
+        # 其他进程写入远端，否定结果过期后可以读到
+        self.far.set("sms_code", "123456", 60)
+        time.sleep(0.6)
+        self.assertEqual(self.cache.get("sms_code"), "123456")
+        # 本进程写入会立即覆盖否定结果
+        self.assertIsNone(self.cache.get("other"))
+        self.cache.set("other", "v", 60)
+        self.assertEqual(self.cache.get("other"), "v")
+
+    def test_near_tier_is_bounded(self):
+        for i in range(5):
+            self.cache.set(f"k{i}", i, 60)
+        self.assertEqual(self.cache.get_stats()["near_size"], 2)
+        self.assertEqual(self.cache.get("k0"), 0)
+        self.assertEqual(self.far.far_reads, 1)
+
+    def test_redis_far_cache(self):
+        loop = asyncio.new_event_loop()
+        server = LocalRedisServer()
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            with mock.patch.object(db_config, "REDIS_DB_HOST", "127.0.0.1"), \
+                    mock.patch.object(db_config, "REDIS_DB_PORT", server.port):
+                cache = CacheFactory.create_cache("tiered")
+            self.assertIsInstance(cache, TieredCache)
+            cache.set("ppool_1", {"ip": "1.1.1.1"}, 60)
+            other_process = TieredCache(cache._far_cache)
+            self.assertEqual(other_process.get("ppool_1"), {"ip": "1.1.1.1"})
+            value, ttl = other_process._far_cache.get_with_ttl("ppool_1")
+            self.assertTrue(0 < ttl <= 60)
+            self.assertEqual(server.command_stats["PTTL"], 2)
+            self.assertIsNone(other_process.get("not_exist"))
+            self.assertEqual(other_process.get_stats()["far_misses"], 1)
+            self.assertIsInstance(cache._far_cache, RedisCache)
+            cache._far_cache._redis_client.close()
+        finally:
+            asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase
+
+import jieba
+
+import config
+from tools.words import AsyncWordCloudGenerator
+
+COMMENTS = [
+    {"content": "这个视频拍得真好，摄影师很用心"},
+    {"content": "摄影师的构图真好看"},
+    {"nickname": "没有内容字段"},
+    {"content": "真好，下次还来"},
+]
+
+
+class TestAsyncWordCloudGenerator(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp_dir.name, "words", "search_comments")
+        self.generator = AsyncWordCloudGenerator()
+
+    async def test_incremental_word_freq(self):
+        for comment in COMMENTS:
+            self.generator.add_items([comment], self.prefix)
+        all_text = ' '.join(item['content'] for item in COMMENTS if 'content' in item)
+        expected = Counter(word for word in jieba.lcut(all_text)
+                           if word not in self.generator.stop_words and len(word.strip()) > 0)
+        self.assertEqual(self.generator.word_freqs[self.prefix], expected)
+
+    async def test_render_once_on_close(self):
+        self.generator.add_items(COMMENTS, self.prefix)
+        self.assertFalse(os.path.exists(f"{self.prefix}_word_freq.json"))
+        await self.generator.close()
+        with open(f"{self.prefix}_word_freq.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), dict(self.generator.word_freqs[self.prefix]))
+        if not os.path.exists(config.FONT_PATH):
+            self.skipTest(f"font file {config.FONT_PATH} not found")
+        self.assertTrue(os.path.exists(f"{self.prefix}_word_cloud.png"))
+
+    async def asyncTearDown(self):
+        await self.generator.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,53 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from media_platform.xhs.help import camel_to_underscore, parse_note_detail_from_html
+
+NOTE_ID = "66fad51c000000001b0224b8"
+HTML = (
+    '<html><script>window.__SSR__=true</script><body>'
+    '<script>window.__INITIAL_STATE__={"global":{"serverTime":1700000000000},"note":{"firstNoteId":"%s",'
+    '"noteDetailMap":{"%s":{"currentTime":1,"note":{"noteId":"%s","desc":"undefined 不是值","video":undefined,'
+    '"interactInfo":{"likedCount":"10"},"imageList":[{"urlDefault":"a","infoList":[{"imageScene":"WB_DFT"}]}],'
+    '"atUserList":[undefined]}}}}}</script><script src="/vendor.js"></script></html>'
+) % (NOTE_ID, NOTE_ID, NOTE_ID)
+
+
+class TestXhsNoteHtml(unittest.TestCase):
+
+    def test_parse_note_detail(self):
+        note = parse_note_detail_from_html(HTML, NOTE_ID)
+        self.assertEqual(note, {
+            "note_id": NOTE_ID,
+            "desc": "undefined 不是值",
+            "video": "",
+            "interact_info": {"liked_count": "10"},
+            "image_list": [{"url_default": "a", "info_list": [{"image_scene": "WB_DFT"}]}],
+            "at_user_list": [""],
+        })
+
+    def test_empty_or_missing_state(self):
+        self.assertEqual(parse_note_detail_from_html("<script>window.__INITIAL_STATE__={}</script>", NOTE_ID), {})
+        self.assertIsNone(parse_note_detail_from_html("<html>登录后查看</html>", NOTE_ID))
+        with self.assertRaises(KeyError):
+            parse_note_detail_from_html(HTML, "not_exist")
+
+    def test_camel_to_underscore(self):
+        self.assertEqual(camel_to_underscore("noteDetailMap"), "note_detail_map")
+        self.assertEqual(camel_to_underscore("IPLocation"), "i_p_location")
+        self.assertEqual(camel_to_underscore("desc"), "desc")
+
+
+if __name__ == '__main__':
+    unittest.main()
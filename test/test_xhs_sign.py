@@ -0,0 +1,78 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import base64
+import json
+import random
+import string
+import unittest
+
+from media_platform.xhs.help import (b64_encode_fast, b64Encode, encodeUtf8, get_b3_trace_id,
+                                     get_b3_trace_id_fast, lookup, mrc, mrc_fast, sign)
+
+
+def random_text(min_len: int, max_len: int, alphabet: str = string.printable) -> str:
+    return "".join(random.choice(alphabet) for _ in range(random.randint(min_len, max_len)))
+
+
+def b64_decode(text: str) -> bytes:
+    table = str.maketrans("".join(lookup), "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")
+    return base64.b64decode(text.translate(table))
+
+
+class TestXhsSignFastPath(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(20250505)
+
+    def test_mrc(self):
+        for _ in range(2000):
+            text = random_text(57, 300, string.printable + "\xe9\xff")
+            self.assertEqual(mrc_fast(text), mrc(text))
+        x_t, x_s = "1730000000000", "XYW_" + random_text(200, 200, string.ascii_letters)
+        self.assertEqual(mrc_fast(x_t + x_s), mrc(x_t + x_s))
+        # 和原实现一样，长度不足或者包含码点大于 255 的字符时抛出 IndexError
+        for text in ("short", "中" * 60, "a" * 56):
+            self.assertRaises(IndexError, mrc, text)
+            self.assertRaises(IndexError, mrc_fast, text)
+
+    def test_b64_encode(self):
+        for length in range(0, 64):
+            text = random_text(length, length, string.printable + "中文ü")
+            self.assertEqual(b64_encode_fast(text.encode("utf-8")), b64Encode(encodeUtf8(text)))
+            data = bytes(random.getrandbits(8) for _ in range(length))
+            self.assertEqual(b64_encode_fast(data), b64Encode(list(data)))
+        # 超过 b64Encode 分块大小 16383 的输入
+        text = random_text(50000, 50000)
+        self.assertEqual(b64_encode_fast(text.encode("utf-8")), b64Encode(encodeUtf8(text)))
+
+    def test_sign_x_s_common(self):
+        a1, b1 = random_text(52, 52, string.hexdigits), random_text(200, 200, string.ascii_letters + "+/=")
+        x_s, x_t = "XYW_" + random_text(300, 300, string.ascii_letters), "1730000000000"
+        headers = sign(a1, b1, x_s, x_t)
+        common = json.loads(b64_decode(headers["x-s-common"]))
+        self.assertEqual(common["x9"], mrc(x_t + x_s + b1))
+        self.assertEqual((common["x5"], common["x6"], common["x7"], common["x8"]), (a1, x_t, x_s, b1))
+        common_str = json.dumps(common, separators=(',', ':'))
+        self.assertEqual(headers["x-s-common"], b64Encode(encodeUtf8(common_str)))
+        self.assertEqual((headers["x-s"], headers["x-t"]), (x_s, x_t))
+
+    def test_b3_trace_id(self):
+        for _ in range(200):
+            trace_id = get_b3_trace_id_fast()
+            self.assertEqual(len(trace_id), len(get_b3_trace_id()))
+            self.assertTrue(set(trace_id) <= set("abcdef0123456789"))
+        self.assertGreater(len({get_b3_trace_id_fast() for _ in range(1000)}), 990)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : AIMD 自适应并发控制，可以直接替换 asyncio.Semaphore 使用
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple, Type
+
+import httpx
+
+import config
+
+from . import utils
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    自适应并发限制器，用法和 asyncio.Semaphore 相同: async with limiter: ...
+    - 并发跑满且延迟正常时，每完成一轮（当前并发数个请求）并发上限加 increase_step
+    - 出现风控/请求失败（各平台的 IPBlockError、DataFetchError 都继承自 httpx.RequestError）时并发上限乘以 decrease_factor
+    异常在 async with 内部被捕获时，可以调用 record_error() 主动上报
+    """
+
+    def __init__(self, name: str, initial_limit: int, min_limit: int = 1, max_limit: Optional[int] = None,
+                 increase_step: float = 1.0, decrease_factor: float = 0.5, latency_factor: float = 2.0,
+                 backoff_cooldown: float = 1.0,
+                 error_types: Tuple[Type[BaseException], ...] = (httpx.RequestError,)) -> None:
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, initial_limit, max_limit or initial_limit)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.backoff_cooldown = backoff_cooldown
+        self.error_types = error_types
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._started_at: Dict[asyncio.Task, float] = {}
+        self._errored: Set[asyncio.Task] = set()
+        self._baseline_latency: Optional[float] = None
+        self._last_backoff_at = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def locked(self) -> bool:
+        return self._in_flight >= self.limit
+
+    async def acquire(self) -> None:
+        while self.locked():
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                elif not self.locked():
+                    # 已经被唤醒但取消了，把名额让给下一个等待者
+                    self._wake_up()
+                raise
+        self._in_flight += 1
+        self._started_at[asyncio.current_task()] = time.monotonic()
+
+    def release(self) -> None:
+        task = asyncio.current_task()
+        started_at = self._started_at.pop(task, None)
+        self._in_flight -= 1
+        if task in self._errored:
+            self._errored.discard(task)
+        elif started_at is not None:
+            self._on_success(time.monotonic() - started_at)
+        self._wake_up()
+
+    def record_error(self) -> None:
+        """
+        上报当前请求被风控或失败，并发上限按乘性减少
+        :return:
+        """
+        task = asyncio.current_task()
+        if task in self._started_at:
+            self._errored.add(task)
+        now = time.monotonic()
+        if now - self._last_backoff_at < self.backoff_cooldown:
+            # 同一波失败只退避一次，避免并发的失败请求把上限连续压到最低
+            return
+        self._last_backoff_at = now
+        old_limit = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        if self.limit != old_limit:
+            utils.logger.warning(
+                f"[AdaptiveConcurrencyLimiter.record_error] {self.name} back off concurrency {old_limit} -> {self.limit}"
+            )
+
+    def _on_success(self, latency: float) -> None:
+        baseline = self._baseline_latency
+        self._baseline_latency = latency if baseline is None else baseline * 0.9 + latency * 0.1
+        if baseline is not None and latency > baseline * self.latency_factor:
+            return
+        # 只有并发被跑满时才加大上限，空闲时不会无限增长
+        if self._in_flight + 1 < self.limit or self._limit >= self.max_limit:
+            return
+        old_limit = self.limit
+        self._limit = min(float(self.max_limit), self._limit + self.increase_step / self._limit)
+        if self.limit != old_limit:
+            utils.logger.info(
+                f"[AdaptiveConcurrencyLimiter._on_success] {self.name} increase concurrency {old_limit} -> {self.limit}"
+            )
+
+    def _wake_up(self) -> None:
+        free_slots = self.limit - self._in_flight
+        while free_slots > 0 and self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                free_slots -= 1
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            if isinstance(exc, self.error_types):
+                self.record_error()
+            else:
+                # 其他异常（包括任务被取消）既不算成功也不算风控，不参与调整
+                self._started_at.pop(asyncio.current_task(), None)
+        self.release()
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(name: str, initial_limit: Optional[int] = None) -> AdaptiveConcurrencyLimiter:
+    """
+    按名称获取全局共享的并发限制器，翻页时不会重新创建，学到的并发上限可以延续到下一页
+    :param name: 名称，如 xhs.detail、xhs.comments
+    :param initial_limit: 初始并发数，默认 MAX_CONCURRENCY_NUM，只在第一次创建时生效
+    :return:
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        initial_limit = initial_limit or config.MAX_CONCURRENCY_NUM
+        if config.ENABLE_ADAPTIVE_CONCURRENCY:
+            limiter = AdaptiveConcurrencyLimiter(
+                name, initial_limit,
+                max_limit=config.ADAPTIVE_CONCURRENCY_MAX_NUM,
+                latency_factor=config.ADAPTIVE_CONCURRENCY_LATENCY_FACTOR,
+            )
+        else:
+            limiter = AdaptiveConcurrencyLimiter(name, initial_limit, min_limit=initial_limit, max_limit=initial_limit)
+        _limiters[name] = limiter
+    return limiter
@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 长连接复用的 httpx 连接池，供所有 API 客户端共享
+import importlib.util
+import json
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional
+
+import httpx
+
+import config
+
+from . import utils
+
+
+def is_http2_available() -> bool:
+    """
+    httpx 的 HTTP/2 支持依赖可选的 h2 包
+    :return:
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_async_client(proxies: Optional[Dict] = None, **kwargs) -> httpx.AsyncClient:
+    """
+    按照配置创建一个带连接池限制、keep-alive 过期时间的 httpx.AsyncClient
+    :param proxies: httpx 格式的代理
+    :param kwargs: 透传给 httpx.AsyncClient 的其他参数
+    :return:
+    """
+    limits = httpx.Limits(
+        max_connections=config.HTTPX_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTPX_KEEPALIVE_EXPIRY,
+    )
+    http2 = config.HTTPX_ENABLE_HTTP2
+    if http2 and not is_http2_available():
+        utils.logger.warning("[create_async_client] HTTP/2 is enabled but h2 is not installed, fallback to HTTP/1.1")
+        http2 = False
+    # 长连接客户端不保存服务端下发的cookie，登录态统一由各个客户端的请求头维护，和每次新建客户端时的行为保持一致
+    cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    return httpx.AsyncClient(proxies=proxies, limits=limits, http2=http2, cookies=cookies, **kwargs)
+
+
+def make_proxy_key(proxies: Optional[Dict]) -> str:
+    """
+    把 httpx 格式的代理转换为稳定的字符串，用于按代理维度区分连接池、限速等状态
+    :param proxies: httpx 格式的代理，可以是字符串或字典
+    :return: 不使用代理时返回空字符串
+    """
+    if not proxies:
+        return ""
+    if isinstance(proxies, str):
+        return proxies
+    return json.dumps(proxies, sort_keys=True)
+
+
+class AsyncHttpClientPool:
+    """
+    按代理维度缓存 httpx.AsyncClient，同一个代理下的请求复用 TCP/TLS 连接
+    """
+
+    def __init__(self, **client_kwargs) -> None:
+        """
+        :param client_kwargs: 创建 httpx.AsyncClient 时的公共参数
+        """
+        self._client_kwargs = client_kwargs
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        # 每个代理一个客户端，共用一个 SSL 上下文，新增代理时不需要重新加载证书
+        self._ssl_context = None
+
+    @staticmethod
+    def _make_key(proxies: Optional[Dict]) -> str:
+        return make_proxy_key(proxies)
+
+    def get_client(self, proxies: Optional[Dict] = None) -> httpx.AsyncClient:
+        """
+        获取指定代理对应的长连接客户端，不存在或已关闭时新建
+        :param proxies: httpx 格式的代理
+        :return:
+        """
+        key = self._make_key(proxies)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client_kwargs = self._client_kwargs
+            if "verify" not in client_kwargs:
+                if self._ssl_context is None:
+                    self._ssl_context = httpx.create_ssl_context()
+                client_kwargs = dict(client_kwargs, verify=self._ssl_context)
+            client = create_async_client(proxies=proxies, **client_kwargs)
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        """
+        关闭池子中所有的客户端，释放连接
+        :return:
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            if not client.is_closed:
+                await client.aclose()
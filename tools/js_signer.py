@@ -0,0 +1,238 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻 Node 进程池执行 JS 签名，避免 execjs 每次调用都新起 node 进程并重新加载签名脚本
+import asyncio
+import functools
+import itertools
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+import execjs
+
+import config
+
+from . import utils
+
+SIGN_WORKER_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "sign_worker.js")
+
+# 单个签名进程一次输出的最大行长度
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class JsSignError(Exception):
+    """JS 签名执行失败"""
+
+
+class JsSignWorker:
+    """
+    单个常驻 Node 签名进程，签名脚本只在启动时加载一次，请求和响应都是按行分隔的 JSON 批量数据
+    """
+
+    def __init__(self, js_path: str) -> None:
+        self.js_path = js_path
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._waiters: Dict[int, asyncio.Future] = {}
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._waiters)
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            "node", SIGN_WORKER_JS, self.js_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=_STREAM_LIMIT,
+        )
+        ready_line = await self._process.stdout.readline()
+        if json.loads(ready_line or b"null") != "ready":
+            await self.close()
+            raise JsSignError(f"sign worker start failed, js_path: {self.js_path}")
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    def submit(self, requests: List[Tuple[int, str, list, asyncio.Future]]) -> None:
+        """
+        一次写入一批签名请求，结果由读协程回填到各自的 future
+        :param requests: (请求ID, 函数名, 参数, future) 列表
+        :return:
+        """
+        payload = [[request_id, func_name, args] for request_id, func_name, args, _ in requests]
+        # 序列化、写入都成功后才登记 future，失败时由调用方处理这一批请求
+        self._process.stdin.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        for request_id, _, _, future in requests:
+            self._waiters[request_id] = future
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                for request_id, ok, result in json.loads(line):
+                    future = self._waiters.pop(request_id, None)
+                    if future is None or future.done():
+                        continue
+                    if ok:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(JsSignError(result))
+        finally:
+            self._fail_waiters(JsSignError(f"sign worker exited, js_path: {self.js_path}"))
+
+    def _fail_waiters(self, exc: Exception) -> None:
+        waiters, self._waiters = self._waiters, {}
+        for future in waiters.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def close(self) -> None:
+        if self._process is not None and self._process.returncode is None:
+            self._process.stdin.close()
+            try:
+                await asyncio.wait_for(self._process.wait(), timeout=3)
+            except asyncio.TimeoutError:
+                self._process.kill()
+                await self._process.wait()
+        if self._reader_task is not None:
+            await self._reader_task
+            self._reader_task = None
+        self._process = None
+
+
+class JsSignWorkerPool:
+    """
+    签名进程池：同一轮事件循环内提交的签名请求会合并成一批，按负载分发给各个常驻进程
+    本机没有 node 时退化为在线程池里调用 execjs，保证不阻塞事件循环
+    """
+
+    def __init__(self, js_path: str, size: Optional[int] = None) -> None:
+        self.js_path = js_path
+        self.size = size or config.JS_SIGN_WORKER_NUM
+        self._workers: List[JsSignWorker] = []
+        self._pending: List[Tuple[int, str, list, asyncio.Future]] = []
+        self._flush_scheduled = False
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._id_counter = itertools.count()
+        self._execjs_ctx = None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def is_node_available() -> bool:
+        # 每次签名都会调用，shutil.which 要扫描整个 PATH，结果缓存下来只查找一次
+        return shutil.which("node") is not None
+
+    async def call(self, func_name: str, *args: Any) -> Any:
+        """
+        异步调用签名脚本中的函数
+        :param func_name: JS 函数名
+        :param args: 函数参数，需要可以 JSON 序列化
+        :return:
+        """
+        if not self.is_node_available():
+            return await asyncio.to_thread(self._call_by_execjs, func_name, *args)
+
+        await self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((next(self._id_counter), func_name, list(args), future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+        return await future
+
+    async def _ensure_workers(self) -> None:
+        if len(self._workers) == self.size and all(worker.is_alive for worker in self._workers):
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive]
+            while len(self._workers) < self.size:
+                worker = JsSignWorker(self.js_path)
+                await worker.start()
+                self._workers.append(worker)
+            utils.logger.debug(f"[JsSignWorkerPool._ensure_workers] {self.size} sign workers ready for {self.js_path}")
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        workers = [worker for worker in self._workers if worker.is_alive]
+        if not workers:
+            self._fail_requests(pending, JsSignError(f"no alive sign worker, js_path: {self.js_path}"))
+            return
+        # 按当前积压的请求数从少到多均分这一批请求
+        workers.sort(key=lambda w: w.pending_count)
+        chunk_size = -(-len(pending) // len(workers))
+        dispatched = 0
+        try:
+            for index, worker in enumerate(workers):
+                chunk = pending[index * chunk_size:(index + 1) * chunk_size]
+                dispatched += len(chunk)
+                if not chunk:
+                    continue
+                # _flush 由 call_soon 调用，异常不能抛给事件循环，否则这一批请求的调用方会一直等待
+                try:
+                    worker.submit(chunk)
+                except Exception as e:
+                    utils.logger.error(f"[JsSignWorkerPool._flush] submit {len(chunk)} sign requests failed, err: {e}")
+                    self._fail_requests(chunk, JsSignError(f"submit sign request failed: {e!r}"))
+        finally:
+            self._fail_requests(pending[dispatched:], JsSignError(f"sign request not dispatched, js_path: {self.js_path}"))
+
+    @staticmethod
+    def _fail_requests(requests: List[Tuple[int, str, list, asyncio.Future]], exc: Exception) -> None:
+        for _, _, _, future in requests:
+            if not future.done():
+                future.set_exception(exc)
+
+    def _call_by_execjs(self, func_name: str, *args: Any) -> Any:
+        if self._execjs_ctx is None:
+            with open(self.js_path, encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return self._execjs_ctx.call(func_name, *args)
+
+    async def close(self) -> None:
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            await worker.close()
+
+
+_sign_worker_pools: Dict[str, JsSignWorkerPool] = {}
+
+
+def get_sign_worker_pool(js_path: str) -> JsSignWorkerPool:
+    """
+    按签名脚本获取全局共享的签名进程池
+    :param js_path: 签名脚本路径
+    :return:
+    """
+    if js_path not in _sign_worker_pools:
+        _sign_worker_pools[js_path] = JsSignWorkerPool(js_path)
+    return _sign_worker_pools[js_path]
+
+
+async def close_sign_worker_pools() -> None:
+    """
+    关闭所有签名进程
+    :return:
+    """
+    pools = list(_sign_worker_pools.values())
+    _sign_worker_pools.clear()
+    for pool in pools:
+        await pool.close()
@@ -0,0 +1,199 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JSON 编解码层，安装了 orjson 或 msgspec 时使用它们，否则使用标准库 json
+#            接口响应解析、各平台存储、词频文件、jsonl 写入统一从这里编解码
+import json
+from typing import Any, Dict, Optional, Union
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+JsonInput = Union[str, bytes, bytearray, memoryview]
+
+
+def _encode_default(obj: Any) -> Any:
+    """
+    编码 SlotsRecord、pydantic 模型等提供 model_dump 的对象，其他不支持的类型和各后端一样抛出 TypeError
+    :param obj:
+    :return:
+    """
+    model_dump = getattr(obj, "model_dump", None)
+    if model_dump is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return model_dump()
+
+
+class StdlibJsonCodec:
+    """
+    标准库 json，输出和之前各处直接调用 json.dumps(..., ensure_ascii=False) 完全一致
+    """
+    name = "json"
+
+    @staticmethod
+    def loads(data: JsonInput) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any, indent: Optional[int] = None) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=indent, default=_encode_default)
+
+    @staticmethod
+    def dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_encode_default).encode("utf-8")
+
+
+class OrjsonCodec:
+    """
+    orjson，输出紧凑格式，缩进固定为 2 个空格
+    """
+    name = "orjson"
+
+    @staticmethod
+    def loads(data: JsonInput) -> Any:
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any, indent: Optional[int] = None) -> str:
+        return OrjsonCodec._dumps(obj, indent).decode("utf-8")
+
+    @staticmethod
+    def dumps_bytes(obj: Any) -> bytes:
+        return OrjsonCodec._dumps(obj, None)
+
+    @staticmethod
+    def _dumps(obj: Any, indent: Optional[int]) -> bytes:
+        # 和标准库一样允许 int 等非字符串的键
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_encode_default, option=option)
+
+
+class MsgspecCodec:
+    """
+    msgspec.json，输出紧凑格式
+    """
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self._encoder = msgspec.json.Encoder(enc_hook=_encode_default)
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, data: JsonInput) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            # 和标准库、orjson 一样抛出 json.JSONDecodeError，调用方不用区分后端
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else "", 0) from e
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> str:
+        return self._dumps(obj, indent).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self._dumps(obj, None)
+
+    def _dumps(self, obj: Any, indent: Optional[int]) -> bytes:
+        data = self._encoder.encode(obj)
+        return msgspec.json.format(data, indent=indent) if indent else data
+
+
+_CODEC_CLASSES: Dict[str, type] = {
+    StdlibJsonCodec.name: StdlibJsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+}
+
+
+def available_backends() -> Dict[str, bool]:
+    """
+    各个 JSON 后端是否可用
+    :return:
+    """
+    return {
+        StdlibJsonCodec.name: True,
+        OrjsonCodec.name: orjson is not None,
+        MsgspecCodec.name: msgspec is not None,
+    }
+
+
+def create_json_codec(backend: Optional[str] = None):
+    """
+    创建 JSON 编解码器
+    :param backend: auto | orjson | msgspec | json，默认 JSON_CODEC_BACKEND；auto 按 orjson、msgspec、json 的顺序选择已安装的后端
+    :return:
+    """
+    backend = backend or config.JSON_CODEC_BACKEND
+    if backend == "auto":
+        available = available_backends()
+        backend = next(name for name in (OrjsonCodec.name, MsgspecCodec.name, StdlibJsonCodec.name) if available[name])
+    if backend not in _CODEC_CLASSES:
+        raise ValueError(f"[json_codec.create_json_codec] Invalid JSON codec backend: {backend}, "
+                         f"only supported auto or {' or '.join(_CODEC_CLASSES)}")
+    if not available_backends()[backend]:
+        raise ValueError(f"[json_codec.create_json_codec] JSON codec backend {backend} is not installed")
+    return _CODEC_CLASSES[backend]()
+
+
+_codec = create_json_codec()
+
+
+def set_json_backend(backend: Optional[str] = None) -> str:
+    """
+    切换全局使用的 JSON 后端
+    :param backend: 同 create_json_codec
+    :return: 实际使用的后端名称
+    """
+    global _codec
+    _codec = create_json_codec(backend)
+    return _codec.name
+
+
+def get_json_backend() -> str:
+    return _codec.name
+
+
+def loads(data: JsonInput) -> Any:
+    """
+    解码 JSON，支持 str 和 utf-8 编码的 bytes
+    :param data:
+    :return:
+    """
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """
+    编码为 JSON 字符串，非 ASCII 字符不转义
+    :param obj:
+    :param indent: 缩进，None 表示不换行；orjson 后端只支持 2 个空格的缩进
+    :return:
+    """
+    return _codec.dumps(obj, indent)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    编码为紧凑格式的 utf-8 JSON bytes，用于写缓存等不需要可读性的场景
+    :param obj:
+    :return:
+    """
+    return _codec.dumps_bytes(obj)
@@ -0,0 +1,142 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JSON Lines 追加写入，每个文件保持一个追加句柄，缓冲批量写入并定期落盘
+import asyncio
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional
+
+import aiofiles
+
+import config
+
+from . import json_codec, utils
+
+
+def convert_jsonl_to_json(jsonl_path: str, json_path: Optional[str] = None) -> str:
+    """
+    把 jsonl 文件转换为旧版 json 存储格式（indent=4 的 json 数组），逐行流式转换，不把整个文件读进内存
+    :param jsonl_path: jsonl 文件路径
+    :param json_path: 输出的 json 文件路径，默认与 jsonl 文件同名
+    :return: json 文件路径
+    """
+    json_path = json_path or os.path.splitext(jsonl_path)[0] + ".json"
+    with open(jsonl_path, "r", encoding="utf-8") as src, open(json_path, "w", encoding="utf-8") as dst:
+        count = 0
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            # 输出需要和旧版 json 存储逐字节一致，固定用标准库的 indent=4
+            item_str = json.dumps(json_codec.loads(line), ensure_ascii=False, indent=4)
+            dst.write(("[\n    " if count == 0 else ",\n    ") + item_str.replace("\n", "\n    "))
+            count += 1
+        dst.write("\n]" if count else "[]")
+    return json_path
+
+
+class _JsonlFile:
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.handle = None
+        self.buffer: List[str] = []
+        # 缓冲非空时的定时刷新任务，保证数据最多在内存中停留 flush_interval 秒
+        self.flush_task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+
+class AsyncJsonlWriter:
+    """
+    jsonl 追加写入器：数据先进入内存缓冲，攒够一批或超过刷新间隔后一次性追加到文件
+    刷新间隔由后台定时任务保证，爬取很慢、迟迟攒不够一批时缓冲的数据也会按时落盘
+    """
+
+    def __init__(self, flush_batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 fsync: Optional[bool] = None) -> None:
+        self.flush_batch_size = flush_batch_size or config.JSONL_FLUSH_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else config.JSONL_FLUSH_INTERVAL
+        self.fsync = fsync if fsync is not None else config.JSONL_FSYNC
+        self._files: Dict[str, _JsonlFile] = {}
+
+    async def write(self, file_path: str, item: Dict) -> None:
+        """
+        追加一条数据
+        :param file_path: jsonl 文件路径
+        :param item: 数据
+        :return:
+        """
+        jsonl_file = self._files.get(file_path)
+        if jsonl_file is None:
+            jsonl_file = self._files[file_path] = _JsonlFile(file_path)
+        jsonl_file.buffer.append(json_codec.dumps(item) + "\n")
+        if len(jsonl_file.buffer) >= self.flush_batch_size:
+            await self._flush_file(jsonl_file)
+        elif jsonl_file.flush_task is None:
+            jsonl_file.flush_task = asyncio.ensure_future(self._flush_later(jsonl_file))
+
+    async def _flush_later(self, jsonl_file: _JsonlFile) -> None:
+        await asyncio.sleep(self.flush_interval)
+        jsonl_file.flush_task = None
+        try:
+            await self._flush_file(jsonl_file)
+        except Exception as e:
+            utils.logger.error(f"[AsyncJsonlWriter._flush_later] flush {jsonl_file.file_path} failed, err: {e}")
+
+    async def _flush_file(self, jsonl_file: _JsonlFile) -> None:
+        async with jsonl_file.lock:
+            if not jsonl_file.buffer:
+                return
+            lines, jsonl_file.buffer = jsonl_file.buffer, []
+            if jsonl_file.handle is None:
+                pathlib.Path(jsonl_file.file_path).parent.mkdir(parents=True, exist_ok=True)
+                jsonl_file.handle = await aiofiles.open(jsonl_file.file_path, mode="a", encoding="utf-8")
+            await jsonl_file.handle.write("".join(lines))
+            await jsonl_file.handle.flush()
+            if self.fsync:
+                await asyncio.to_thread(os.fsync, jsonl_file.handle.fileno())
+
+    async def flush(self) -> None:
+        """
+        把所有文件的缓冲写入磁盘
+        :return:
+        """
+        for jsonl_file in list(self._files.values()):
+            await self._flush_file(jsonl_file)
+
+    async def close(self, convert_to_json: Optional[bool] = None) -> List[str]:
+        """
+        写入剩余缓冲并关闭所有文件句柄，按需转换为旧版 json 数组文件
+        :param convert_to_json: 是否转换为 json 数组文件，默认读取配置
+        :return: 关闭的 jsonl 文件路径列表
+        """
+        if convert_to_json is None:
+            convert_to_json = config.JSONL_CONVERT_TO_JSON
+        for jsonl_file in self._files.values():
+            if jsonl_file.flush_task is not None:
+                jsonl_file.flush_task.cancel()
+                jsonl_file.flush_task = None
+        await self.flush()
+        files, self._files = list(self._files.values()), {}
+        for jsonl_file in files:
+            if jsonl_file.handle is not None:
+                await jsonl_file.handle.close()
+                jsonl_file.handle = None
+            if convert_to_json and os.path.exists(jsonl_file.file_path):
+                json_path = await asyncio.to_thread(convert_jsonl_to_json, jsonl_file.file_path)
+                utils.logger.info(f"[AsyncJsonlWriter.close] convert {jsonl_file.file_path} to {json_path}")
+        return [jsonl_file.file_path for jsonl_file in files]
+
+
+# 所有平台 jsonl 存储共享的写入器，爬虫结束时由 main 统一关闭
+jsonl_writer = AsyncJsonlWriter()
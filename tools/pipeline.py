@@ -0,0 +1,121 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 分阶段的生产者/消费者流水线，阶段之间用有界队列连接，每个阶段有独立的并发数
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+import config
+
+from . import utils
+
+# 阶段处理函数: handler(item, emit)，通过 await emit(x) 把结果交给下一个阶段，可以交出 0 个或多个结果
+Emit = Callable[[Any], Awaitable[None]]
+StageHandler = Callable[[Any, Emit], Awaitable[None]]
+
+
+class PipelineStage:
+    def __init__(self, name: str, handler: StageHandler, workers: int, queue_size: int) -> None:
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.processed_count = 0
+        self.error_count = 0
+
+
+class CrawlerPipeline:
+    """
+    爬虫流水线，例如 search -> detail -> store -> comments
+    每个阶段从自己的有界队列中取数据，队列满时上一个阶段会等待，下游慢时上游自然降速，内存占用有上限
+    数据放入队列时会带上生产者当时的上下文（如 source_keyword_var），下游阶段在该上下文中处理
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stages: List[PipelineStage] = []
+
+    def add_stage(self, name: str, handler: StageHandler, workers: int = 1,
+                  queue_size: Optional[int] = None) -> "CrawlerPipeline":
+        """
+        添加一个阶段
+        :param name: 阶段名称
+        :param handler: 阶段处理函数
+        :param workers: 该阶段的并发消费者数量
+        :param queue_size: 该阶段输入队列的长度上限，默认读取配置
+        :return:
+        """
+        self.stages.append(PipelineStage(name, handler, workers, queue_size or config.PIPELINE_QUEUE_SIZE))
+        return self
+
+    async def run(self, items: Iterable[Any]) -> None:
+        """
+        把初始数据送入第一个阶段，等待所有阶段处理完成
+        :param items: 第一个阶段的输入，例如关键词列表
+        :return:
+        """
+        if not self.stages:
+            return
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+        worker_tasks = [
+            asyncio.create_task(self._worker(index), name=f"{self.name}.{stage.name}.{worker_index}")
+            for index, stage in enumerate(self.stages)
+            for worker_index in range(stage.workers)
+        ]
+        try:
+            first_queue = self.stages[0].queue
+            for item in items:
+                await first_queue.put((contextvars.copy_context(), item))
+            # 上一个阶段全部处理完后，下一个阶段的输入就不会再增加，按顺序逐个等待即可
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for task in worker_tasks:
+                task.cancel()
+            await asyncio.gather(*worker_tasks, return_exceptions=True)
+        utils.logger.info(
+            f"[CrawlerPipeline.run] {self.name} finished, "
+            + ", ".join(f"{stage.name}: {stage.processed_count} ok / {stage.error_count} error" for stage in self.stages)
+        )
+
+    async def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        emit = self._make_emit(index + 1)
+        while True:
+            ctx, item = await stage.queue.get()
+            try:
+                # 在生产者的上下文副本里执行，下游阶段能读到上游设置的 ContextVar
+                await ctx.run(asyncio.ensure_future, stage.handler(item, emit))
+                stage.processed_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.error_count += 1
+                utils.logger.error(f"[CrawlerPipeline._worker] {self.name}.{stage.name} handle item error: {e}")
+            finally:
+                stage.queue.task_done()
+
+    def _make_emit(self, next_index: int) -> Emit:
+        if next_index >= len(self.stages):
+            async def emit_nothing(_: Any) -> None:
+                return
+
+            return emit_nothing
+        next_queue = self.stages[next_index].queue
+
+        async def emit(item: Any) -> None:
+            await next_queue.put((contextvars.copy_context(), item))
+
+        return emit
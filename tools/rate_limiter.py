@@ -0,0 +1,124 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 令牌桶限速，按 (平台, 接口类型, 代理/账号) 分别控制请求速率
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+import config
+
+from .http_client import make_proxy_key
+
+DEFAULT_ENDPOINT_FAMILY = "default"
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多积攒 capacity 个
+    令牌不够时预支令牌并按欠下的数量计算等待时间，多个等待者按到达顺序依次放行，不需要轮询
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预支令牌
+        :param tokens: 需要的令牌数
+        :return: 需要等待的秒数
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= tokens
+        return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """
+        获取令牌，令牌不够时等待
+        :param tokens: 需要的令牌数
+        :return:
+        """
+        wait_seconds = self.reserve(tokens)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+
+
+class RateLimiter:
+    """
+    请求限速器，规则格式: {平台: {接口类型: (每秒请求数, 突发容量)}}
+    接口类型是 url 中包含的片段（如 "/comment/"），没有匹配到的请求归入 default
+    没有配置规则的平台不限速
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Dict[str, Tuple[float, float]]]] = None,
+                 enabled: Optional[bool] = None) -> None:
+        self.rules = rules if rules is not None else config.RATE_LIMIT_RULES
+        self.enabled = enabled if enabled is not None else config.ENABLE_RATE_LIMIT
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+    def get_endpoint_family(self, platform: str, url: str) -> Optional[str]:
+        """
+        找到 url 对应的接口类型
+        :param platform: 平台名称
+        :param url: 请求地址
+        :return: 平台没有限速规则时返回 None
+        """
+        platform_rules = self.rules.get(platform)
+        if not platform_rules:
+            return None
+        for family in platform_rules:
+            if family != DEFAULT_ENDPOINT_FAMILY and family in url:
+                return family
+        return DEFAULT_ENDPOINT_FAMILY if DEFAULT_ENDPOINT_FAMILY in platform_rules else None
+
+    def get_bucket(self, platform: str, url: str, proxies: Optional[Dict] = None) -> Optional[TokenBucket]:
+        """
+        获取请求对应的令牌桶，不同代理/账号各自有独立的令牌桶
+        :param platform: 平台名称
+        :param url: 请求地址
+        :param proxies: httpx 格式的代理
+        :return: 不需要限速时返回 None
+        """
+        family = self.get_endpoint_family(platform, url)
+        if family is None:
+            return None
+        key = (platform, family, make_proxy_key(proxies))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, capacity = self.rules[platform][family]
+            bucket = self._buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+    async def acquire(self, platform: str, url: str, proxies: Optional[Dict] = None) -> None:
+        """
+        请求前获取令牌
+        :param platform: 平台名称
+        :param url: 请求地址
+        :param proxies: httpx 格式的代理
+        :return:
+        """
+        if not self.enabled:
+            return
+        bucket = self.get_bucket(platform, url, proxies)
+        if bucket is not None:
+            await bucket.acquire()
+
+
+# 所有 API 客户端共享的限速器
+rate_limiter = RateLimiter()
@@ -0,0 +1,171 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 浏览器请求签名相关：缓存从 localStorage 等处读取的签名参数、合并并发的页面签名调用，减少和浏览器之间的通信
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from playwright.async_api import Page
+
+import config
+
+from . import utils
+
+
+class BrowserSignError(Exception):
+    """浏览器内签名函数执行失败"""
+
+
+class SigningContextCache:
+    """
+    按名称缓存签名用到的值（如 xhs 的 b1、抖音的 xmst、B站的 WBI keys），过期或者 cookie 更新后重新读取
+    同一时间同一个名称只会有一个读取在进行，并发的请求共享读取结果
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        """
+        :param ttl: 缓存的存活秒数，默认 SIGN_CONTEXT_CACHE_TTL
+        """
+        self.ttl = ttl if ttl is not None else config.SIGN_CONTEXT_CACHE_TTL
+        self._values: Dict[str, Tuple[Any, float]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        # 每次失效加一，失效前发起的读取结果不再写入缓存
+        self._version = 0
+
+    async def get(self, name: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        获取缓存的值，不存在或已过期时调用 loader 读取
+        :param name: 名称
+        :param loader: 读取函数
+        :return:
+        """
+        item = self._values.get(name)
+        if item is not None and item[1] > time.monotonic():
+            return item[0]
+        task = self._loading.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._load(name, loader, self._version))
+            self._loading[name] = task
+        # shield 防止某个等待方被取消时连带取消其他请求共享的读取
+        return await asyncio.shield(task)
+
+    async def _load(self, name: str, loader: Callable[[], Awaitable[Any]], version: int) -> Any:
+        try:
+            value = await loader()
+        finally:
+            if self._loading.get(name) is asyncio.current_task():
+                del self._loading[name]
+        if version == self._version:
+            self._values[name] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def invalidate(self) -> None:
+        """
+        清空缓存，cookie 更新（重新登录）后调用
+        :return:
+        """
+        self._version += 1
+        self._values.clear()
+        self._loading.clear()
+
+
+async def read_local_storage(page: Page, keys: List[str]) -> Dict[str, str]:
+    """
+    在一次 evaluate 中只读取需要的 localStorage 键，不把整个 localStorage 传回来
+    :param page: playwright 页面
+    :param keys: 需要读取的键
+    :return: 不存在的键值为 None
+    """
+    return await page.evaluate(
+        "(keys) => Object.fromEntries(keys.map((key) => [key, window.localStorage.getItem(key)]))", keys
+    )
+
+
+class BrowserBatchSigner:
+    """
+    浏览器内签名批处理：在一个很短的窗口内收集并发请求的签名参数，合并成一次 evaluate 调用，
+    在页面里依次调用签名函数后一次性返回结果数组，再按顺序回填到各自的 future
+    N 个并发请求只需要和浏览器往返一次
+    """
+
+    def __init__(self, page: Page, func_name: str, window: Optional[float] = None,
+                 max_batch_size: Optional[int] = None) -> None:
+        """
+        :param page: playwright 页面
+        :param func_name: 页面上 window 对象的签名函数名，如 _webmsxyw
+        :param window: 收集请求的窗口秒数，默认 BROWSER_SIGN_BATCH_WINDOW，0 表示只合并同一轮事件循环内的请求
+        :param max_batch_size: 单批最多的请求数，默认 BROWSER_SIGN_BATCH_MAX_SIZE，达到后立即发送
+        """
+        self.page = page
+        self.func_name = func_name
+        self.window = window if window is not None else config.BROWSER_SIGN_BATCH_WINDOW
+        self.max_batch_size = max_batch_size or config.BROWSER_SIGN_BATCH_MAX_SIZE
+        self._pending: List[Tuple[list, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._batch_tasks = set()
+        self._expression = (
+            "(items) => items.map((args) => {"
+            f" try {{ return [true, window.{func_name}(...args)]; }}"
+            " catch (e) { return [false, String(e)]; } })"
+        )
+
+    async def sign(self, *args: Any) -> Any:
+        """
+        调用页面上的签名函数
+        :param args: 签名函数参数，需要可以被 playwright 序列化
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(args), future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.window > 0:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        task = asyncio.ensure_future(self._sign_batch(pending))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _sign_batch(self, pending: List[Tuple[list, asyncio.Future]]) -> None:
+        try:
+            results = await self.page.evaluate(self._expression, [args for args, _ in pending])
+        except Exception as e:
+            utils.logger.error(f"[BrowserBatchSigner._sign_batch] evaluate {self.func_name} failed, batch size: {len(pending)}, err: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if not isinstance(results, list) or len(results) != len(pending):
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(BrowserSignError(f"unexpected batch result of {self.func_name}: {results!r}"))
+            return
+        for (_, future), (ok, result) in zip(pending, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(BrowserSignError(result))
@@ -0,0 +1,68 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 协作式请求节流，按平台 + 代理维度统一控制请求间隔，等待时不阻塞事件循环
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from . import utils
+from .http_client import make_proxy_key
+
+
+class AsyncThrottle:
+    """
+    调用方 await 自己的请求时间片，等待期间让出事件循环，其他协程照常运行
+    同一个节流器上的请求按间隔依次排开；被平台风控时可以 pause，让所有调用方一起暂停
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._next_slot = 0.0
+
+    async def wait(self, interval: float = 0) -> None:
+        """
+        等待下一个请求时间片，并把之后的时间片往后推 interval 秒
+        :param interval: 本次请求和下一次请求之间的最小间隔，单位秒
+        :return:
+        """
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + max(interval, 0)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float) -> None:
+        """
+        让之后的所有请求至少等待 seconds 秒，已经在等待中的请求不受影响
+        :param seconds: 暂停时长，单位秒
+        :return:
+        """
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+        utils.logger.info(f"[AsyncThrottle.pause] {self.name} pause {seconds}s")
+
+
+_throttles: Dict[Tuple[str, str], AsyncThrottle] = {}
+
+
+def get_throttle(platform: str, proxies: Optional[Dict] = None) -> AsyncThrottle:
+    """
+    获取平台 + 代理对应的全局节流器，不同代理之间互不影响
+    :param platform: 平台名称，如 xhs、ks
+    :param proxies: httpx 格式的代理
+    :return:
+    """
+    key = (platform, make_proxy_key(proxies))
+    throttle = _throttles.get(key)
+    if throttle is None:
+        throttle = _throttles[key] = AsyncThrottle(f"{platform}{'@' + key[1] if key[1] else ''}")
+    return throttle
@@ -9,75 +9,155 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
+# -*- coding: utf-8 -*-
+# @Desc    : 评论词频统计和词云图生成，词频增量累加，词云图在独立进程中渲染
 import asyncio
-import json
 import logging
+import multiprocessing
+import pathlib
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Optional, Set
 
-import aiofiles
 import jieba
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 
 import config
-from tools import utils
+from tools import json_codec, utils
+
+
+def render_word_frequency_and_cloud(word_freq: Dict[str, int], save_words_prefix: str, stop_words: Set[str],
+                                    font_path: str):
+    """
+    写入词频文件并渲染词云图，在子进程中执行，避免阻塞事件循环
+    :param word_freq: 词频
+    :param save_words_prefix: 保存文件的前缀
+    :param stop_words: 停用词
+    :param font_path: 字体文件路径
+    :return:
+    """
+    pathlib.Path(save_words_prefix).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{save_words_prefix}_word_freq.json", 'w', encoding='utf-8') as file:
+        file.write(json_codec.dumps(word_freq, indent=4))
+
+    top_20_word_freq = {word: freq for word, freq in
+                        sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
+    wordcloud = WordCloud(
+        font_path=font_path,
+        width=800,
+        height=400,
+        background_color='white',
+        max_words=200,
+        stopwords=stop_words,
+        colormap='viridis',
+        contour_color='steelblue',
+        contour_width=1
+    ).generate_from_frequencies(top_20_word_freq)
+
+    # Save word cloud image
+    plt.figure(figsize=(10, 5), facecolor='white')
+    plt.imshow(wordcloud, interpolation='bilinear')
+
+    plt.axis('off')
+    plt.tight_layout(pad=0)
+    plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
+    plt.close()
 
-plot_lock = asyncio.Lock()
 
 class AsyncWordCloudGenerator:
+    """
+    每条数据只分词一次，按保存文件前缀累加词频；词频文件和词云图在爬虫结束时（或按配置的间隔）统一渲染
+    """
+
     def __init__(self):
         logging.getLogger('jieba').setLevel(logging.WARNING)
         self.stop_words_file = config.STOP_WORDS_FILE
-        self.lock = asyncio.Lock()
         self.stop_words = self.load_stop_words()
         self.custom_words = config.CUSTOM_WORDS
         for word, group in self.custom_words.items():
             jieba.add_word(word)
+        self.word_freqs: Dict[str, Counter] = {}
+        self._dirty_prefixes: Set[str] = set()
+        self._render_lock: Optional[asyncio.Lock] = None
+        self._render_handle: Optional[asyncio.TimerHandle] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
-    async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
-        all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+    def add_items(self, data: Iterable[Dict], save_words_prefix: str):
+        """
+        对新增的数据分词并累加到对应文件前缀的词频中
+        :param data: 新增的数据，取 content 字段分词
+        :param save_words_prefix: 保存文件的前缀
+        :return:
+        """
+        word_freq = self.word_freqs.setdefault(save_words_prefix, Counter())
+        for item in data:
+            content = item.get('content')
+            if not content:
+                continue
+            word_freq.update(word for word in jieba.lcut(content)
+                             if word not in self.stop_words and len(word.strip()) > 0)
+        if word_freq:
+            self._dirty_prefixes.add(save_words_prefix)
+            self._schedule_render()
 
-        # Save word frequency to file
-        freq_file = f"{save_words_prefix}_word_freq.json"
-        async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
-            await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
-
-        # Try to acquire the plot lock without waiting
-        if plot_lock.locked():
-            utils.logger.info("Skipping word cloud generation as the lock is held.")
+    def _schedule_render(self):
+        if config.WORDCLOUD_RENDER_INTERVAL <= 0 or self._render_handle is not None:
             return
+        loop = asyncio.get_running_loop()
+        self._render_handle = loop.call_later(
+            config.WORDCLOUD_RENDER_INTERVAL, lambda: loop.create_task(self._timed_render())
+        )
+
+    async def _timed_render(self):
+        self._render_handle = None
+        await self.render()
+
+    async def render(self):
+        """
+        把有变化的词频写入文件并渲染词云图
+        :return:
+        """
+        if self._render_lock is None:
+            self._render_lock = asyncio.Lock()
+        async with self._render_lock:
+            prefixes, self._dirty_prefixes = self._dirty_prefixes, set()
+            if not prefixes:
+                return
+            loop = asyncio.get_running_loop()
+            for prefix in prefixes:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+                try:
+                    await loop.run_in_executor(
+                        self._executor, render_word_frequency_and_cloud,
+                        dict(self.word_freqs[prefix]), prefix, self.stop_words, config.FONT_PATH
+                    )
+                except BrokenProcessPool as e:
+                    # 渲染进程异常退出，下次渲染时重新创建
+                    utils.logger.error(f"[AsyncWordCloudGenerator.render] render process exited: {e}")
+                    self._executor = None
+                except Exception as e:
+                    utils.logger.error(f"[AsyncWordCloudGenerator.render] render {prefix} word cloud error: {e}")
+
+    async def close(self):
+        """
+        爬虫结束时渲染剩余的词云图，并关闭渲染进程
+        :return:
+        """
+        if self._render_handle is not None:
+            self._render_handle.cancel()
+            self._render_handle = None
+        await self.render()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
 
-        await self.generate_word_cloud(word_freq, save_words_prefix)
-
-    async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
-        wordcloud = WordCloud(
-            font_path=config.FONT_PATH,
-            width=800,
-            height=400,
-            background_color='white',
-            max_words=200,
-            stopwords=self.stop_words,
-            colormap='viridis',
-            contour_color='steelblue',
-            contour_width=1
-        ).generate_from_frequencies(top_20_word_freq)
-
-        # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+# 所有平台存储共享的词云生成器，爬虫结束时由 main 统一渲染
+word_cloud_generator = AsyncWordCloudGenerator()